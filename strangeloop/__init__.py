@@ -2,6 +2,7 @@
 Strangeloop - A recursive and self-referential AI agent framework.
 """
 
+from importlib import import_module
 from importlib.metadata import version
 
 try:
@@ -9,8 +10,25 @@ try:
 except Exception:
     pass
 
-# Import capabilities if they exist
-try:
-    from .capabilities import *
-except ImportError:
-    pass
+
+# Public classes imported on first access, by the module defining them
+LAZY_ATTRIBUTES = {
+    "Agent": "agent",
+}
+
+
+def __getattr__(name):
+    """
+    Resolve public classes and capabilities lazily, so importing strangeloop (and its CLI) stays cheap.
+    
+    `from strangeloop import Agent` and `from strangeloop import generate_secure_password`
+    keep working: their modules are only imported the first time they are requested.
+    """
+    if name in LAZY_ATTRIBUTES:
+        return getattr(import_module(f"{__name__}.{LAZY_ATTRIBUTES[name]}"), name)
+    if not name.startswith("__"):
+        try:
+            return getattr(import_module(f"{__name__}.capabilities"), name)
+        except (ImportError, AttributeError):
+            pass
+    raise AttributeError(f"module 'strangeloop' has no attribute '{name}'")
@@ -0,0 +1,462 @@
+"""
+Embeddable agent for Strangeloop.
+Plans and executes requests in-process, so a service can serve many concurrent
+requests with one LLM client, capability catalog and set of caches instead of
+running `strangeloop do` once per request.
+"""
+import asyncio
+import collections.abc
+import itertools
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .backends import LLMBackend, create_backend
+from .config import get_config
+from .execution import execute_capability, is_sensitive, recent_execution_stats
+from .journal import REDACTED, record_run
+from .llm import PLANNING, SUMMARIZATION, ask_llm
+from .planner import build_planning_prompt, parse_plan
+from .registry import format_capabilities_for_prompt, get_available_capabilities, get_capability
+from .speculate import MAX_CANDIDATES, candidate_list, run_speculative
+
+# Items collected from a capability that returns a generator, unless streaming
+MAX_STREAMED_ITEMS = 1000
+
+# How long the execution statistics shown to the planner are reused
+STATS_REFRESH_SECONDS = 30.0
+
+# Recorded in place of a result that is streamed to the caller
+STREAMED_RESULT = "<streamed result>"
+
+
+def _collect(result: Any) -> Any:
+    """Collect a streamed result into a list, closing the generator."""
+    if not isinstance(result, collections.abc.Iterator):
+        return result
+    try:
+        return list(itertools.islice(result, MAX_STREAMED_ITEMS))
+    finally:
+        if isinstance(result, collections.abc.Generator):
+            result.close()
+
+
+def _recorded_result(result: Any) -> Any:
+    """The result as recorded in the journal, which can't hold a stream the caller consumes."""
+    return STREAMED_RESULT if isinstance(result, collections.abc.Iterator) else result
+
+
+def _outcome(record: Dict[str, Any], sensitive: bool = False) -> str:
+    """Describe what a do() call did, for the session history (which is sent back to the LLM)."""
+    action = record.get("action")
+    if action == "use_capability":
+        if "result" in record:
+            result = record["result"]
+            if sensitive:
+                shown = REDACTED
+            elif isinstance(result, collections.abc.Iterator):
+                shown = STREAMED_RESULT
+            else:
+                shown = repr(result)
+            return (f"Ran capability '{record['capability']}' with arguments {record['arguments']}, "
+                    f"result: {shown}")
+        return f"Suggested capability '{record['capability']}' with arguments {record['arguments']}"
+    if action == "create_capability":
+        return f"Suggested a new capability: {record.get('description')}"
+    if action == "direct_response":
+        return record.get("response", "")
+    return record.get("error") or repr(record.get("plan"))
+
+
+class Agent:
+    """
+    Strangeloop's AI agent loop as a thread-safe object.
+    
+    An agent owns its LLM client, configuration, capability catalog, plan
+    cache and session store, and can be shared by any number of threads or
+    asyncio tasks. Methods return result dictionaries instead of printing or
+    exiting; errors are reported in the "error" entry.
+    
+    Example:
+        agent = Agent()
+        record = agent.do("generate a secure password")
+        print(record["result"])
+    """
+    
+    def __init__(self, model: Optional[str] = None, backend: Optional[str] = None, hedge: Optional[bool] = None,
+                 max_tokens: int = 4096, temperature: float = 0.7, plan_cache: Optional[bool] = None,
+                 cache_similarity: Optional[float] = None, speculate: Optional[int] = None,
+                 deadline: Optional[float] = None, session_budget: Optional[int] = None, journal: bool = True,
+                 client: Optional[LLMBackend] = None):
+        """
+        Initialize the agent.
+        
+        Args:
+            model: Model used for planning (default: the configured planning model)
+            backend: LLM backend used for planning (default: the configured planning backend)
+            hedge: Whether to hedge slow planning requests (default: the llm_hedging setting)
+            max_tokens: Maximum tokens in each planning response
+            temperature: Temperature for planning
+            plan_cache: Whether to reuse cached plans (default: the plan_cache setting)
+            cache_similarity: Minimum similarity for reusing a plan cached for a different request
+                (default: the plan_cache_similarity setting)
+            speculate: Candidate capabilities to try, idempotent ones concurrently (default: the speculate
+                setting, at most 5)
+            deadline: Seconds to wait for a candidate capability to succeed (default: the
+                speculate_deadline setting, or no deadline)
+            session_budget: Token budget for session context (default: the session_token_budget setting)
+            journal: Whether to record runs in the run journal
+            client: LLM client to plan with, instead of one created on first use
+        """
+        from .session import DEFAULT_TOKEN_BUDGET
+        
+        self.config = get_config()
+        self.model = model
+        self.backend = backend
+        self.hedge = hedge
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.use_plan_cache = bool(self.config.get("plan_cache", True)) if plan_cache is None else plan_cache
+        self.cache_similarity = (float(self.config.get("plan_cache_similarity", 1.0))
+                                 if cache_similarity is None else cache_similarity)
+        if speculate is None:
+            speculate = int(self.config.get("speculate", 1))
+        self.speculate = min(max(speculate, 1), MAX_CANDIDATES)
+        if deadline is None and self.config.get("speculate_deadline") is not None:
+            deadline = float(self.config.get("speculate_deadline"))
+        self.deadline = deadline
+        self.session_budget = (int(self.config.get("session_token_budget", DEFAULT_TOKEN_BUDGET))
+                               if session_budget is None else session_budget)
+        self.journal = journal
+        
+        self._client = client
+        self._plan_cache = None
+        self._sessions = None
+        self._capabilities: Optional[List[Dict[str, Any]]] = None
+        self._catalog_version: Optional[str] = None
+        self._capabilities_text = ""
+        self._stats_loaded_at = 0.0
+        self._functions: Dict[str, Optional[Callable]] = {}
+        
+        # Lazy state and the plan cache each have their own lock, and every session has its
+        # own, so a slow summarization of one session never holds up another
+        self._lock = threading.RLock()
+        self._cache_lock = threading.Lock()
+        self._session_locks: Dict[str, threading.Lock] = {}
+        self._session_locks_lock = threading.Lock()
+    
+    @property
+    def client(self) -> LLMBackend:
+        """The LLM client used for planning, created on first use."""
+        with self._lock:
+            if self._client is None:
+                self._client = create_backend(self.backend, PLANNING, self.model, self.hedge)
+            return self._client
+    
+    def capabilities(self) -> List[Dict[str, Any]]:
+        """
+        Get the capability catalog, discovering it on first use.
+        
+        Returns:
+            Capability information as returned by get_available_capabilities
+        """
+        with self._lock:
+            if self._capabilities is None:
+                self._capabilities = get_available_capabilities()
+                self._catalog_version = None
+                self._stats_loaded_at = 0.0
+            return self._capabilities
+    
+    def refresh(self) -> None:
+        """Forget the capability catalog and loaded capabilities, e.g. after capabilities were added or changed."""
+        with self._lock:
+            self._capabilities = None
+            self._functions.clear()
+    
+    def lookup(self, name: str) -> Optional[Callable]:
+        """
+        Get a capability function by name, loading it once.
+        
+        Args:
+            name: The capability name
+        
+        Returns:
+            The function, or None if there is no such capability
+        """
+        with self._lock:
+            if name not in self._functions:
+                self._functions[name] = get_capability(name) if name else None
+            return self._functions[name]
+    
+    def _capabilities_prompt(self) -> str:
+        """The catalog formatted for the planner, with execution statistics refreshed periodically."""
+        with self._lock:
+            capabilities = self.capabilities()
+            if time.monotonic() - self._stats_loaded_at > STATS_REFRESH_SECONDS:
+                self._capabilities_text = format_capabilities_for_prompt(capabilities, recent_execution_stats())
+                self._stats_loaded_at = time.monotonic()
+            return self._capabilities_text
+    
+    def _cached_plans(self):
+        """The plan cache and catalog version, or (None, None) when the plan cache is off."""
+        if not self.use_plan_cache:
+            return None, None
+        with self._lock:
+            if self._plan_cache is None:
+                from .plan_cache import PlanCache
+                
+                self._plan_cache = PlanCache()
+            if self._catalog_version is None:
+                from .plan_cache import catalog_version
+                
+                self._catalog_version = catalog_version(self.capabilities())
+            return self._plan_cache, self._catalog_version
+    
+    def _session_lock(self, session: str) -> threading.Lock:
+        """The lock serializing access to one session's memory."""
+        with self._session_locks_lock:
+            return self._session_locks.setdefault(session, threading.Lock())
+    
+    def _session_memory(self, session: str):
+        from .session import SessionMemory, SessionStore
+        
+        with self._lock:
+            if self._sessions is None:
+                self._sessions = SessionStore()
+        budget = self.session_budget
+        return SessionMemory(self._sessions, session,
+                             summarize=lambda text: ask_llm(text, max(budget // 2, 256), 0.3, SUMMARIZATION),
+                             token_budget=budget)
+    
+    def plan(self, request: str, session: Optional[str] = None, speculate: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Ask the planner how to fulfill a request.
+        
+        Args:
+            request: What to do
+            session: Name of a session whose context is given to the planner
+            speculate: Candidate capabilities to ask for (default: the agent's setting)
+        
+        Returns:
+            The action plan, with "cached" and "similarity" entries telling
+            whether it came from the plan cache
+        
+        Raises:
+            json.JSONDecodeError: If the planner's response is not valid JSON
+            Exception: If the LLM request fails
+        """
+        if not self.capabilities():
+            return {"action": "create_capability", "description": request, "cached": False, "similarity": None,
+                    "explanation": "No capabilities are available yet."}
+        
+        context = ""
+        if session:
+            # Compacting may ask the LLM for a summary; only this session waits for it
+            with self._session_lock(session):
+                context = self._session_memory(session).context()
+        
+        # Plans only depend on the request and the catalog, unless session context is involved
+        cache, version = self._cached_plans() if not context else (None, None)
+        if cache is not None:
+            with self._cache_lock:
+                cached = cache.get(request, version, self.cache_similarity)
+            if cached:
+                return {**cached[0], "cached": True, "similarity": cached[1]}
+        
+        prompt = build_planning_prompt(request, self._capabilities_prompt(), context, session or "",
+                                       speculate or self.speculate)
+        client = self.client
+        plan = parse_plan(client.get_response_text(client.ask(prompt, self.max_tokens, self.temperature)))
+        
+        # Only capability routing is worth replaying; other actions aren't deterministic, and a
+        # capability missing from the catalog would be replayed until the catalog changes
+        known = {capability["name"] for capability in self.capabilities()}
+        if cache is not None and plan.get("action") == "use_capability" and plan.get("capability") in known:
+            with self._cache_lock:
+                cache.put(request, version, plan)
+        return {**plan, "cached": False, "similarity": None}
+    
+    def _settle_plan(self, request: str, plan: Dict[str, Any], record: Dict[str, Any]) -> None:
+        """
+        Keep the plan cache consistent with how an executed plan turned out.
+        
+        A cached plan whose execution failed is evicted so it isn't replayed, and
+        one whose first candidate lost to another one is overwritten with the winner.
+        """
+        cache, version = self._cached_plans()
+        if cache is None:
+            return
+        plan = {key: value for key, value in plan.items() if key not in ("cached", "similarity")}
+        with self._cache_lock:
+            if "error" in record:
+                cache.evict(version, plan)
+            elif ((record["capability"], record["arguments"]) != (plan.get("capability"), plan.get("arguments", []))
+                  and cache.evict(version, plan)):
+                cache.put(request, version, {**plan, "capability": record["capability"],
+                                             "arguments": record["arguments"]})
+    
+    def run_capability(self, name: str, args: Sequence[Any] = (), kwargs: Optional[Dict[str, Any]] = None,
+                       stream: bool = False) -> Dict[str, Any]:
+        """
+        Run a capability.
+        
+        Args:
+            name: The capability name
+            args: Positional arguments
+            kwargs: Keyword arguments
+            stream: Return a generator result as is instead of collecting up to 1000 items
+        
+        Returns:
+            Dictionary with the capability, arguments, status ("ok" or "error"),
+            result or error, time in ms, and the run's journal id (or None)
+        """
+        started = time.time()
+        start = time.perf_counter()
+        record: Dict[str, Any] = {"capability": name, "arguments": list(args)}
+        try:
+            func = self.lookup(name)
+            if func is None:
+                raise LookupError(f"Capability '{name}' not found")
+            result = execute_capability(name, func, list(args), kwargs)
+            record["result"] = result if stream else _collect(result)
+            record["status"] = "ok"
+        except Exception as e:
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+        record["ms"] = (time.perf_counter() - start) * 1000.0
+        
+        record["run_id"] = None
+        if self.journal:
+            record["run_id"] = record_run(
+                "run", record["status"], capability=name, arguments=record["arguments"],
+                result=_recorded_result(record.get("result")),
+                error=record.get("error"), timings={"total_ms": record["ms"]}, timestamp=started,
+                sensitive=self._is_sensitive(name))
+        return record
+    
+    def do(self, request: str, session: Optional[str] = None, execute: bool = True,
+           speculate: Optional[int] = None, deadline: Optional[float] = None, stream: bool = False,
+           on_plan: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Plan a request and execute the chosen capability.
+        
+        New capabilities are never created here: a create_capability plan is
+        reported with its description, so it can be reviewed and added.
+        
+        Args:
+            request: What to do
+            session: Name of a session to continue, keeping context between requests
+            execute: Whether to run the capability the plan chooses
+            speculate: Candidate capabilities to try, idempotent ones concurrently (default: the agent's setting)
+            deadline: Seconds to wait for a candidate to succeed (default: the agent's setting)
+            stream: Return a generator result as is instead of collecting up to 1000 items
+            on_plan: Callback invoked with the plan before it is executed
+        
+        Returns:
+            Dictionary with the request, action, whether the plan was cached, its
+            explanation, the outcome (capability, arguments and result,
+            description, response, or the plan for unknown actions), the
+            candidates run when speculating, status ("ok" or "error"), error,
+            timings in ms, and the run's journal id (or None)
+        """
+        started = time.time()
+        start = time.perf_counter()
+        speculate = min(max(speculate or self.speculate, 1), MAX_CANDIDATES)
+        deadline = self.deadline if deadline is None else deadline
+        record: Dict[str, Any] = {"request": request, "action": None, "status": "error"}
+        timings: Dict[str, float] = {}
+        
+        try:
+            plan = self.plan(request, session, speculate)
+            timings["plan_ms"] = (time.perf_counter() - start) * 1000.0
+            action = plan.get("action")
+            record.update(action=action, cached=plan["cached"], explanation=plan.get("explanation"))
+            if on_plan:
+                on_plan(plan)
+            
+            if action == "use_capability":
+                record.update(capability=plan.get("capability"), arguments=plan.get("arguments", []))
+                if execute:
+                    execute_start = time.perf_counter()
+                    self._execute(plan, speculate, deadline, stream, record)
+                    timings["execute_ms"] = (time.perf_counter() - execute_start) * 1000.0
+                    self._settle_plan(request, plan, record)
+            elif action == "create_capability":
+                record["description"] = plan.get("description")
+            elif action == "direct_response":
+                record["response"] = plan.get("response", "")
+            else:
+                record["plan"] = {key: value for key, value in plan.items() if key not in ("cached", "similarity")}
+            record["status"] = "error" if "error" in record else "ok"
+            
+            if session:
+                outcome = _outcome(record, self._is_sensitive(record.get("capability")))
+                with self._session_lock(session):
+                    self._session_memory(session).record(request, outcome)
+        except json.JSONDecodeError as e:
+            record.update(error="Could not parse the plan as JSON", response=e.doc)
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        
+        timings["total_ms"] = (time.perf_counter() - start) * 1000.0
+        record["timings"] = timings
+        
+        record["run_id"] = None
+        if self.journal:
+            result = record.get("result", record.get("response", record.get("description")))
+            record["run_id"] = record_run(
+                "do", record["status"], request=request, action=record["action"],
+                capability=record.get("capability"), arguments=record.get("arguments"),
+                result=_recorded_result(result), error=record.get("error"), timings=timings, timestamp=started,
+                sensitive=self._is_sensitive(record.get("capability")))
+        return record
+    
+    def _is_sensitive(self, name: Optional[str]) -> bool:
+        """Whether a capability's results must be kept out of the journal and session history."""
+        return bool(name) and is_sensitive(self.lookup(name))
+    
+    def _execute(self, plan: Dict[str, Any], speculate: int, deadline: Optional[float], stream: bool,
+                 record: Dict[str, Any]) -> None:
+        """Run the capability of a plan, or try its top candidates speculatively, filling in the record."""
+        candidates = candidate_list(plan, speculate)
+        if not candidates:
+            record["error"] = "The plan names no capability"
+            return
+        
+        if len(candidates) == 1 and deadline is None:
+            name, arguments = candidates[0]["capability"], candidates[0]["arguments"]
+            func = self.lookup(name)
+            if func is None:
+                record["error"] = f"LookupError: Capability '{name}' not found"
+                return
+            try:
+                result = execute_capability(name, func, arguments)
+            except Exception as e:
+                record["error"] = f"{type(e).__name__}: {e}"
+                return
+            record["result"] = result if stream else _collect(result)
+            return
+        
+        outcome = run_speculative(candidates, self.lookup, deadline)
+        record["candidates"] = outcome["candidates"]
+        if outcome["winner"] is None:
+            record["error"] = "No candidate capability succeeded" + (
+                f" within {deadline:g}s" if deadline is not None else "")
+            return
+        record.update(capability=outcome["winner"]["capability"], arguments=outcome["winner"]["arguments"],
+                      result=outcome["result"] if stream else _collect(outcome["result"]))
+    
+    async def aplan(self, request: str, session: Optional[str] = None,
+                    speculate: Optional[int] = None) -> Dict[str, Any]:
+        """Async variant of plan(), run on a worker thread."""
+        return await asyncio.to_thread(self.plan, request, session, speculate)
+    
+    async def arun_capability(self, name: str, args: Sequence[Any] = (),
+                              kwargs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async variant of run_capability(), run on a worker thread (streamed results are collected)."""
+        return await asyncio.to_thread(self.run_capability, name, args, kwargs)
+    
+    async def ado(self, request: str, session: Optional[str] = None, execute: bool = True,
+                  speculate: Optional[int] = None, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Async variant of do(), run on a worker thread (streamed results are collected)."""
+        return await asyncio.to_thread(self.do, request, session, execute, speculate, deadline)
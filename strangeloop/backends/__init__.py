@@ -0,0 +1,100 @@
+"""
+LLM backends for Strangeloop.
+Every backend implements the LLMBackend protocol, so call sites can be routed
+to Anthropic's API or to a local OpenAI-compatible inference server.
+"""
+from typing import Any, Callable, Dict, Iterator, Optional, Protocol, runtime_checkable
+
+from ..config import get_config
+
+ANTHROPIC = "anthropic"
+OPENAI = "openai"
+DEFAULT_BACKEND = ANTHROPIC
+
+
+@runtime_checkable
+class LLMBackend(Protocol):
+    """Interface of an LLM backend."""
+    
+    name: str
+    model: str
+    
+    def ask(self, prompt: str, max_tokens: int = 1024, temperature: float = 0.7,
+            model: Optional[str] = None) -> Dict[str, Any]:
+        """Send a prompt and return the backend's raw response."""
+        ...
+    
+    def get_response_text(self, response: Dict[str, Any]) -> str:
+        """Extract the text from a response returned by ask."""
+        ...
+    
+    def stream(self, prompt: str, max_tokens: int = 1024, temperature: float = 0.7,
+               model: Optional[str] = None) -> Iterator[str]:
+        """Send a prompt and yield the response text as it is generated."""
+        ...
+    
+    def usage(self) -> Dict[str, int]:
+        """Report the requests, input tokens and output tokens used so far."""
+        ...
+
+
+def _create_anthropic(purpose: Optional[str], model: Optional[str], hedge: Optional[bool]) -> LLMBackend:
+    from ..llm import ClaudeClient, resolve_fallback_model, resolve_model
+    
+    return ClaudeClient(model=resolve_model(purpose, model), fallback_model=resolve_fallback_model(purpose),
+                        hedge=hedge)
+
+
+def _create_openai(purpose: Optional[str], model: Optional[str], hedge: Optional[bool]) -> LLMBackend:
+    from .openai_compatible import OpenAICompatibleClient, resolve_openai_model
+    
+    return OpenAICompatibleClient(model=resolve_openai_model(purpose, model))
+
+
+BACKENDS: Dict[str, Callable[[Optional[str], Optional[str], Optional[bool]], LLMBackend]] = {
+    ANTHROPIC: _create_anthropic,
+    OPENAI: _create_openai,
+}
+
+
+def resolve_backend(purpose: Optional[str] = None, override: Optional[str] = None) -> str:
+    """
+    Pick the backend for a call site.
+    
+    In order of priority: an explicit override (e.g. a --backend option), the
+    "backends" configuration entry for the purpose, the "backend"
+    configuration value, and Anthropic.
+    
+    Args:
+        purpose: The call site (planning, generation, answer or summarization)
+        override: Backend name that takes precedence over everything else
+    
+    Returns:
+        The backend name
+    
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    config = get_config()
+    name = (override or (purpose and (config.get("backends") or {}).get(purpose))
+            or config.get("backend") or DEFAULT_BACKEND)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}' (available: {', '.join(BACKENDS)})")
+    return name
+
+
+def create_backend(backend: Optional[str] = None, purpose: Optional[str] = None, model: Optional[str] = None,
+                   hedge: Optional[bool] = None) -> LLMBackend:
+    """
+    Create the client of the backend routed for a call site.
+    
+    Args:
+        backend: Backend name that overrides the routing
+        purpose: The call site, used to pick the backend and its model
+        model: Model that overrides the backend's routing
+        hedge: Whether to hedge slow requests, for backends that support it
+    
+    Returns:
+        The backend client
+    """
+    return BACKENDS[resolve_backend(purpose, backend)](purpose, model, hedge)
@@ -0,0 +1,191 @@
+"""
+OpenAI-compatible LLM backend for Strangeloop.
+Talks to any server implementing the OpenAI chat completions API, such as a
+local llama.cpp, vLLM or Ollama server, for latency-critical small prompts.
+"""
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..config import get_config
+from ..llm import CONNECTION_POOL_SIZE, LLM_CALLS
+from ..singleflight import content_key
+
+DEFAULT_BASE_URL = "http://127.0.0.1:8080/v1"
+DEFAULT_MODEL = "default"
+
+
+def resolve_openai_model(purpose: Optional[str] = None, override: Optional[str] = None) -> str:
+    """
+    Pick the model for a call site on the OpenAI-compatible backend.
+    
+    Args:
+        purpose: The call site (planning, generation, answer or summarization)
+        override: Model name that takes precedence over the configuration
+    
+    Returns:
+        The override, the "openai_models" configuration entry for the purpose,
+        the "openai_model" configuration value, or "default"
+    """
+    if override:
+        return override
+    config = get_config()
+    return ((purpose and (config.get("openai_models") or {}).get(purpose))
+            or config.get("openai_model") or DEFAULT_MODEL)
+
+
+class OpenAICompatibleClient:
+    """Client for an OpenAI-compatible chat completions endpoint (the "openai" LLM backend)."""
+    
+    name = "openai"
+    
+    def __init__(self, base_url: Optional[str] = None, model: Optional[str] = None,
+                 api_key: Optional[str] = None):
+        """
+        Initialize the client.
+        
+        Args:
+            base_url: API base URL including the version, e.g. http://127.0.0.1:8080/v1.
+                If None, uses the "openai_base_url" config value, then the OPENAI_BASE_URL env var.
+            model: The model to use. If None, uses the "openai_model" config value.
+            api_key: API key sent as a bearer token. If None, uses the "openai_api_key"
+                config value, then the OPENAI_API_KEY env var; local servers usually need none.
+        """
+        config = get_config()
+        if base_url is None:
+            base_url = config.get("openai_base_url") or os.environ.get("OPENAI_BASE_URL") or DEFAULT_BASE_URL
+        if api_key is None:
+            api_key = config.get("openai_api_key") or os.environ.get("OPENAI_API_KEY")
+        
+        self.model = model or resolve_openai_model()
+        self.api_url = f"{base_url.rstrip('/')}/chat/completions"
+        self.headers = {"content-type": "application/json"}
+        if api_key:
+            self.headers["authorization"] = f"Bearer {api_key}"
+        
+        self.session = requests.Session()
+        self.session.mount(self.api_url, HTTPAdapter(pool_maxsize=CONNECTION_POOL_SIZE))
+        
+        self._usage = {"requests": 0, "input_tokens": 0, "output_tokens": 0}
+        self._usage_lock = threading.Lock()
+        self.single_flight = bool(config.get("single_flight", True))
+    
+    def _payload(self, prompt: str, max_tokens: int, temperature: float, model: Optional[str]) -> Dict[str, Any]:
+        return {
+            "model": model or self.model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+    
+    def ask(self, prompt: str, max_tokens: int = 1024, temperature: float = 0.7,
+            model: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Send a prompt and get the chat completion.
+        
+        Args:
+            prompt: The question or prompt to send
+            max_tokens: Maximum number of tokens in the response
+            temperature: Controls randomness (0 = deterministic, 1 = creative)
+            model: Model to use for this request instead of the client's model
+        
+        Returns:
+            The chat completion response (shared by identical concurrent requests at temperature 0,
+            so treat it as read-only)
+        """
+        payload = self._payload(prompt, max_tokens, temperature, model)
+        # Sampled responses are meant to differ, so only deterministic requests are shared
+        if not self.single_flight or temperature > 0:
+            return self._send(payload)
+        key = content_key(self.name, self.api_url, self.headers.get("authorization"), payload)
+        result, _ = LLM_CALLS.do(key, lambda: self._send(payload))
+        return result
+    
+    def _send(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = self.session.post(self.api_url, headers=self.headers, json=payload)
+            response.raise_for_status()
+            result = response.json()
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Error communicating with OpenAI-compatible API: {str(e)}")
+        
+        self._record_usage(result.get("usage") or {})
+        return result
+    
+    def stream(self, prompt: str, max_tokens: int = 1024, temperature: float = 0.7,
+               model: Optional[str] = None) -> Iterator[str]:
+        """
+        Send a prompt and yield the response text as it is generated.
+        
+        Args:
+            prompt: The question or prompt to send
+            max_tokens: Maximum number of tokens in the response
+            temperature: Controls randomness (0 = deterministic, 1 = creative)
+            model: Model to use for this request instead of the client's model
+        
+        Yields:
+            Chunks of the response text
+        """
+        payload = {**self._payload(prompt, max_tokens, temperature, model),
+                   "stream": True, "stream_options": {"include_usage": True}}
+        usage: Dict[str, Any] = {}
+        try:
+            response = self.session.post(self.api_url, headers=self.headers, json=payload, stream=True)
+            response.raise_for_status()
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    usage = chunk.get("usage") or usage
+                    for choice in chunk.get("choices") or []:
+                        text = (choice.get("delta") or {}).get("content")
+                        if text:
+                            yield text
+            finally:
+                response.close()
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Error communicating with OpenAI-compatible API: {str(e)}")
+        
+        self._record_usage(usage)
+    
+    def get_response_text(self, response: Dict[str, Any]) -> str:
+        """
+        Extract the text content from a chat completion.
+        
+        Args:
+            response: The response dict from the ask method
+        
+        Returns:
+            The text content of the first choice
+        """
+        try:
+            choices = response.get("choices", [])
+            if choices:
+                return choices[0].get("message", {}).get("content") or ""
+            return ""
+        except (KeyError, IndexError, AttributeError) as e:
+            raise Exception(f"Error parsing OpenAI-compatible response: {str(e)}")
+    
+    def usage(self) -> Dict[str, int]:
+        """
+        Report the usage of this client so far.
+        
+        Returns:
+            Dictionary with the number of requests and the input and output tokens they used
+        """
+        with self._usage_lock:
+            return dict(self._usage)
+    
+    def _record_usage(self, usage: Dict[str, Any]) -> None:
+        with self._usage_lock:
+            self._usage["requests"] += 1
+            self._usage["input_tokens"] += usage.get("prompt_tokens", 0)
+            self._usage["output_tokens"] += usage.get("completion_tokens", 0)
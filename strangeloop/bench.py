@@ -0,0 +1,616 @@
+"""
+Benchmark suite for Strangeloop.
+Measures CLI startup, capability discovery and the agent hot path.
+"""
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .stats import summarize
+
+DEFAULT_SIZES = (10, 1000, 10000)
+DEFAULT_THRESHOLD = 10.0
+STARTUP_BUDGET_MS = 100.0
+
+# Modules that must not be imported by `strangeloop --help`
+HEAVY_STARTUP_MODULES = ("requests", "strangeloop.llm", "strangeloop.capabilities", "strangeloop.commands")
+
+STARTUP_PROBE = """
+import sys
+from strangeloop.cli import cli
+try:
+    cli(["--help"], prog_name="strangeloop")
+except SystemExit:
+    pass
+sys.stderr.write("\\n".join(sys.modules))
+"""
+
+SYNTHETIC_CAPABILITY_TEMPLATE = '''"""
+Synthetic benchmark capability: {name}
+"""
+
+from typing import Optional
+
+
+def {name}(text: str, count: int = 3, flag: bool = False, label: Optional[str] = None) -> str:
+    """
+    Synthetic capability number {index} used by the strangeloop benchmark suite.
+
+    Args:
+        text: The input text
+        count: Number of times to repeat the text
+        flag: Whether to upper-case the result
+        label: Optional label to prefix the result with
+
+    Returns:
+        The processed text
+    """
+    result = text * count
+    if label:
+        result = f"{{label}}: {{result}}"
+    return result.upper() if flag else result
+'''
+
+# Cold discovery of a capabilities package from its files (the loose layout), then loading one capability
+COLD_LOAD_FILES_PROBE = """
+import importlib, sys
+sys.path.insert(0, {directory!r})
+from strangeloop.registry import get_available_capabilities
+module = importlib.import_module({package!r})
+info = get_available_capabilities(module)
+getattr(module, info[0]["name"])
+"""
+
+# The same from a capability pack
+COLD_LOAD_PACK_PROBE = """
+from strangeloop.pack import CapabilityPack
+pack = CapabilityPack({path!r})
+info = pack.capabilities_info()
+pack.get_function(info[0]["name"])
+"""
+
+FAKE_PLAN = {
+    "action": "use_capability",
+    "capability": "generate_secure_password",
+    "arguments": [],
+    "explanation": "Benchmark plan returned by the local fake LLM endpoint",
+}
+
+
+class _FakeLLMHandler(BaseHTTPRequestHandler):
+    """Request handler answering Messages API and OpenAI chat completions calls with a canned response."""
+    
+    def do_POST(self):
+        length = int(self.headers.get("content-length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with self.server.lock:
+            self.server.request_count += 1
+            number = self.server.request_count
+        
+        latency = self.server.latency(number) if callable(self.server.latency) else self.server.latency
+        if latency:
+            time.sleep(latency)
+        
+        prompt = "".join(m.get("content", "") for m in payload.get("messages", []))
+        text = self.server.response_text
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_chat_completion(payload, prompt, text)
+            return
+        
+        message = {
+            "id": "msg_bench",
+            "type": "message",
+            "role": "assistant",
+            "model": payload.get("model", "bench"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4},
+        }
+        if payload.get("stream"):
+            self._send_stream(message)
+            return
+        
+        body = json.dumps(message).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_chat_completion(self, payload: Dict[str, Any], prompt: str, text: str) -> None:
+        """Answer an OpenAI chat completions request, streamed if it asks for it."""
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4,
+                 "total_tokens": (len(prompt) + len(text)) // 4}
+        base = {"id": "chatcmpl-bench", "created": int(time.time()), "model": payload.get("model", "bench")}
+        
+        if not payload.get("stream"):
+            body = json.dumps({
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": "stop"}],
+                "usage": usage,
+            }).encode()
+            content_type = "application/json"
+        else:
+            chunks = [
+                {**base, "object": "chat.completion.chunk",
+                 "choices": [{"index": 0, "delta": {"role": "assistant", "content": text}, "finish_reason": None}]},
+                {**base, "object": "chat.completion.chunk",
+                 "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]},
+            ]
+            if (payload.get("stream_options") or {}).get("include_usage"):
+                chunks.append({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+            body = ("".join(f"data: {json.dumps(chunk)}\n\n" for chunk in chunks) + "data: [DONE]\n\n").encode()
+            content_type = "text/event-stream"
+        
+        self.send_response(200)
+        self.send_header("content-type", content_type)
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_stream(self, message: Dict[str, Any]) -> None:
+        """Send a message as server-sent events, like the Messages API does with "stream": true."""
+        text = message["content"][0]["text"]
+        events = [
+            {"type": "message_start",
+             "message": {**message, "content": [], "stop_reason": None,
+                         "usage": {"input_tokens": message["usage"]["input_tokens"], "output_tokens": 0}}},
+            {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+            {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text}},
+            {"type": "content_block_stop", "index": 0},
+            {"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+             "usage": {"output_tokens": message["usage"]["output_tokens"]}},
+            {"type": "message_stop"},
+        ]
+        body = "".join(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n" for event in events).encode()
+        
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeLLMServer:
+    """Local stand-in for the Anthropic Messages API and OpenAI-compatible servers, used as a context manager."""
+    
+    def __init__(self, response_text: Optional[str] = None,
+                 latency: Union[float, Callable[[int], float]] = 0.0):
+        """
+        Initialize the fake server.
+        
+        Args:
+            response_text: Text returned for every request (defaults to a canned plan)
+            latency: Artificial delay in seconds added to every response, or a
+                function of the request number (starting at 1) returning it
+        """
+        self.response_text = response_text if response_text is not None else json.dumps(FAKE_PLAN)
+        self.latency = latency
+        self.url = ""
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def request_count(self) -> int:
+        """Number of requests served so far."""
+        return self._server.request_count if self._server else 0
+    
+    def __enter__(self) -> "FakeLLMServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeLLMHandler)
+        self._server.daemon_threads = True
+        self._server.response_text = self.response_text
+        self._server.latency = self.latency
+        self._server.request_count = 0
+        self._server.lock = threading.Lock()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        host, port = self._server.server_address[:2]
+        self.url = f"http://{host}:{port}"
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+def time_call(fn: Callable[[], Any], runs: int, warmup: int = 1) -> List[float]:
+    """
+    Time repeated calls of a function.
+    
+    Args:
+        fn: The function to time
+        runs: Number of timed runs
+        warmup: Number of untimed runs before measuring
+    
+    Returns:
+        List of wall-clock durations in seconds
+    """
+    for _ in range(warmup):
+        fn()
+    
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def isolated_env(state_dir: Path, **extra: str) -> Dict[str, str]:
+    """
+    Build an environment for subprocesses that keeps config and state in a scratch directory.
+    
+    Args:
+        state_dir: Directory used for XDG config, cache and data homes
+        **extra: Additional environment variables to set
+    
+    Returns:
+        The environment mapping
+    """
+    env = dict(os.environ)
+    for var in ("XDG_CONFIG_HOME", "XDG_CACHE_HOME", "XDG_DATA_HOME"):
+        env[var] = str(state_dir / var.lower())
+    env.update(extra)
+    return env
+
+
+def create_synthetic_capabilities(directory: Path, count: int) -> types.ModuleType:
+    """
+    Write and import a package of synthetic capabilities laid out like strangeloop.capabilities.
+    
+    Args:
+        directory: Directory to create the package in (added to sys.path)
+        count: Number of capabilities to generate
+    
+    Returns:
+        The imported package module
+    """
+    package_name = f"strangeloop_bench_caps_{count}"
+    package_dir = directory / package_name
+    package_dir.mkdir(parents=True, exist_ok=True)
+    
+    imports = []
+    for index in range(count):
+        name = f"synthetic_capability_{index:05d}"
+        (package_dir / f"{name}.py").write_text(
+            SYNTHETIC_CAPABILITY_TEMPLATE.format(name=name, index=index))
+        imports.append(f"from {package_name}.{name} import {name}\n")
+    
+    (package_dir / "__init__.py").write_text(
+        '"""\nSynthetic capabilities for benchmarking.\n"""\n\n' + "".join(imports))
+    
+    if str(directory) not in sys.path:
+        sys.path.insert(0, str(directory))
+    importlib.invalidate_caches()
+    return importlib.import_module(package_name)
+
+
+def unload_synthetic_capabilities(module: types.ModuleType) -> None:
+    """Remove a synthetic capabilities package and its submodules from sys.modules."""
+    prefix = module.__name__
+    for name in [n for n in sys.modules if n == prefix or n.startswith(prefix + ".")]:
+        del sys.modules[name]
+
+
+def bench_cli_startup(runs: int) -> List[float]:
+    """Time a cold `strangeloop --help` in a fresh interpreter."""
+    command = [sys.executable, "-m", "strangeloop.cli", "--help"]
+    return time_call(lambda: subprocess.run(command, stdout=subprocess.DEVNULL, check=True), runs)
+
+
+def bench_interpreter_startup(runs: int) -> List[float]:
+    """Time a bare interpreter start, the floor for `strangeloop --help`."""
+    command = [sys.executable, "-c", "pass"]
+    return time_call(lambda: subprocess.run(command, check=True), runs)
+
+
+def check_startup(budget_ms: float = STARTUP_BUDGET_MS, runs: int = 5) -> Dict[str, Any]:
+    """
+    Check that `strangeloop --help` stays within its import-time budget.
+    
+    The budget applies to the time spent on top of a bare interpreter start,
+    so the check is independent of how slow the interpreter itself is to boot.
+    
+    Args:
+        budget_ms: Allowed startup overhead in milliseconds
+        runs: Number of timed runs for each measurement
+    
+    Returns:
+        Dictionary with the measured overhead, heavy modules imported and an ok flag
+    """
+    probe = subprocess.run([sys.executable, "-c", STARTUP_PROBE], capture_output=True, text=True, check=True)
+    loaded = set(probe.stderr.splitlines())
+    heavy = sorted(name for name in HEAVY_STARTUP_MODULES
+                   if name in loaded or any(module.startswith(name + ".") for module in loaded))
+    
+    cli_median = summarize(bench_cli_startup(runs))["median"]
+    interpreter_median = summarize(bench_interpreter_startup(runs))["median"]
+    overhead = cli_median - interpreter_median
+    
+    return {
+        "budget_ms": budget_ms,
+        "cli_median_ms": cli_median,
+        "interpreter_median_ms": interpreter_median,
+        "overhead_ms": overhead,
+        "heavy_modules": heavy,
+        "ok": not heavy and overhead <= budget_ms,
+    }
+
+
+def bench_discovery(module: types.ModuleType, runs: int) -> List[float]:
+    """Time get_available_capabilities against a capabilities package."""
+    from .registry import get_available_capabilities
+    return time_call(lambda: get_available_capabilities(module), runs)
+
+
+def bench_format(module: types.ModuleType, runs: int) -> List[float]:
+    """Time format_capabilities_for_prompt for a capabilities package."""
+    from .registry import format_capabilities_for_prompt, get_available_capabilities
+    capabilities_info = get_available_capabilities(module)
+    return time_call(lambda: format_capabilities_for_prompt(capabilities_info), runs)
+
+
+def bench_cold_load(module: types.ModuleType, runs: int, pack_path: Optional[Path] = None) -> List[float]:
+    """
+    Time discovering a capabilities package and loading one capability in a fresh interpreter.
+    
+    Args:
+        module: The capabilities package
+        runs: Number of timed runs
+        pack_path: Load from this pack instead of the package's files
+    
+    Returns:
+        List of wall-clock durations in seconds
+    """
+    if pack_path is None:
+        directory = str(Path(module.__file__).parent.parent)
+        probe = COLD_LOAD_FILES_PROBE.format(directory=directory, package=module.__name__)
+    else:
+        probe = COLD_LOAD_PACK_PROBE.format(path=str(pack_path))
+    command = [sys.executable, "-c", probe]
+    return time_call(lambda: subprocess.run(command, check=True), runs)
+
+
+def bench_add_function(runs: int, batch: int = 200) -> List[float]:
+    """
+    Time add_function_to_module, reporting the per-call duration of each batch.
+    
+    Args:
+        runs: Number of timed batches
+        batch: Number of functions added per batch
+    
+    Returns:
+        Per-call durations in seconds, one sample per batch
+    """
+    from .dynamic import add_function_to_module
+    
+    module_name = "strangeloop_bench_dynamic"
+    sys.modules[module_name] = types.ModuleType(module_name)
+    counter = iter(range(sys.maxsize))
+    
+    def add_batch():
+        for _ in range(batch):
+            index = next(counter)
+            add_function_to_module(module_name, f"def bench_fn_{index}(x):\n    return x + {index}\n")
+    
+    try:
+        return [sample / batch for sample in time_call(add_batch, runs)]
+    finally:
+        del sys.modules[module_name]
+
+
+def bench_do_roundtrip(runs: int, state_dir: Path, plan_cache: bool = False, backend: str = "anthropic") -> List[float]:
+    """
+    Time a full `strangeloop do` invocation against a local fake LLM endpoint.
+    
+    Args:
+        runs: Number of timed runs
+        state_dir: Scratch directory for isolated config and state
+        plan_cache: Whether to let the plan cache answer repeated requests
+        backend: LLM backend used for planning ("anthropic" or "openai")
+    
+    Returns:
+        List of wall-clock durations in seconds
+    """
+    cache_flag = "--plan-cache" if plan_cache else "--no-plan-cache"
+    command = [sys.executable, "-m", "strangeloop.cli", "do", cache_flag, "--backend", backend,
+               "generate a secure password"]
+    
+    with FakeLLMServer() as server:
+        env = isolated_env(state_dir, ANTHROPIC_API_KEY="bench", ANTHROPIC_BASE_URL=server.url,
+                           OPENAI_BASE_URL=f"{server.url}/v1")
+        
+        def roundtrip():
+            result = subprocess.run(command, env=env, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"'strangeloop do' failed: {result.stderr.strip()}")
+        
+        return time_call(roundtrip, runs)
+
+
+def bench_llm_tail_latency(runs: int, work_dir: Path, hedge: bool = False, calls_per_run: int = 20) -> List[float]:
+    """
+    Time planning-sized requests against a fake LLM endpoint where one request in ten stalls.
+    
+    Args:
+        runs: Number of batches of requests
+        work_dir: Scratch directory for the hedging metrics
+        hedge: Whether to hedge requests stuck waiting for their first byte
+        calls_per_run: Requests per batch
+    
+    Returns:
+        Per-request durations in seconds
+    """
+    from .hedging import HedgeMetrics, Hedger
+    from .llm import ClaudeClient
+    from .storage import connect
+    
+    def stall_every_tenth(number: int) -> float:
+        return 0.5 if number % 10 == 0 else 0.01
+    
+    with FakeLLMServer(latency=stall_every_tenth) as server:
+        client = ClaudeClient(api_key="bench", base_url=server.url, hedge=False)
+        if hedge:
+            work_dir.mkdir(parents=True, exist_ok=True)
+            metrics = HedgeMetrics(connect("llm_metrics.db", work_dir))
+            metrics.reset()
+            client.hedger = Hedger(metrics, initial_delay_ms=50.0, max_rate=0.2)
+        return time_call(lambda: client.ask("generate a secure password", 256), runs * calls_per_run)
+
+
+def bench_journal_query(runs: int, work_dir: Path, entries: int = 100000) -> List[float]:
+    """
+    Time a history query over a large run journal.
+    
+    The query asks for the latest failures of one capability, so it has to
+    look through most of the journal.
+    
+    Args:
+        runs: Number of timed queries
+        work_dir: Scratch directory for the journal
+        entries: Number of runs in the journal
+    """
+    from .journal import Journal
+    
+    journal = Journal(work_dir / "journal")
+    if len(journal) < entries:
+        start = time.time() - entries
+        for i in range(len(journal), entries):
+            journal.append("run", "error" if i % 100 == 0 else "ok", capability=f"capability_{i % 50}",
+                           arguments=[i], result=i, timings={"total_ms": 1.0}, timestamp=start + i)
+    return time_call(lambda: list(journal.query(capability="capability_0", status="error", limit=20)), runs)
+
+
+def iter_benchmarks(runs: int, sizes: Sequence[int], work_dir: Path) -> Iterator[Tuple[str, Callable[[], List[float]]]]:
+    """
+    Yield the benchmarks in the suite as (name, thunk) pairs.
+    
+    Synthetic capability packages are created lazily and unloaded once their
+    benchmarks have run, so only one size is resident at a time.
+    
+    Args:
+        runs: Number of timed runs per benchmark
+        sizes: Synthetic capability counts to benchmark discovery with
+        work_dir: Scratch directory for generated files and isolated state
+    
+    Yields:
+        Tuples of benchmark name and a callable returning timing samples
+    """
+    yield "interpreter_startup", lambda: bench_interpreter_startup(runs)
+    yield "cli_startup", lambda: bench_cli_startup(runs)
+    
+    def pack_for(module: types.ModuleType) -> Path:
+        from .pack import build_pack
+        path = work_dir / f"{module.__name__}.pack"
+        build_pack(Path(module.__file__).parent, module.__name__, path)
+        return path
+    
+    for size in sizes:
+        module = create_synthetic_capabilities(work_dir / "capabilities", size)
+        try:
+            yield f"discovery_{size}", lambda: bench_discovery(module, runs)
+            yield f"format_prompt_{size}", lambda: bench_format(module, runs)
+            yield f"cold_load_files_{size}", lambda: bench_cold_load(module, runs)
+            yield f"cold_load_pack_{size}", lambda: bench_cold_load(module, runs, pack_for(module))
+        finally:
+            unload_synthetic_capabilities(module)
+    
+    yield "add_function", lambda: bench_add_function(runs)
+    yield "do_roundtrip", lambda: bench_do_roundtrip(runs, work_dir / "state")
+    yield "do_roundtrip_cached", lambda: bench_do_roundtrip(runs, work_dir / "state", plan_cache=True)
+    yield "do_roundtrip_openai", lambda: bench_do_roundtrip(runs, work_dir / "state", backend="openai")
+    yield "llm_tail_latency", lambda: bench_llm_tail_latency(runs, work_dir / "state")
+    yield "llm_tail_latency_hedged", lambda: bench_llm_tail_latency(runs, work_dir / "state", hedge=True)
+    yield "journal_query", lambda: bench_journal_query(runs, work_dir)
+
+
+def run_suite(runs: int = 5, sizes: Sequence[int] = DEFAULT_SIZES, only: Sequence[str] = (),
+              progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Run the benchmark suite.
+    
+    Args:
+        runs: Number of timed runs per benchmark
+        sizes: Synthetic capability counts to benchmark discovery with
+        only: If given, only run benchmarks whose name starts with one of these prefixes
+        progress: Optional callback invoked with each benchmark name before it runs
+    
+    Returns:
+        Results dictionary with environment metadata and per-benchmark summaries (in ms)
+    """
+    results: Dict[str, Any] = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "runs": runs,
+        "benchmarks": {},
+    }
+    
+    work_dir = Path(tempfile.mkdtemp(prefix="strangeloop-bench-"))
+    try:
+        for name, thunk in iter_benchmarks(runs, sizes, work_dir):
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            if progress:
+                progress(name)
+            summary = summarize(thunk())
+            if summary.get("median"):
+                summary["ops_per_sec"] = 1000.0 / summary["median"]
+            results["benchmarks"][name] = summary
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    return results
+
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any],
+                        threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compare benchmark results against a saved baseline using median timings.
+    
+    Args:
+        results: Results from run_suite
+        baseline: Previously saved results from run_suite
+        threshold: Allowed slowdown in percent before a benchmark counts as a regression
+    
+    Returns:
+        List of comparison entries, one per benchmark present in both result sets
+    """
+    comparisons = []
+    baseline_benchmarks = baseline.get("benchmarks", {})
+    
+    for name, summary in results.get("benchmarks", {}).items():
+        previous = baseline_benchmarks.get(name)
+        if not previous or not previous.get("median") or "median" not in summary:
+            continue
+        
+        change = (summary["median"] - previous["median"]) / previous["median"] * 100.0
+        comparisons.append({
+            "name": name,
+            "baseline_median": previous["median"],
+            "current_median": summary["median"],
+            "change_pct": change,
+            "regression": change > threshold,
+        })
+    
+    return comparisons
@@ -0,0 +1,135 @@
+"""
+Bulk request runner for Strangeloop.
+Runs many `do` requests in one process with a shared client and bounded concurrency.
+"""
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .agent import Agent
+from .execution import CAPABILITY_CALLS
+from .llm import LLM_CALLS
+from .pipeline import ordered_map
+from .stats import percentile
+
+DEFAULT_CONCURRENCY = 4
+
+# Keys a request line may use for its text and its identifier
+REQUEST_KEYS = ("request", "prompt", "body")
+ID_KEYS = ("id", "request_id")
+
+# Entries of Agent.do records copied to result records
+RECORD_KEYS = ("action", "cached", "capability", "arguments", "result", "description", "response", "plan",
+               "candidates", "error")
+
+
+def load_requests(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream requests from a JSON lines file.
+    
+    Each line is either a JSON string or an object with the request text
+    under "request", "prompt" or "body" and an optional "id" or
+    "request_id". Blank lines are skipped.
+    
+    Args:
+        path: Path to the file
+    
+    Yields:
+        Dictionaries with the request id (the line number if none is given) and text
+    
+    Raises:
+        ValueError: If a line is not valid JSON or has no request text
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {line_number} is not valid JSON: {e}")
+            
+            if isinstance(entry, str):
+                entry = {"request": entry}
+            if not isinstance(entry, dict):
+                raise ValueError(f"Line {line_number} is neither a string nor an object")
+            text = next((entry[key] for key in REQUEST_KEYS if entry.get(key)), None)
+            if not text:
+                raise ValueError(f"Line {line_number} has no request text (expected one of {', '.join(REQUEST_KEYS)})")
+            
+            request_id = next((entry[key] for key in ID_KEYS if entry.get(key) is not None), line_number)
+            yield {"id": request_id, "request": str(text)}
+
+
+class BulkRunner:
+    """Plans and executes requests concurrently with one agent."""
+    
+    def __init__(self, agent: Agent, auto_execute: bool = True):
+        """
+        Initialize the runner.
+        
+        Args:
+            agent: Agent shared by all requests, with its client, catalog and plan cache
+            auto_execute: Whether to run the capability a plan chooses
+        """
+        self.agent = agent
+        self.auto_execute = auto_execute
+    
+    def run_one(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Plan and execute a single request, capturing errors in the record.
+        
+        New capabilities are never created here: a create_capability plan is
+        reported so it can be reviewed and added with `capability add`.
+        
+        Args:
+            item: The request, as yielded by load_requests
+        
+        Returns:
+            Result record with the id, request, action, outcome, error and latency
+        """
+        outcome = self.agent.do(item["request"], execute=self.auto_execute)
+        record: Dict[str, Any] = {"id": item["id"], "request": item["request"]}
+        record.update((key, outcome[key]) for key in RECORD_KEYS if outcome.get(key) is not None
+                      or (key == "result" and key in outcome))
+        record["latency_ms"] = outcome["timings"]["total_ms"]
+        return record
+    
+    def run(self, items: Iterable[Dict[str, Any]], concurrency: int = DEFAULT_CONCURRENCY,
+            on_record: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Run requests concurrently, reporting records in input order.
+        
+        Args:
+            items: The requests (consumed lazily)
+            concurrency: Maximum number of requests in flight
+            on_record: Callback invoked with every result record as soon as it is in order
+        
+        Returns:
+            Summary with request and error counts, wall time, throughput, latency
+            percentiles, and the number of LLM and capability calls coalesced
+            into an identical call in flight
+        """
+        coalesced_before = (LLM_CALLS.counters()["coalesced"], CAPABILITY_CALLS.counters()["coalesced"])
+        start = time.perf_counter()
+        latencies: List[float] = []
+        errors = 0
+        
+        for record in ordered_map(self.run_one, items, concurrency):
+            latencies.append(record["latency_ms"])
+            errors += "error" in record
+            if on_record:
+                on_record(record)
+        
+        elapsed = time.perf_counter() - start
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "seconds": elapsed,
+            "requests_per_sec": len(latencies) / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": percentile(latencies, 50),
+            "p90_ms": percentile(latencies, 90),
+            "p99_ms": percentile(latencies, 99),
+            "coalesced_llm_calls": LLM_CALLS.counters()["coalesced"] - coalesced_before[0],
+            "coalesced_capability_calls": CAPABILITY_CALLS.counters()["coalesced"] - coalesced_before[1],
+        }
@@ -3,7 +3,7 @@ Dynamically generated capabilities for Strangeloop.
 This package contains functions that have been dynamically added at runtime.
 """
 
-from strangeloop.capabilities.generate_secure_password import generate_secure_password
+from strangeloop.capabilities.generate_secure_password import generate_secure_password, generate_secure_password_batch
 
 from strangeloop.capabilities.get_public_ip_address import get_public_ip_address
 
@@ -2,10 +2,14 @@
 Dynamically generated capability: fetch_current_bitcoin_price
 """
 
-import requests
+from strangeloop.runtime import http
 from typing import Dict, Union, Tuple
 from datetime import datetime
 
+# Identical concurrent calls may share one result (see strangeloop.execution.is_idempotent)
+IDEMPOTENT = True
+
+
 def fetch_current_bitcoin_price() -> Tuple[Union[float, str], str]:
     """
     Fetches the current Bitcoin spot price in USD from a reliable cryptocurrency API.
@@ -29,7 +33,7 @@ def fetch_current_bitcoin_price() -> Tuple[Union[float, str], str]:
             "include_last_updated_at": True
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = http.get(url, params=params, timeout=10)
         response.raise_for_status()  # Raise exception for 4XX/5XX responses
         
         data = response.json()
@@ -45,7 +49,7 @@ def fetch_current_bitcoin_price() -> Tuple[Union[float, str], str]:
         
         return btc_price, current_timestamp
         
-    except requests.exceptions.RequestException as e:
+    except http.RequestException as e:
         raise ConnectionError(f"Failed to connect to Bitcoin price API: {str(e)}")
     except ValueError as e:
         raise ValueError(f"Failed to parse Bitcoin price data: {str(e)}")
@@ -2,9 +2,16 @@
 Dynamically generated capability: generate_secure_password
 """
 
-import random
+import inspect
+import secrets
 import string
-from typing import Optional
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Arguments used by `strangeloop capability check`
+SAMPLES = [[16], [64, True, True, True, False]]
+
+# Passwords are secrets: the run journal doesn't store them (see strangeloop.execution.is_sensitive)
+SENSITIVE = True
 
 
 def generate_secure_password(length: int = 16, include_uppercase: bool = True,
@@ -47,6 +54,84 @@ def generate_secure_password(length: int = 16, include_uppercase: bool = True,
         raise ValueError("At least one character type must be selected")
     
     # Generate the password
-    password = ''.join(random.choice(char_pool) for _ in range(length))
+    password = ''.join(secrets.choice(char_pool) for _ in range(length))
+    
+    return password
+
+
+def generate_secure_password_batch(args_list: List[Sequence]) -> List[str]:
+    """
+    Generate many secure passwords at once.
+    
+    Each item of args_list holds the positional arguments of one
+    generate_secure_password call. Passwords that share the same options are
+    drawn from a single secrets.token_bytes call and mapped to characters
+    with one bytes.translate, instead of one Python call per character.
+    
+    Args:
+        args_list: List of argument tuples, e.g. [(16,), (32, True, True, True, False)]
+    
+    Returns:
+        The passwords, in the order of args_list.
+    
+    Raises:
+        ValueError: If any argument set is invalid (see generate_secure_password).
+    """
+    calls: Dict[Tuple, List[int]] = {}
+    for index, args in enumerate(args_list):
+        calls.setdefault(tuple(args), []).append(index)
+    
+    # Bind each distinct argument tuple once, merging tuples that mean the same options
+    signature = inspect.signature(generate_secure_password)
+    groups: Dict[Tuple, List[int]] = {}
+    for args, indexes in calls.items():
+        bound = signature.bind(*args)
+        bound.apply_defaults()
+        groups.setdefault(tuple(bound.arguments.values()), []).extend(indexes)
+    
+    passwords: List[str] = [""] * len(args_list)
+    for options, indexes in groups.items():
+        length, include_uppercase, include_lowercase, include_digits, include_special_chars, special_chars = options
+        length = int(length)
+        if length < 1:
+            raise ValueError("Password length must be at least 1 character")
+        
+        char_pool = ""
+        if include_uppercase:
+            char_pool += string.ascii_uppercase
+        if include_lowercase:
+            char_pool += string.ascii_lowercase
+        if include_digits:
+            char_pool += string.digits
+        if include_special_chars:
+            char_pool += special_chars
+        
+        if not char_pool:
+            raise ValueError("At least one character type must be selected")
+        
+        if not char_pool.isascii() or len(char_pool) > 256:
+            for index in indexes:
+                passwords[index] = "".join(secrets.choice(char_pool) for _ in range(length))
+            continue
+        
+        # Map random bytes onto the pool, dropping the bytes above the largest
+        # multiple of the pool size so every character is equally likely
+        pool = char_pool.encode("ascii")
+        limit = 256 - 256 % len(pool)
+        table = bytes(pool[value % len(pool)] for value in range(256))
+        rejected = bytes(range(limit, 256))
+        
+        needed = length * len(indexes)
+        chunks = []
+        available = 0
+        while available < needed:
+            missing = needed - available
+            chunk = secrets.token_bytes(missing * 256 // limit + 16).translate(table, rejected)
+            chunks.append(chunk)
+            available += len(chunk)
+        characters = b"".join(chunks).decode("ascii")
+        
+        for position, index in enumerate(indexes):
+            passwords[index] = characters[position * length:(position + 1) * length]
     
-    return password
\ No newline at end of file
+    return passwords
@@ -2,9 +2,12 @@
 Dynamically generated capability: get_public_ip_address
 """
 
-import requests
+from strangeloop.runtime import http
 from typing import Optional
 
+# Identical concurrent calls may share one result (see strangeloop.execution.is_idempotent)
+IDEMPOTENT = True
+
 
 def get_public_ip_address() -> Optional[str]:
     """
@@ -14,11 +17,11 @@ def get_public_ip_address() -> Optional[str]:
         Optional[str]: The public IP address as a string if successful, None otherwise.
         
     Raises:
-        requests.RequestException: If there's an error with the HTTP request.
+        http.RequestException: If there's an error with the HTTP request.
         ValueError: If the response format is unexpected.
     """
     try:
-        response = requests.get("https://httpbin.org/ip", timeout=10)
+        response = http.get("https://httpbin.org/ip", timeout=10)
         response.raise_for_status()  # Raise an exception for HTTP errors
         
         data = response.json()
@@ -26,7 +29,7 @@ def get_public_ip_address() -> Optional[str]:
             raise ValueError("Unexpected response format from httpbin.org/ip")
         
         return data["origin"]
-    except requests.RequestException as e:
+    except http.RequestException as e:
         # Log the error or handle it as needed
         print(f"Error retrieving public IP address: {e}")
         return None
@@ -0,0 +1,31 @@
+"""
+The ask command for Strangeloop.
+"""
+import sys
+import click
+from ..backends import create_backend
+from ..llm import ANSWER
+
+
+@click.command()
+@click.argument("question", required=True)
+@click.option("--max-tokens", "-m", default=1024, help="Maximum tokens in response")
+@click.option("--temperature", "-t", default=0.7, type=float, help="Temperature (0.0-1.0)")
+@click.option("--model", default=None, help="Model to use (default: the configured answer model)")
+@click.option("--backend", default=None, help="LLM backend to use (default: the configured answer backend)")
+@click.option("--stream", is_flag=True, help="Print the response as it is generated")
+def ask(question, max_tokens, temperature, model, backend, stream):
+    """Ask Claude a question and get a response."""
+    try:
+        client = create_backend(backend, ANSWER, model)
+        click.echo(f"Asking {client.model}...")
+        click.echo("\nResponse:")
+        if stream:
+            for text in client.stream(question, max_tokens, temperature):
+                click.echo(text, nl=False)
+            click.echo()
+        else:
+            click.echo(client.get_response_text(client.ask(question, max_tokens, temperature)))
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
@@ -0,0 +1,78 @@
+"""
+The bench command for Strangeloop.
+"""
+import sys
+import json
+import click
+from ..config import get_config
+
+
+@click.command()
+@click.option("--runs", "-r", default=5, help="Timed runs per benchmark")
+@click.option("--sizes", default="10,1000,10000", help="Comma-separated synthetic capability counts")
+@click.option("--only", multiple=True, help="Only run benchmarks whose name starts with this prefix")
+@click.option("--output", "-o", help="Write results JSON to this file instead of stdout")
+@click.option("--baseline", "-b", type=click.Path(exists=True), help="Compare against a saved baseline")
+@click.option("--save-baseline", type=click.Path(), help="Save these results as a baseline file")
+@click.option("--threshold", type=float, default=None, help="Regression threshold in percent (default: 10)")
+@click.option("--check-startup", is_flag=True, help="Only check 'strangeloop --help' against its import-time budget")
+@click.option("--startup-budget", type=float, default=None, help="Startup overhead budget in ms (default: 100)")
+def bench(runs, sizes, only, output, baseline, save_baseline, threshold, check_startup, startup_budget):
+    """
+    Run the performance benchmark suite and emit the results as JSON.
+    
+    Exits with a non-zero status if any benchmark regressed past the
+    threshold compared to the baseline, or if --check-startup fails.
+    """
+    try:
+        from .. import bench as bench_suite
+        
+        if check_startup:
+            if startup_budget is None:
+                startup_budget = float(get_config().get("startup_budget_ms", bench_suite.STARTUP_BUDGET_MS))
+            result = bench_suite.check_startup(startup_budget, runs)
+            click.echo(json.dumps(result, indent=2))
+            if result["heavy_modules"]:
+                click.echo(f"Startup imports heavy modules: {', '.join(result['heavy_modules'])}", err=True)
+            if result["overhead_ms"] > startup_budget:
+                click.echo(f"Startup overhead {result['overhead_ms']:.1f} ms exceeds budget of {startup_budget:.1f} ms", err=True)
+            if not result["ok"]:
+                sys.exit(1)
+            return
+        
+        size_list = [int(size) for size in sizes.split(",") if size.strip()]
+        if threshold is None:
+            threshold = float(get_config().get("bench_threshold", bench_suite.DEFAULT_THRESHOLD))
+        
+        results = bench_suite.run_suite(runs=runs, sizes=size_list, only=only,
+                                        progress=lambda name: click.echo(f"Running {name}...", err=True))
+        
+        regressions = []
+        if baseline:
+            with open(baseline, "r") as f:
+                comparisons = bench_suite.compare_to_baseline(results, json.load(f), threshold)
+            results["comparison"] = {"baseline": baseline, "threshold_pct": threshold, "benchmarks": comparisons}
+            regressions = [c for c in comparisons if c["regression"]]
+        
+        results_json = json.dumps(results, indent=2)
+        if output:
+            with open(output, "w") as f:
+                f.write(results_json + "\n")
+            click.echo(f"Results written to: {output}", err=True)
+        else:
+            click.echo(results_json)
+        
+        if save_baseline:
+            with open(save_baseline, "w") as f:
+                f.write(results_json + "\n")
+            click.echo(f"Baseline saved to: {save_baseline}", err=True)
+        
+        for regression in regressions:
+            click.echo(f"Regression: {regression['name']} is {regression['change_pct']:.1f}% slower "
+                       f"({regression['baseline_median']:.2f} ms -> {regression['current_median']:.2f} ms)", err=True)
+        if regressions:
+            sys.exit(1)
+    
+    except Exception as e:
+        click.echo(f"Error running benchmarks: {str(e)}", err=True)
+        sys.exit(1)
@@ -0,0 +1,764 @@
+"""
+Capability management commands for Strangeloop.
+"""
+import sys
+import json
+import importlib
+import inspect
+import itertools
+import time
+import collections.abc
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Tuple
+import click
+
+
+@click.group()
+def capability():
+    """Manage strangeloop capabilities."""
+    pass
+
+
+@capability.command(name="add")
+@click.argument("description", required=True)
+@click.option("--max-tokens", "-m", default=4096, help="Maximum tokens in response")
+@click.option("--temperature", "-t", default=0.5, type=float, help="Temperature (0.0-1.0)")
+@click.option("--save/--no-save", "-s/-n", default=True, help="Save the function to a file (default: save)")
+@click.option("--validate/--skip-validation", default=True, help="Check the generated code for performance problems (default: validate)")
+@click.option("--max-rounds", type=int, default=None, help="Regeneration rounds when validation fails (default: 2)")
+@click.option("--benchmark/--no-benchmark", default=None,
+              help="Also run the generated code in a micro-benchmark (default: the validation_benchmark setting, off)")
+@click.option("--budget-ms", type=float, default=None, help="Maximum median call time in the micro-benchmark (default: 50)")
+@click.option("--model", default=None, help="Model used for code generation (default: the configured generation model)")
+@click.option("--backend", default=None, help="LLM backend used for code generation (default: the configured backend)")
+def capability_add(description, max_tokens, temperature, save, validate, max_rounds, benchmark, budget_ms, model,
+                   backend):
+    """
+    Add a new capability using Claude and dynamically add it to strangeloop.
+    
+    DESCRIPTION is a description of what the function should do.
+    """
+    try:
+        from ..dynamic import BATCH_SUFFIX, add_function_to_module, save_function_to_file
+        from ..llm import GENERATION, ask_llm
+        from ..planner import strip_code_fences
+        import strangeloop
+        
+        # Prepare the prompt for Claude
+        prompt = f"""
+        Implement a Python function based on this capability description:
+        
+        {description}
+        
+        Requirements:
+        1. Write a single, well-documented Python function with clear docstrings
+        2. Include proper type hints
+        3. Include appropriate error handling
+        4. Make the function name descriptive of its purpose
+        5. Keep it efficient: prefer bulk operations over per-item Python loops
+        6. For HTTP requests, don't call requests directly. Use the shared runtime HTTP layer,
+           which pools connections, applies default timeouts and caches responses:
+               from strangeloop.runtime import http
+               response = http.get(url, params=params)  # also http.post(url, json=...)
+           Responses are regular requests.Response objects; catch http.RequestException for errors
+        7. If the function is likely to be called many times in a row (generating IDs, passwords,
+           random samples, conversions), also write a batch variant named <function_name>_batch
+           that takes a list of positional argument tuples and returns the list of results.
+           Vectorize it: draw all randomness at once (e.g. one secrets.token_bytes call) or use
+           NumPy when it is installed, instead of calling the scalar function in a loop
+        8. Only return the function code, nothing else
+        """
+        
+        click.echo(f"Asking Claude to implement: {description}")
+        function_code = ask_llm(prompt, max_tokens, temperature, GENERATION, model, backend)
+        
+        # Clean up the response if needed (remove markdown code blocks)
+        function_code = strip_code_fences(function_code, "python")
+        
+        # Display the generated function
+        click.echo("\nGenerated function:")
+        click.echo(function_code)
+        
+        if validate:
+            function_code = validate_generated_code(description, function_code, max_tokens, temperature,
+                                                    max_rounds, budget_ms, model, backend, benchmark)
+        
+        # Add the function to the strangeloop module
+        try:
+            function = add_function_to_module("strangeloop", function_code)
+            function_name = function.__name__
+            click.echo(f"\nSuccessfully added function '{function_name}' to strangeloop")
+            
+            # Save the function to a file if requested
+            if save:
+                file_path = save_function_to_file(function_code)
+                click.echo(f"Saved function to {file_path}")
+                
+                # Add import to __init__.py to make it available in future sessions
+                capabilities_init = Path(__file__).parent.parent / "capabilities" / "__init__.py"
+                names = function_name
+                if hasattr(strangeloop, f"{function_name}{BATCH_SUFFIX}"):
+                    names += f", {function_name}{BATCH_SUFFIX}"
+                with open(capabilities_init, "a") as f:
+                    f.write(f"\nfrom strangeloop.capabilities.{function_name} import {names}\n")
+                
+                click.echo(f"Added import to capabilities/__init__.py for future sessions")
+            
+            # Show usage example
+            click.echo("\nUsage example:")
+            click.echo(f"  from strangeloop import {function_name}")
+            click.echo(f"  help({function_name})  # View documentation")
+            click.echo(f"  # Or use the CLI:")
+            click.echo(f"  strangeloop capability run {function_name} [ARGS...]")
+            
+            return function_name
+        
+        except Exception as e:
+            click.echo(f"Error adding function to strangeloop: {str(e)}", err=True)
+            sys.exit(1)
+    
+    except Exception as e:
+        click.echo(f"Error implementing capability: {str(e)}", err=True)
+        sys.exit(1)
+
+
+def validate_generated_code(description: str, function_code: str, max_tokens: int, temperature: float,
+                            max_rounds: Optional[int], budget_ms: Optional[float],
+                            model: Optional[str] = None, backend: Optional[str] = None,
+                            benchmark: Optional[bool] = None) -> str:
+    """
+    Validate generated capability code, asking Claude to fix it until it passes.
+    
+    Args:
+        description: The capability description
+        function_code: The generated code
+        max_tokens: Maximum tokens in each regeneration response
+        temperature: Temperature for regeneration
+        max_rounds: Maximum regeneration rounds (None for the configured default)
+        budget_ms: Maximum median call time (None for the configured default)
+        model: Model used for regeneration (None for the configured generation model)
+        backend: LLM backend used for regeneration (None for the configured backend)
+        benchmark: Whether to run the micro-benchmark, which executes the code (None for the configured default)
+    
+    Returns:
+        Code that passed validation
+    
+    Raises:
+        ValueError: If the code still fails validation after the last round
+    """
+    from ..config import get_config
+    from ..dynamic import extract_function_name
+    from ..llm import GENERATION, ask_llm
+    from ..planner import strip_code_fences
+    from ..validation import (DEFAULT_BUDGET_MS, DEFAULT_MAX_ROUNDS, build_regeneration_prompt,
+                              validate_capability)
+    
+    config = get_config()
+    if max_rounds is None:
+        max_rounds = int(config.get("validation_max_rounds", DEFAULT_MAX_ROUNDS))
+    if budget_ms is None:
+        budget_ms = float(config.get("validation_budget_ms", DEFAULT_BUDGET_MS))
+    if benchmark is None:
+        benchmark = bool(config.get("validation_benchmark", False))
+    
+    for round_number in range(max_rounds + 1):
+        click.echo("\nValidating generated code...")
+        report = validate_capability(function_code, extract_function_name(function_code), budget_ms,
+                                     benchmark=benchmark)
+        
+        timing = report["benchmark"] or {}
+        if "median_ms" in timing:
+            click.echo(f"Micro-benchmark: median {timing['median_ms']:.3f} ms per call")
+        elif "skipped" in timing and timing["skipped"] != "not enabled":
+            click.echo(f"Micro-benchmark skipped: {timing['skipped']}")
+        elif "error" in timing:
+            click.echo(f"Micro-benchmark could not run with synthetic arguments: {timing['error']}")
+        
+        if report["passed"]:
+            click.echo("Validation passed.")
+            return function_code
+        
+        click.echo("Validation found problems:")
+        for issue in report["issues"]:
+            location = f"line {issue['line']}: " if issue["line"] else ""
+            click.echo(f"  - [{issue['check']}] {location}{issue['message']}")
+        
+        if round_number == max_rounds:
+            break
+        
+        click.echo(f"\nAsking Claude to fix the problems (round {round_number + 1} of {max_rounds})...")
+        prompt = build_regeneration_prompt(description, function_code, report["issues"])
+        function_code = strip_code_fences(ask_llm(prompt, max_tokens, temperature, GENERATION, model, backend),
+                                          "python")
+        click.echo("\nRegenerated function:")
+        click.echo(function_code)
+    
+    raise ValueError(f"Generated code failed validation after {max_rounds} regeneration rounds "
+                     "(use --skip-validation to save it anyway)")
+
+
+@capability.command(name="list")
+@click.option("--verbose", "-v", is_flag=True, help="Show detailed information about each capability")
+def capability_list(verbose):
+    """List all available capabilities."""
+    try:
+        # Import capabilities module
+        try:
+            import strangeloop.capabilities as capabilities
+            importlib.reload(capabilities)  # Reload to catch any new capabilities
+        except ImportError:
+            click.echo("No capabilities found.")
+            return
+        
+        from ..dynamic import BATCH_SUFFIX
+        from ..registry import get_batch_function
+        
+        # Get all functions from the capabilities module
+        functions = []
+        for name in dir(capabilities):
+            if name.startswith('_'):
+                continue
+            
+            obj = getattr(capabilities, name)
+            if inspect.isfunction(obj):
+                functions.append((name, obj))
+        
+        # Batch entry points are shown with the capability they belong to
+        names = {name for name, _ in functions}
+        functions = [(name, func) for name, func in functions
+                     if not (name.endswith(BATCH_SUFFIX) and name[:-len(BATCH_SUFFIX)] in names)]
+        
+        if not functions:
+            click.echo("No capabilities found.")
+            return
+        
+        click.echo(f"Found {len(functions)} capabilities:")
+        for name, func in sorted(functions, key=lambda x: x[0]):
+            if verbose:
+                # Get the first line of the docstring
+                doc = inspect.getdoc(func) or "No documentation"
+                doc_first_line = doc.split('\n')[0]
+                
+                # Get the function signature
+                sig = str(inspect.signature(func))
+                
+                click.echo(f"\n{name}{sig}")
+                click.echo(f"  {doc_first_line}")
+                
+                batch = get_batch_function(capabilities, name)
+                if batch:
+                    click.echo(f"  Batch entry point: {batch.__name__}(args_list)")
+                
+                # Show file location
+                try:
+                    file_path = inspect.getfile(func)
+                    click.echo(f"  Defined in: {file_path}")
+                except (TypeError, OSError):
+                    pass
+            else:
+                batch = " (batch)" if get_batch_function(capabilities, name) else ""
+                click.echo(f"- {name}{batch}")
+        
+        if not verbose:
+            click.echo("\nUse --verbose for more details.")
+            click.echo("Use 'strangeloop capability show <name>' to see full documentation.")
+    
+    except Exception as e:
+        click.echo(f"Error listing capabilities: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@capability.command(name="show")
+@click.argument("name", required=True)
+def capability_show(name):
+    """Show detailed information about a specific capability."""
+    try:
+        # Import capabilities module
+        try:
+            import strangeloop.capabilities as capabilities
+            importlib.reload(capabilities)  # Reload to catch any new capabilities
+        except ImportError:
+            click.echo("No capabilities found.")
+            return
+        
+        # Get the function
+        if not hasattr(capabilities, name):
+            click.echo(f"Capability '{name}' not found.")
+            return
+        
+        func = getattr(capabilities, name)
+        if not inspect.isfunction(func):
+            click.echo(f"'{name}' is not a function capability.")
+            return
+        
+        # Display function information
+        click.echo(f"Capability: {name}{inspect.signature(func)}")
+        
+        # Show docstring
+        doc = inspect.getdoc(func) or "No documentation"
+        click.echo("\nDocumentation:")
+        click.echo(doc)
+        
+        # Show source code
+        try:
+            source = inspect.getsource(func)
+            click.echo("\nSource Code:")
+            click.echo(source)
+        except (TypeError, OSError) as e:
+            click.echo(f"\nCould not retrieve source code: {str(e)}")
+        
+        # Show file location
+        try:
+            file_path = inspect.getfile(func)
+            click.echo(f"\nDefined in: {file_path}")
+        except (TypeError, OSError):
+            pass
+        
+        # Show usage example
+        click.echo("\nUsage example:")
+        click.echo(f"  from strangeloop import {name}")
+        click.echo(f"  result = {name}(...)")
+        click.echo(f"  # Or use the CLI:")
+        click.echo(f"  strangeloop capability run {name} [ARGS...]")
+    
+    except Exception as e:
+        click.echo(f"Error showing capability: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@capability.command(name="pack")
+@click.option("--remove", is_flag=True, help="Remove the pack so capabilities load from their files again")
+def capability_pack(remove):
+    """
+    Compile all capabilities into a single indexed pack for fast loading.
+    
+    Discovery then reads only the pack's index, and running a capability
+    loads just the module that defines it. The pack is ignored once a
+    capability is added, removed or saved by strangeloop; run this command
+    again to refresh it.
+    """
+    try:
+        from ..pack import build_pack, remove_pack
+        
+        if remove:
+            if remove_pack():
+                click.echo("Removed the capability pack.")
+            else:
+                click.echo("There is no capability pack.")
+            return
+        
+        summary = build_pack()
+        click.echo(f"Packed {summary['capabilities']} capabilities from {summary['modules']} modules "
+                   f"({summary['bytes']} bytes)")
+        click.echo(f"Pack written to: {summary['path']}")
+    
+    except Exception as e:
+        click.echo(f"Error packing capabilities: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@capability.command(name="check")
+@click.argument("names", nargs=-1)
+@click.option("--iterations", "-n", default=3, help="Calls per argument set")
+@click.option("--concurrency", "-c", default=4, help="Maximum number of calls in flight")
+@click.option("--timeout", type=float, default=10.0, help="Seconds before a call counts as timed out")
+@click.option("--slo-p95-ms", type=float, default=None, help="Maximum p95 latency in ms (default: 1000)")
+@click.option("--slo-success-rate", type=float, default=None, help="Minimum success rate from 0 to 1 (default: 0.99)")
+@click.option("--host-override", multiple=True, metavar="HOST=URL",
+              help="Send runtime HTTP requests for HOST to URL, e.g. a local stand-in (repeatable)")
+@click.option("--output", "-o", help="Write the JSON report to this file")
+def capability_check(names, iterations, concurrency, timeout, slo_p95_ms, slo_success_rate, host_override, output):
+    """
+    Check that capabilities work and meet their latency SLOs.
+    
+    Runs each capability (or only NAMES) with the arguments declared in its
+    module's SAMPLES list, or with arguments synthesized from its signature,
+    and reports the success rate and latency percentiles. Exits with a
+    non-zero status if any capability breaches its SLO.
+    """
+    try:
+        from ..config import get_config
+        from ..health import DEFAULT_SLO_P95_MS, DEFAULT_SLO_SUCCESS_RATE, check_capabilities
+        from ..registry import get_available_capabilities, get_capability
+        
+        config = get_config()
+        if slo_p95_ms is None:
+            slo_p95_ms = float(config.get("check_slo_p95_ms", DEFAULT_SLO_P95_MS))
+        if slo_success_rate is None:
+            slo_success_rate = float(config.get("check_slo_success_rate", DEFAULT_SLO_SUCCESS_RATE))
+        
+        if host_override:
+            from ..runtime import http
+            
+            overrides = {}
+            for override in host_override:
+                host, separator, url = override.partition("=")
+                if not separator or not url:
+                    raise click.BadParameter(f"Expected HOST=URL, got '{override}'", param_hint="--host-override")
+                overrides[host] = url
+            http.set_host_overrides(overrides)
+        
+        names = list(names) or [cap["name"] for cap in get_available_capabilities()]
+        capabilities = {}
+        for name in names:
+            func = get_capability(name)
+            if func is None:
+                click.echo(f"Capability '{name}' not found.", err=True)
+                sys.exit(1)
+            capabilities[name] = func
+        
+        if not capabilities:
+            click.echo("No capabilities found.")
+            return
+        
+        click.echo(f"Checking {len(capabilities)} capabilities...", err=True)
+        progress = {"calls": 0}
+        
+        def on_result(name, outcome):
+            progress["calls"] += 1
+            click.echo(f"\r{progress['calls']} calls done", nl=False, err=True)
+        
+        report = check_capabilities(capabilities, iterations=iterations, concurrency=concurrency, timeout=timeout,
+                                    slos=config.get("check_slos") or {},
+                                    default_slo={"p95_ms": slo_p95_ms, "success_rate": slo_success_rate},
+                                    on_result=on_result)
+        click.echo("", err=True)
+        
+        for name, result in report["capabilities"].items():
+            latency = result["latency_ms"]
+            timing = (f"p50 {latency['median']:.1f} ms, p95 {latency['p95']:.1f} ms, p99 {latency['p99']:.1f} ms"
+                      if latency else "no successful calls")
+            status = "FAIL" if result["breaches"] else "ok"
+            click.echo(f"[{status}] {name}: {result['success_rate']:.0%} of {result['calls']} calls succeeded, {timing}")
+            for breach in result["breaches"]:
+                click.echo(f"    SLO breach: {breach}")
+            for error in result["errors"][:3]:
+                click.echo(f"    error: {error}")
+        
+        if output:
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            click.echo(f"\nReport written to: {output}")
+        
+        if report["breaching"]:
+            click.echo(f"\n{len(report['breaching'])} capabilities breach their SLO.", err=True)
+            sys.exit(1)
+    
+    except click.ClickException:
+        raise
+    except Exception as e:
+        click.echo(f"Error checking capabilities: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@capability.command(name="optimize")
+@click.argument("name", required=True)
+@click.option("--iterations", "-n", default=20, help="Timed rounds when benchmarking the original against the rewrite")
+@click.option("--min-improvement", type=float, default=10.0,
+              help="Minimum speedup in percent for the rewrite to replace the original")
+@click.option("--max-tokens", "-m", default=4096, help="Maximum tokens in response")
+@click.option("--temperature", "-t", default=0.2, type=float, help="Temperature (0.0-1.0)")
+@click.option("--model", default=None, help="Model used for the rewrite (default: the configured generation model)")
+@click.option("--backend", default=None, help="LLM backend used for the rewrite (default: the configured backend)")
+@click.option("--save/--no-save", default=True, help="Replace the capability if the rewrite is faster (default: save)")
+def capability_optimize(name, iterations, min_improvement, max_tokens, temperature, model, backend, save):
+    """
+    Make a capability faster with a profile-driven rewrite.
+    
+    NAME is profiled with cProfile on its sample inputs (its module's
+    SAMPLES list, or arguments synthesized from its signature), and Claude
+    is asked to rewrite its module around the hotspots. The rewrite replaces
+    the original only if it returns the same outputs on the sample inputs
+    and is at least --min-improvement percent faster. The original is kept
+    as a backup; restore it with 'strangeloop capability rollback NAME'.
+    """
+    try:
+        from ..dynamic import extract_function_name, save_function_to_file
+        from ..health import sample_arguments
+        from ..llm import GENERATION, ask_llm
+        from ..optimize import (PROFILE_ITERATIONS, backup_capability, benchmark_pair, build_optimization_prompt,
+                                compare_outputs, load_candidate, profile_capability)
+        from ..planner import strip_code_fences
+        from ..registry import get_capability
+        
+        func = get_capability(name)
+        if func is None:
+            click.echo(f"Capability '{name}' not found.", err=True)
+            sys.exit(1)
+        
+        file_path = Path(inspect.getsourcefile(func))
+        if file_path.stem != name:
+            raise ValueError(f"'{name}' is defined in {file_path.name}; only capabilities in their own module "
+                             "can be optimized")
+        source = file_path.read_text(encoding="utf-8")
+        argument_sets = sample_arguments(func)
+        
+        click.echo(f"Profiling '{name}' on {len(argument_sets)} sample inputs...")
+        report = profile_capability(func, argument_sets, PROFILE_ITERATIONS)
+        
+        click.echo("Asking Claude for an optimized version...")
+        prompt = build_optimization_prompt(name, source, report, argument_sets, len(argument_sets) * PROFILE_ITERATIONS)
+        code = strip_code_fences(ask_llm(prompt, max_tokens, temperature, GENERATION, model, backend), "python")
+        
+        if extract_function_name(code) != name:
+            raise ValueError(f"The rewrite doesn't define '{name}' as its first function")
+        candidate = load_candidate(code, name, func.__module__, source)
+        
+        # Every name the capabilities package imports from the module must survive the rewrite
+        module = inspect.getmodule(func)
+        missing = [attribute for attribute, obj in vars(module).items()
+                   if inspect.isfunction(obj) and obj.__module__ == module.__name__
+                   and not attribute.startswith("_") and not hasattr(candidate, attribute)]
+        if missing:
+            raise ValueError(f"The rewrite drops {', '.join(missing)}")
+        
+        click.echo("Checking that outputs match...")
+        comparison = compare_outputs(func, getattr(candidate, name), argument_sets)
+        if comparison["nondeterministic"]:
+            click.echo("Outputs vary between calls; compared their types, lengths and characters instead.")
+        if not comparison["equivalent"]:
+            click.echo("The rewrite returns different outputs, keeping the original:")
+            for mismatch in comparison["mismatches"][:5]:
+                click.echo(f"  - {mismatch}")
+            sys.exit(1)
+        
+        click.echo("Benchmarking the original against the rewrite...")
+        timing = benchmark_pair(func, getattr(candidate, name), argument_sets, iterations)
+        click.echo(f"Original: {timing['original_ms']:.3f} ms, rewrite: {timing['candidate_ms']:.3f} ms "
+                   f"per round ({timing['improvement_pct']:+.1f}% faster)")
+        
+        if timing["improvement_pct"] < min_improvement:
+            click.echo(f"The rewrite is not at least {min_improvement:g}% faster, keeping the original.")
+            return
+        
+        if not save:
+            click.echo("\nOptimized code (not saved):")
+            click.echo(code)
+            return
+        
+        backup = backup_capability(name, file_path)
+        save_function_to_file(code, file_path.parent)
+        click.echo(f"Replaced {file_path} (original kept at {backup})")
+        click.echo(f"Undo with: strangeloop capability rollback {name}")
+        
+        # Latency recorded for the old code no longer applies
+        from ..execution import get_execution_stats
+        
+        stats = get_execution_stats()
+        if stats:
+            stats.reset(name)
+    
+    except Exception as e:
+        click.echo(f"Error optimizing capability: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@capability.command(name="rollback")
+@click.argument("name", required=True)
+@click.option("--list", "list_only", is_flag=True, help="List the backups instead of restoring one")
+def capability_rollback(name, list_only):
+    """
+    Restore the version of a capability replaced by 'capability optimize'.
+    
+    NAME is restored from its most recent backup, and that backup is
+    removed, so rolling back repeatedly walks back through older versions.
+    """
+    try:
+        from ..optimize import list_backups, restore_backup
+        
+        if list_only:
+            backups = list_backups(name)
+            if not backups:
+                click.echo(f"Capability '{name}' has no backups.")
+            for backup in reversed(backups):
+                click.echo(str(backup))
+            return
+        
+        restored, backup = restore_backup(name)
+        click.echo(f"Restored {restored} from {backup}")
+        
+        from ..execution import get_execution_stats
+        
+        stats = get_execution_stats()
+        if stats:
+            stats.reset(name)
+    
+    except Exception as e:
+        click.echo(f"Error rolling back capability: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@capability.command(name="run")
+@click.argument("name", required=True)
+@click.argument("args", nargs=-1)
+@click.option("--json", "-j", "parse_json", is_flag=True, help="Parse arguments as JSON")
+@click.option("--repeat", "-r", type=int, default=None, help="Run the capability N times with the same arguments")
+@click.option("--batch", "-b", "batch_file", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Run once per argument list in a JSON array or JSON lines file")
+@click.option("--ndjson", is_flag=True, help="Write results as JSON lines, one per item, as they are produced")
+@click.option("--limit", "-l", type=int, default=None, help="Stop after this many items of a list or streamed result")
+@click.option("--journal/--no-journal", default=True, help="Record the run in the run journal (default: record)")
+def capability_run(name, args, parse_json, repeat, batch_file, ndjson, limit, journal):
+    """
+    Run a capability with the given arguments.
+    
+    NAME is the name of the capability to run.
+    ARGS are the arguments to pass to the capability.
+    
+    With --repeat or --batch, all calls go to the capability's NAME_batch
+    entry point in one vectorized call when it has one.
+    
+    Capabilities that return a generator or iterator are streamed: every
+    item is written as soon as it is produced, and with --ndjson, stdout
+    only holds the JSON lines (status messages go to stderr).
+    """
+    started = time.time()
+    start = time.perf_counter()
+    entry = {"capability": name, "arguments": list(args)}
+    status = "error"
+    try:
+        from ..dynamic import BATCH_SUFFIX
+        from ..execution import execute_capability, is_sensitive
+        from ..registry import get_capability
+        
+        # Get the function (only its own module is loaded when a capability pack is in use)
+        func = get_capability(name)
+        if func is None:
+            entry["error"] = f"Capability '{name}' not found"
+            click.echo(f"Capability '{name}' not found.")
+            return
+        entry["sensitive"] = is_sensitive(func)
+        
+        # Parse arguments
+        parsed_args = []
+        parsed_kwargs = {}
+        
+        if parse_json:
+            # Parse all arguments as JSON
+            for arg in args:
+                try:
+                    parsed_args.append(json.loads(arg))
+                except json.JSONDecodeError:
+                    # If not valid JSON, use as string
+                    parsed_args.append(arg)
+        else:
+            # Simple string arguments
+            parsed_args = args
+        entry["arguments"] = list(parsed_args)
+        
+        if batch_file or repeat is not None:
+            args_list = load_batch_arguments(batch_file) if batch_file else [tuple(parsed_args)] * repeat
+            entry["arguments"] = [list(call_args) for call_args in args_list]
+            batch = get_capability(f"{name}{BATCH_SUFFIX}")
+            
+            if batch:
+                click.echo(f"Running capability '{name}' on {len(args_list)} argument sets with {batch.__name__}...",
+                           err=ndjson)
+                result = execute_capability(batch.__name__, batch, [args_list])
+            else:
+                click.echo(f"Running capability '{name}' {len(args_list)} times (it has no batch entry point)...",
+                           err=ndjson)
+                result = [execute_capability(name, func, call_args) for call_args in args_list]
+        else:
+            # Run the function, recording its latency for the planner
+            click.echo(f"Running capability '{name}'...", err=ndjson)
+            result = execute_capability(name, func, parsed_args, parsed_kwargs)
+        
+        # Stream iterators item by item instead of collecting them
+        if isinstance(result, collections.abc.Iterator):
+            count = emit_items(result, ndjson, limit)
+            click.echo(f"\nStreamed {count} items", err=True)
+            entry["result"] = f"<streamed {count} items>"
+            status = "ok"
+            return None
+        
+        if limit is not None and isinstance(result, list):
+            result = result[:limit]
+        entry["result"] = result
+        status = "ok"
+        
+        if ndjson:
+            emit_items(result if isinstance(result, list) else [result], ndjson=True)
+            return result
+        
+        # Display the result
+        click.echo("\nResult:")
+        if result is None:
+            click.echo("(No return value)")
+        elif isinstance(result, (dict, list)):
+            click.echo(json.dumps(result, indent=2))
+        else:
+            click.echo(result)
+        
+        return result
+    
+    except Exception as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+        click.echo(f"Error running capability: {str(e)}", err=True)
+        sys.exit(1)
+    
+    finally:
+        if journal:
+            from ..journal import record_run
+            
+            record_run("run", status, timings={"total_ms": (time.perf_counter() - start) * 1000.0},
+                       timestamp=started, **entry)
+
+
+def emit_items(items: Iterable[Any], ndjson: bool, limit: Optional[int] = None) -> int:
+    """
+    Write items one at a time, flushing after each, without collecting them.
+    
+    Args:
+        items: The items (a generator is closed once the limit is reached)
+        ndjson: Write each item as a line of JSON instead of its plain text
+        limit: Maximum number of items to write (None for all)
+    
+    Returns:
+        The number of items written
+    """
+    if not ndjson:
+        click.echo("\nResult:")
+    
+    count = 0
+    try:
+        for item in itertools.islice(items, limit):
+            if ndjson:
+                click.echo(json.dumps(item, default=str))
+            elif isinstance(item, (dict, list)):
+                click.echo(json.dumps(item))
+            else:
+                click.echo(item)
+            count += 1
+    finally:
+        if inspect.isgenerator(items):
+            items.close()
+    
+    return count
+
+
+def load_batch_arguments(path: str) -> List[Tuple[Any, ...]]:
+    """
+    Load argument sets for a batch run.
+    
+    The file holds either a JSON array or one JSON value per line. Each
+    entry is a list of positional arguments; any other value is passed as
+    the only argument.
+    
+    Args:
+        path: Path to the file
+    
+    Returns:
+        List of positional argument tuples
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    
+    try:
+        entries = json.loads(text)
+        if not isinstance(entries, list):
+            entries = [entries]
+    except json.JSONDecodeError:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    
+    return [tuple(entry) if isinstance(entry, list) else (entry,) for entry in entries]
@@ -0,0 +1,223 @@
+"""
+The do command, Strangeloop's AI agent loop.
+"""
+import sys
+import json
+import collections.abc
+import textwrap
+import click
+from ..agent import Agent
+from ..speculate import MAX_CANDIDATES
+from .capability import capability_add, emit_items
+
+
+@click.command()
+@click.argument("request", required=False, nargs=-1)
+@click.option("--max-tokens", "-m", default=4096, help="Maximum tokens in response")
+@click.option("--temperature", "-t", default=0.7, type=float, help="Temperature (0.0-1.0)")
+@click.option("--auto-execute/--no-auto-execute", default=True, help="Automatically execute the suggested action")
+@click.option("--session", "-s", "session_name", help="Continue a named session, keeping context between requests")
+@click.option("--session-budget", type=int, default=None, help="Token budget for session context (default: 2000)")
+@click.option("--plan-cache/--no-plan-cache", default=None, help="Reuse cached plans for repeated requests (default: on)")
+@click.option("--cache-similarity", type=float, default=None,
+              help="Minimum similarity (0-1) to reuse a plan cached for a different request (default: 1.0, exact only)")
+@click.option("--model", default=None, help="Model used for planning (default: the configured planning model)")
+@click.option("--from", "from_file", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Run every request in a JSON lines file instead of REQUEST")
+@click.option("--concurrency", "-c", default=4, help="Maximum number of requests in flight with --from")
+@click.option("--output", "-o", default=None, help="Write --from results to this file instead of stdout")
+@click.option("--hedge/--no-hedge", default=None,
+              help="Duplicate planning requests that are slow to start answering (default: the llm_hedging setting)")
+@click.option("--backend", default=None, help="LLM backend used for planning (default: the configured planning backend)")
+@click.option("--speculate", "-k", type=click.IntRange(1, MAX_CANDIDATES, clamp=True), default=None,
+              help=f"Try the planner's top K candidate capabilities, idempotent ones concurrently, and keep the "
+                   f"first to succeed (at most {MAX_CANDIDATES}, default: 1)")
+@click.option("--deadline", type=float, default=None,
+              help="Seconds to wait for a candidate capability to succeed (default: no deadline)")
+def do(request, max_tokens, temperature, auto_execute, session_name, session_budget, plan_cache, cache_similarity,
+       model, from_file, concurrency, output, hedge, backend, speculate, deadline):
+    """
+    Execute an AI agent loop to fulfill a request using available capabilities.
+    
+    REQUEST is what you want strangeloop to do for you. With --from, every
+    request in a JSON lines file is planned and executed in this process,
+    with results written as JSON lines.
+    
+    With --speculate K, the planner ranks up to K candidate capabilities for
+    ambiguous requests; idempotent ones run concurrently, others one at a
+    time, and the first successful result is used, so a failing first choice
+    doesn't cost another round trip.
+    """
+    if from_file:
+        if request or session_name:
+            raise click.UsageError("--from can't be combined with REQUEST or --session")
+        agent = Agent(model=model, backend=backend, hedge=hedge, max_tokens=max_tokens, temperature=temperature,
+                      plan_cache=plan_cache, cache_similarity=cache_similarity, speculate=speculate,
+                      deadline=deadline)
+        return run_bulk(agent, from_file, concurrency, output, auto_execute)
+    if not request:
+        raise click.UsageError("Missing argument 'REQUEST...' (or use --from FILE)")
+    
+    try:
+        # Convert request tuple to string
+        request_str = " ".join(request)
+        click.echo(f"Processing request: {request_str}")
+        
+        agent = Agent(model=model, backend=backend, hedge=hedge, max_tokens=max_tokens, temperature=temperature,
+                      plan_cache=plan_cache, cache_similarity=cache_similarity, speculate=speculate,
+                      deadline=deadline, session_budget=session_budget)
+        if agent.capabilities():
+            click.echo("Consulting Claude to determine the best approach...")
+        else:
+            click.echo("No capabilities available.")
+        
+        record = agent.do(request_str, session=session_name, execute=auto_execute, stream=True,
+                          on_plan=lambda plan: show_plan(plan, auto_execute))
+        
+        if record["status"] == "error" and "response" in record and record["action"] is None:
+            click.echo("Could not parse Claude's response as JSON. Full response:")
+            click.echo(record["response"])
+            sys.exit(1)
+        
+        if record.get("candidates"):
+            show_candidates(record["candidates"])
+        if record["status"] == "error":
+            raise RuntimeError(record["error"])
+        
+        action = record["action"]
+        if action == "use_capability":
+            if auto_execute:
+                show_result(record["result"])
+            else:
+                click.echo("\nTo execute this capability, run:")
+                args_str = " ".join([f'"{arg}"' for arg in record["arguments"]])
+                click.echo(f"  strangeloop capability run {record['capability']} {args_str}")
+        
+        elif action == "create_capability":
+            if auto_execute:
+                click.echo("Automatically creating the suggested capability...")
+                ctx = click.get_current_context()
+                return ctx.invoke(capability_add, description=record["description"], 
+                                  max_tokens=max_tokens, temperature=temperature, save=True)
+            click.echo("\nTo create this capability, run:")
+            click.echo(f'  strangeloop capability add "{record["description"]}"')
+        
+        elif action == "direct_response":
+            click.echo("\nDirect response:")
+            click.echo(textwrap.fill(record["response"], width=80))
+        
+        else:
+            click.echo(f"\nUnknown action type: {action}")
+            click.echo("Full response from Claude:")
+            click.echo(json.dumps(record["plan"]))
+        
+        return record.get("result")
+    
+    except Exception as e:
+        click.echo(f"Error processing request: {str(e)}", err=True)
+        sys.exit(1)
+
+
+def show_plan(plan, auto_execute):
+    """Print the plan Claude chose, before it is executed."""
+    if plan.get("cached"):
+        click.echo(f"Using cached plan (similarity {plan['similarity']:.2f})")
+    
+    # Display the explanation
+    if "explanation" in plan:
+        click.echo(f"\nReasoning: {plan['explanation']}")
+    
+    action = plan.get("action")
+    if action == "use_capability":
+        click.echo(f"\nSuggested action: Use capability '{plan.get('capability')}' with arguments: "
+                   f"{plan.get('arguments', [])}")
+        for candidate in plan.get("candidates") or []:
+            if isinstance(candidate, dict):
+                click.echo(f"  or '{candidate.get('capability')}' with arguments: {candidate.get('arguments', [])}")
+        if auto_execute:
+            click.echo("Automatically executing the suggested capability...")
+    
+    elif action == "create_capability":
+        click.echo(f"\nSuggested action: Create a new capability with description:")
+        click.echo(f"  {plan.get('description')}")
+
+
+def show_candidates(candidates):
+    """Print the status and time of every candidate capability run speculatively."""
+    click.echo(f"\n{'Candidate':<50} {'Status':<10} {'ms':>9}")
+    for candidate in candidates:
+        call = f"{candidate['capability']}({', '.join(repr(arg) for arg in candidate['arguments'])})"
+        ms = "-" if candidate["ms"] is None else f"{candidate['ms']:.1f}"
+        click.echo(f"{call[:50]:<50} {candidate['status']:<10} {ms:>9}")
+        if candidate["error"]:
+            click.echo(f"  {candidate['error']}")
+
+
+def show_result(result):
+    """Print the result of a capability, streaming iterators item by item."""
+    if isinstance(result, collections.abc.Iterator):
+        count = emit_items(result, ndjson=False)
+        click.echo(f"\nStreamed {count} items", err=True)
+        return
+    
+    click.echo("\nResult:")
+    if result is None:
+        click.echo("(No return value)")
+    elif isinstance(result, (dict, list)):
+        click.echo(json.dumps(result, indent=2))
+    else:
+        click.echo(result)
+
+
+def run_bulk(agent, from_file, concurrency, output, auto_execute):
+    """Run every request in a JSON lines file, streaming results as JSON lines."""
+    try:
+        from ..bulk import BulkRunner, load_requests
+        
+        if not agent.capabilities():
+            click.echo("No capabilities available. Use 'strangeloop capability add' to create one.", err=True)
+            sys.exit(1)
+        
+        # One agent, and so one client, for every request, so connections are reused
+        runner = BulkRunner(agent, auto_execute=auto_execute)
+        
+        output_file = open(output, "w", encoding="utf-8") if output else None
+        progress = {"done": 0, "errors": 0}
+        
+        def on_record(record):
+            line = json.dumps(record, default=str)
+            if output_file:
+                output_file.write(line + "\n")
+                output_file.flush()
+            else:
+                click.echo(line)
+            
+            progress["done"] += 1
+            progress["errors"] += "error" in record
+            click.echo(f"\r{progress['done']} done, {progress['errors']} errors", nl=False, err=True)
+        
+        try:
+            summary = runner.run(load_requests(from_file), concurrency, on_record)
+        finally:
+            if output_file:
+                output_file.close()
+        
+        click.echo("", err=True)
+        click.echo(f"Completed {summary['requests']} requests ({summary['errors']} errors) in "
+                   f"{summary['seconds']:.2f}s: {summary['requests_per_sec']:.2f} requests/s", err=True)
+        click.echo(f"Latency: p50 {summary['p50_ms']:.0f} ms, p90 {summary['p90_ms']:.0f} ms, "
+                   f"p99 {summary['p99_ms']:.0f} ms", err=True)
+        client = agent.client
+        usage = client.usage()
+        click.echo(f"LLM usage ({client.name}): {usage['requests']} requests, {usage['input_tokens']} input and "
+                   f"{usage['output_tokens']} output tokens", err=True)
+        if summary["coalesced_llm_calls"] or summary["coalesced_capability_calls"]:
+            click.echo(f"Coalesced identical calls in flight: {summary['coalesced_llm_calls']} LLM, "
+                       f"{summary['coalesced_capability_calls']} capability", err=True)
+        
+        if summary["errors"]:
+            sys.exit(1)
+    
+    except (OSError, ValueError) as e:
+        click.echo(f"\nError running requests: {str(e)}", err=True)
+        sys.exit(1)
@@ -0,0 +1,103 @@
+"""
+The history command for Strangeloop.
+"""
+import sys
+import json
+from datetime import datetime
+import click
+
+
+@click.command()
+@click.option("--capability", "-c", default=None, help="Only runs of this capability")
+@click.option("--since", default=None, help="Only runs since this time (e.g. 30m, 2h, 7d or an ISO 8601 date)")
+@click.option("--until", default=None, help="Only runs before this time (same formats as --since)")
+@click.option("--status", type=click.Choice(["ok", "error"]), default=None, help="Only runs with this status")
+@click.option("--kind", type=click.Choice(["do", "run"]), default=None,
+              help="Only 'do' requests or 'capability run' calls")
+@click.option("--limit", "-l", type=int, default=20, help="Maximum number of runs to show, newest first")
+@click.option("--json", "-j", "as_json", is_flag=True, help="Print the runs as JSON lines")
+@click.option("--replay", type=int, default=None, metavar="ID", help="Print the stored result of run ID")
+def history(capability, since, until, status, kind, limit, as_json, replay):
+    """
+    Show what 'do' and 'capability run' did, newest first.
+    
+    Runs are read from the run journal. With --replay, the result stored for
+    a run is printed again without running anything (only a preview of long
+    results is kept unless journal_results is full, and results of
+    sensitive capabilities are never kept).
+    """
+    try:
+        from ..journal import Journal, parse_time
+        
+        journal = Journal()
+        
+        if replay is not None:
+            record = journal.get(replay)
+            if record is None:
+                click.echo(f"Run {replay} not found.", err=True)
+                sys.exit(1)
+            if as_json:
+                click.echo(json.dumps(record))
+                return
+            if record["status"] == "error":
+                click.echo(f"Run {replay} failed: {record.get('error')}", err=True)
+                sys.exit(1)
+            
+            result = record.get("result")
+            stored = record.get("result_stored", "full")
+            if stored == "redacted":
+                click.echo("(The result of a sensitive capability is not stored)", err=True)
+                return
+            if stored == "none":
+                click.echo("(Results were not being stored; see the journal_results setting)", err=True)
+                return
+            if stored == "preview":
+                click.echo(f"(Only a preview of the result is stored, sha256 {record.get('result_digest')}; "
+                           "set journal_results to full to keep whole results)", err=True)
+            elif not record.get("result_exact", True):
+                click.echo("(The stored result is the repr of the original result)", err=True)
+            if result is None:
+                click.echo("(No return value)")
+            elif isinstance(result, (dict, list)):
+                click.echo(json.dumps(result, indent=2))
+            else:
+                click.echo(result)
+            return
+        
+        runs = journal.query(capability=capability,
+                             since=parse_time(since) if since else None,
+                             until=parse_time(until) if until else None,
+                             status=status, kind=kind, limit=limit)
+        
+        shown = 0
+        for record in runs:
+            shown += 1
+            if as_json:
+                click.echo(json.dumps(record))
+                continue
+            
+            at = datetime.fromtimestamp(record["at"]).strftime("%Y-%m-%d %H:%M:%S")
+            total_ms = (record.get("timings") or {}).get("total_ms", 0.0)
+            what = record.get("request") or record.get("capability") or ""
+            click.echo(f"{record['id']:>8}  {at}  {record['kind']:<3}  {record['status']:<5}  "
+                       f"{total_ms:>9.1f} ms  {what}")
+            
+            details = []
+            if record.get("action"):
+                details.append(record["action"])
+            arguments = record.get("arguments")
+            if record.get("capability") and record.get("request") and isinstance(arguments, list):
+                details.append(f"{record['capability']}({', '.join(repr(arg) for arg in arguments)})")
+            if record.get("error"):
+                details.append(f"error: {record['error']}")
+            if details:
+                click.echo(f"{'':>10}{' -> '.join(details)}")
+        
+        if not shown and not as_json:
+            click.echo("No runs recorded." if not len(journal) else "No runs match.")
+    
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    except Exception as e:
+        click.echo(f"Error reading history: {str(e)}", err=True)
+        sys.exit(1)
@@ -0,0 +1,84 @@
+"""
+The process command for Strangeloop.
+"""
+import sys
+import json
+import click
+
+
+@click.command()
+@click.argument("file_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--output", "-o", help="Output file path (results are written as JSON lines while processing)")
+@click.option("--prompt", "-p", default=None, help="Instruction applied to every chunk")
+@click.option("--reduce-prompt", default=None, help="Instruction used to merge chunk results")
+@click.option("--reduce/--no-reduce", default=True, help="Merge chunk results into a single result (default: reduce)")
+@click.option("--chunk-tokens", default=2000, help="Target chunk size in tokens")
+@click.option("--concurrency", "-c", default=4, help="Maximum number of LLM requests in flight")
+@click.option("--max-tokens", "-m", default=1024, help="Maximum tokens in each response")
+@click.option("--temperature", "-t", default=0.3, type=float, help="Temperature (0.0-1.0)")
+@click.option("--model", default=None, help="Model to use (default: the configured summarization model)")
+@click.option("--backend", default=None, help="LLM backend to use (default: the configured summarization backend)")
+def process(file_path, output, prompt, reduce_prompt, reduce, chunk_tokens, concurrency, max_tokens, temperature,
+            model, backend):
+    """
+    Process a file with strangeloop.
+    
+    FILE_PATH is streamed through Claude in token-sized chunks with bounded
+    concurrency, and the chunk results are merged into a single result. An
+    interrupted run resumes from its checkpoint without redoing finished chunks.
+    """
+    try:
+        from ..backends import create_backend
+        from ..llm import SUMMARIZATION
+        from ..pipeline import DEFAULT_MAP_PROMPT, DEFAULT_REDUCE_PROMPT, FilePipeline
+        
+        click.echo(f"Processing file: {file_path}", err=True)
+        
+        client = create_backend(backend, SUMMARIZATION, model)
+        
+        def ask(text):
+            return client.get_response_text(client.ask(text, max_tokens, temperature))
+        
+        pipeline = FilePipeline(ask, map_prompt=prompt or DEFAULT_MAP_PROMPT,
+                                reduce_prompt=reduce_prompt or DEFAULT_REDUCE_PROMPT,
+                                chunk_tokens=chunk_tokens, concurrency=concurrency,
+                                model=f"{type(client).__name__}:{client.model}")
+        
+        output_file = open(output, "w", encoding="utf-8") if output else None
+        
+        def on_chunk(record):
+            if output_file:
+                output_file.write(json.dumps({"chunk": record["index"], "start": record["start"],
+                                              "end": record["end"], "result": record["result"]}) + "\n")
+                output_file.flush()
+            elif not reduce:
+                click.echo(record["result"])
+        
+        def on_progress(stage, count):
+            click.echo(f"\r{stage}: {count} done", nl=False, err=True)
+        
+        try:
+            result = pipeline.run(file_path, reduce=reduce, on_chunk=on_chunk, on_progress=on_progress)
+            click.echo("", err=True)
+            
+            if result is not None:
+                if output_file:
+                    output_file.write(json.dumps({"result": result}) + "\n")
+                else:
+                    click.echo(result)
+        finally:
+            if output_file:
+                output_file.close()
+        
+        click.echo("Processing complete!", err=True)
+        usage = client.usage()
+        click.echo(f"LLM usage ({client.name}): {usage['requests']} requests, {usage['input_tokens']} input and "
+                   f"{usage['output_tokens']} output tokens", err=True)
+        
+        if output:
+            click.echo(f"Results written to: {output}", err=True)
+    
+    except Exception as e:
+        click.echo(f"\nError processing file: {str(e)}", err=True)
+        click.echo("Run the same command again to resume from the last checkpoint.", err=True)
+        sys.exit(1)
@@ -0,0 +1,78 @@
+"""
+Session management commands for Strangeloop.
+"""
+import sys
+import textwrap
+from datetime import datetime
+import click
+
+
+@click.group()
+def session():
+    """Manage named sessions used by 'do --session'."""
+    pass
+
+
+@session.command(name="list")
+def session_list():
+    """List all sessions."""
+    try:
+        from ..session import SessionStore
+        
+        sessions = SessionStore().list_sessions()
+        if not sessions:
+            click.echo("No sessions found.")
+            return
+        
+        click.echo(f"Found {len(sessions)} sessions:")
+        for info in sessions:
+            last_active = datetime.fromtimestamp(info["last_active"]).strftime("%Y-%m-%d %H:%M:%S")
+            click.echo(f"- {info['session']} ({info['turns']} turns, last active {last_active})")
+    except Exception as e:
+        click.echo(f"Error listing sessions: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@session.command(name="show")
+@click.argument("name", required=True)
+@click.option("--limit", "-n", default=20, help="Number of recent turns to show")
+def session_show(name, limit):
+    """Show the summary and recent turns of a session."""
+    try:
+        from ..session import SessionStore
+        
+        store = SessionStore()
+        summary, _ = store.get_summary(name)
+        turns = store.tail(name, limit)
+        if not summary and not turns:
+            click.echo(f"Session '{name}' not found.")
+            return
+        
+        click.echo(f"Session: {name}")
+        if summary:
+            click.echo("\nSummary of earlier conversation:")
+            click.echo(textwrap.fill(summary, width=80))
+        
+        if turns:
+            click.echo("\nRecent turns:")
+            for turn in turns:
+                click.echo(f"\n{turn['role'].capitalize()}: {turn['content']}")
+    except Exception as e:
+        click.echo(f"Error showing session: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@session.command(name="delete")
+@click.argument("name", required=True)
+def session_delete(name):
+    """Delete a session."""
+    try:
+        from ..session import SessionStore
+        
+        if SessionStore().delete(name):
+            click.echo(f"Session '{name}' deleted")
+        else:
+            click.echo(f"Session '{name}' not found")
+    except Exception as e:
+        click.echo(f"Error deleting session: {str(e)}", err=True)
+        sys.exit(1)
@@ -0,0 +1,89 @@
+"""
+Statistics commands for Strangeloop.
+"""
+import sys
+import json
+import click
+
+
+@click.group()
+def stats():
+    """Show runtime statistics collected by strangeloop."""
+    pass
+
+
+@stats.command(name="capabilities")
+@click.option("--json", "-j", "as_json", is_flag=True, help="Print the statistics as JSON")
+def stats_capabilities(as_json):
+    """Show recent latency and error rates of capabilities."""
+    try:
+        from ..execution import WINDOW, ExecutionStats
+        
+        summaries = ExecutionStats().summaries()
+        if as_json:
+            click.echo(json.dumps(summaries, indent=2))
+            return
+        
+        if not summaries:
+            click.echo("No capability executions recorded yet.")
+            return
+        
+        click.echo(f"{'Capability':<40} {'Calls':>7} {'p50 ms':>9} {'p95 ms':>9} {'Errors':>7}")
+        for name, summary in sorted(summaries.items(), key=lambda item: item[1]["p50_ms"]):
+            click.echo(f"{name:<40} {summary['total']:>7} {summary['p50_ms']:>9.1f} {summary['p95_ms']:>9.1f} "
+                       f"{summary['error_rate']:>7.0%}")
+        click.echo(f"\nLatency and errors cover each capability's last {WINDOW} runs.")
+    except Exception as e:
+        click.echo(f"Error reading statistics: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@stats.command(name="llm")
+@click.option("--json", "-j", "as_json", is_flag=True, help="Print the statistics as JSON")
+@click.option("--reset", is_flag=True, help="Forget the recorded requests")
+def stats_llm(as_json, reset):
+    """Show how hedging changes LLM time to first byte, and what it costs."""
+    try:
+        from ..hedging import WINDOW, HedgeMetrics
+        
+        metrics = HedgeMetrics()
+        if reset:
+            click.echo(f"Removed {metrics.reset()} recorded requests.")
+            return
+        
+        summaries = metrics.summaries()
+        if as_json:
+            click.echo(json.dumps(summaries, indent=2))
+            return
+        
+        if not summaries:
+            click.echo("No hedged-mode requests recorded yet. Enable hedging with 'config set llm_hedging true'.")
+            return
+        
+        for model, summary in sorted(summaries.items()):
+            observed = summary["first_byte_ms"]
+            unhedged = summary["unhedged_first_byte_ms"]
+            click.echo(f"{model}: {summary['requests']} requests, {summary['hedges']} hedged "
+                       f"({summary['hedge_rate']:.0%}), {summary['hedge_wins']} won by the duplicate")
+            click.echo(f"  {'Time to first byte':<22} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+            click.echo(f"  {'without hedging':<22} {unhedged['p50']:>9.0f} {unhedged['p95']:>9.0f} {unhedged['p99']:>9.0f}")
+            click.echo(f"  {'with hedging':<22} {observed['p50']:>9.0f} {observed['p95']:>9.0f} {observed['p99']:>9.0f}")
+            click.echo(f"  Added cost: {summary['hedges']} extra requests, ~{summary['extra_tokens']} input tokens")
+        click.echo(f"\nStatistics cover each model's last {WINDOW} requests in hedging mode.")
+    except Exception as e:
+        click.echo(f"Error reading statistics: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@stats.command(name="reset")
+@click.argument("name", required=False)
+def stats_reset(name):
+    """Forget recorded executions of one capability (NAME) or of all capabilities."""
+    try:
+        from ..execution import ExecutionStats
+        
+        removed = ExecutionStats().reset(name)
+        click.echo(f"Removed {removed} recorded executions.")
+    except Exception as e:
+        click.echo(f"Error resetting statistics: {str(e)}", err=True)
+        sys.exit(1)
@@ -113,6 +113,43 @@ class Config:
         return dict(self.config)
 
 
+def _get_xdg_dir(env_var: str, fallback: Path) -> Path:
+    """
+    Get a strangeloop directory under an XDG base directory, creating it if needed.
+    
+    Args:
+        env_var: The XDG environment variable to consult
+        fallback: Base directory to use when the variable is not set
+    
+    Returns:
+        Path to the strangeloop directory
+    """
+    base_dir = Path(os.environ.get(env_var) or fallback)
+    directory = base_dir / "strangeloop"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def get_cache_dir() -> Path:
+    """
+    Get the cache directory ($XDG_CACHE_HOME/strangeloop or ~/.cache/strangeloop).
+    
+    Returns:
+        Path to the cache directory
+    """
+    return _get_xdg_dir("XDG_CACHE_HOME", Path.home() / ".cache")
+
+
+def get_data_dir() -> Path:
+    """
+    Get the data directory ($XDG_DATA_HOME/strangeloop or ~/.local/share/strangeloop).
+    
+    Returns:
+        Path to the data directory
+    """
+    return _get_xdg_dir("XDG_DATA_HOME", Path.home() / ".local" / "share")
+
+
 # Singleton instance
 _config_instance = None
 
@@ -3,12 +3,16 @@ Dynamic code loading and execution module for Strangeloop.
 Provides functionality to dynamically add code to the running instance.
 """
 import importlib.util
+import re
 import sys
 import types
 import inspect
 from pathlib import Path
 from typing import Any, Dict, Optional, Callable
 
+# Suffix of the optional batch entry point of a capability, e.g. generate_password_batch(args_list)
+BATCH_SUFFIX = "_batch"
+
 
 def add_function_to_module(module_name: str, function_code: str, function_name: Optional[str] = None) -> Callable:
     """
@@ -46,7 +50,7 @@ def add_function_to_module(module_name: str, function_code: str, function_name:
     if function_name is None:
         # Look for function definitions in the namespace
         functions = [name for name, obj in namespace.items() 
-                    if inspect.isfunction(obj)]
+                    if inspect.isfunction(obj) and not name.endswith(BATCH_SUFFIX)]
         
         if not functions:
             raise ValueError("No function found in the provided code")
@@ -59,12 +63,35 @@ def add_function_to_module(module_name: str, function_code: str, function_name:
     
     function = namespace[function_name]
     
-    # Add the function to the module
+    # Add the function to the module, along with its batch entry point if the code defines one
     setattr(module, function_name, function)
+    batch_name = f"{function_name}{BATCH_SUFFIX}"
+    if inspect.isfunction(namespace.get(batch_name)):
+        setattr(module, batch_name, namespace[batch_name])
     
     return function
 
 
+def extract_function_name(function_code: str) -> str:
+    """
+    Extract the name of the first function defined in some code, skipping batch entry points.
+    
+    Args:
+        function_code: The Python code for the function
+    
+    Returns:
+        The function name
+    
+    Raises:
+        ValueError: If the code doesn't define a function
+    """
+    names = re.findall(r"def\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(", function_code)
+    if not names:
+        raise ValueError("Could not extract function name from code")
+    
+    return next((name for name in names if not name.endswith(BATCH_SUFFIX)), names[0])
+
+
 def save_function_to_file(function_code: str, directory: Optional[Path] = None) -> Path:
     """
     Save a dynamically created function to a file in the capabilities directory.
@@ -77,12 +104,7 @@ def save_function_to_file(function_code: str, directory: Optional[Path] = None)
         Path to the saved file
     """
     # Extract function name from the code
-    import re
-    match = re.search(r"def\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(", function_code)
-    if not match:
-        raise ValueError("Could not extract function name from code")
-    
-    function_name = match.group(1)
+    function_name = extract_function_name(function_code)
     
     # Determine the directory to save the file
     if directory is None:
@@ -104,4 +126,8 @@ def save_function_to_file(function_code: str, directory: Optional[Path] = None)
     with open(file_path, "w") as f:
         f.write(function_code)
     
+    # A pack built from the previous code must not shadow the new file
+    from .pack import remove_pack
+    remove_pack(directory)
+    
     return file_path
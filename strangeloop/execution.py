@@ -0,0 +1,284 @@
+"""
+Capability execution for Strangeloop.
+Runs capabilities while keeping rolling per-capability latency and error statistics,
+which the `do` planner uses to prefer fast, reliable capabilities. Identical
+concurrent calls of a capability marked idempotent share one execution.
+"""
+import collections.abc
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import get_config
+from .singleflight import SingleFlight, content_key
+from .stats import percentile
+from .storage import connect
+
+# Executions kept per capability; older ones are overwritten
+WINDOW = 100
+
+# Capability calls in flight, by capability name and arguments
+CAPABILITY_CALLS = SingleFlight()
+
+# Module-level flag marking a capability whose identical concurrent calls may share one result
+IDEMPOTENT_ATTRIBUTE = "IDEMPOTENT"
+# Module-level flag marking a capability whose results must not be recorded (e.g. secrets)
+SENSITIVE_ATTRIBUTE = "SENSITIVE"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS executions (
+    capability TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    ok INTEGER NOT NULL,
+    at REAL NOT NULL,
+    PRIMARY KEY (capability, slot)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS counters (
+    capability TEXT PRIMARY KEY,
+    total INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class ExecutionStats:
+    """
+    Rolling execution statistics per capability.
+    
+    Every capability keeps a fixed ring of its last WINDOW executions, so the
+    database stays small however often capabilities run.
+    """
+    
+    def __init__(self, connection: Optional[sqlite3.Connection] = None, window: int = WINDOW):
+        """
+        Initialize the statistics store.
+        
+        Args:
+            connection: Optional database connection (defaults to execution_stats.db in the data dir)
+            window: Number of recent executions kept per capability
+        """
+        self.connection = connection or connect("execution_stats.db")
+        self.connection.executescript(SCHEMA)
+        self.window = window
+        self._lock = threading.Lock()
+    
+    def record(self, capability: str, seconds: float, ok: bool) -> None:
+        """
+        Record one execution, overwriting the oldest one once the window is full.
+        
+        Args:
+            capability: The capability name
+            seconds: How long the call took
+            ok: Whether it returned without raising
+        """
+        with self._lock, self.connection:
+            row = self.connection.execute("SELECT total FROM counters WHERE capability = ?",
+                                          (capability,)).fetchone()
+            total = row["total"] if row else 0
+            self.connection.execute(
+                "INSERT OR REPLACE INTO executions (capability, slot, seconds, ok, at) VALUES (?, ?, ?, ?, ?)",
+                (capability, total % self.window, seconds, int(ok), time.time()))
+            self.connection.execute("INSERT OR REPLACE INTO counters (capability, total) VALUES (?, ?)",
+                                    (capability, total + 1))
+    
+    def summaries(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarize the recent executions of every capability.
+        
+        Returns:
+            Mapping of capability name to its total call count and, over the
+            window, the number of runs, error rate and p50/p95 latency in ms
+        """
+        with self._lock:
+            rows = self.connection.execute("SELECT capability, seconds, ok FROM executions").fetchall()
+            totals = {row["capability"]: row["total"]
+                      for row in self.connection.execute("SELECT capability, total FROM counters")}
+        
+        samples: Dict[str, List[float]] = {}
+        failures: Dict[str, int] = {}
+        for row in rows:
+            samples.setdefault(row["capability"], []).append(row["seconds"])
+            failures[row["capability"]] = failures.get(row["capability"], 0) + (not row["ok"])
+        
+        return {
+            capability: {
+                "total": totals.get(capability, len(seconds)),
+                "runs": len(seconds),
+                "error_rate": failures[capability] / len(seconds),
+                "p50_ms": percentile(seconds, 50) * 1000.0,
+                "p95_ms": percentile(seconds, 95) * 1000.0,
+            }
+            for capability, seconds in samples.items()
+        }
+    
+    def reset(self, capability: Optional[str] = None) -> int:
+        """
+        Forget recorded executions.
+        
+        Args:
+            capability: Only forget this capability's executions (None for all)
+        
+        Returns:
+            The number of executions removed
+        """
+        with self._lock, self.connection:
+            if capability is None:
+                self.connection.execute("DELETE FROM counters")
+                return self.connection.execute("DELETE FROM executions").rowcount
+            self.connection.execute("DELETE FROM counters WHERE capability = ?", (capability,))
+            return self.connection.execute("DELETE FROM executions WHERE capability = ?", (capability,)).rowcount
+
+
+_stats: Optional[ExecutionStats] = None
+_stats_lock = threading.Lock()
+
+
+def get_execution_stats() -> Optional[ExecutionStats]:
+    """
+    Get the process-wide execution statistics store.
+    
+    Returns:
+        The store, or None if the execution_stats configuration value is false
+    """
+    global _stats
+    if not get_config().get("execution_stats", True):
+        return None
+    with _stats_lock:
+        if _stats is None:
+            _stats = ExecutionStats()
+        return _stats
+
+
+def recent_execution_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get recent execution statistics for the planner, without ever failing.
+    
+    Returns:
+        Summaries by capability name (empty if disabled or unavailable)
+    """
+    try:
+        stats = get_execution_stats()
+        return stats.summaries() if stats else {}
+    except sqlite3.Error:
+        return {}
+
+
+def is_idempotent(func: Callable) -> bool:
+    """
+    Check whether a capability declares that identical calls may share one result.
+    
+    A capability module opts in with a module-level IDEMPOTENT = True.
+    Capabilities returning secrets or random values must not, or concurrent
+    callers would all receive the same value.
+    
+    Args:
+        func: The capability function
+    
+    Returns:
+        True if the capability's module sets IDEMPOTENT to True
+    """
+    return _module_flag(func, IDEMPOTENT_ATTRIBUTE)
+
+
+def is_sensitive(func: Optional[Callable]) -> bool:
+    """
+    Check whether a capability declares that its results are secret.
+    
+    A capability module opts in with a module-level SENSITIVE = True, and
+    the run journal then records that it ran without storing its results.
+    
+    Args:
+        func: The capability function (None if unknown)
+    
+    Returns:
+        True if the capability's module sets SENSITIVE to True
+    """
+    return func is not None and _module_flag(func, SENSITIVE_ATTRIBUTE)
+
+
+def _module_flag(func: Callable, attribute: str) -> bool:
+    module = sys.modules.get(getattr(func, "__module__", None) or "")
+    return getattr(module, attribute, False) is True
+
+
+def execute_capability(name: str, func: Callable, args: Any = (), kwargs: Optional[Dict[str, Any]] = None,
+                       stats: Optional[ExecutionStats] = None, coalesce: Optional[bool] = None) -> Any:
+    """
+    Call a capability and record how long it took and whether it failed.
+    
+    Failing to record statistics never affects the call itself. When the
+    capability returns an iterator, it is wrapped so that the time until the
+    iteration finishes, and any error raised while iterating, are recorded
+    once the iterator is exhausted, fails or is closed.
+    
+    For capabilities marked idempotent (see is_idempotent), a call made while
+    an identical one (same capability and arguments) is in flight waits for
+    it and returns the same result, unless the result is an iterator, which
+    can only be consumed once.
+    
+    Args:
+        name: The capability name
+        func: The capability function
+        args: Positional arguments
+        kwargs: Keyword arguments
+        stats: Statistics store (defaults to the process-wide one)
+        coalesce: Whether to share identical concurrent calls (None to share
+            them if the capability is idempotent and the "single_flight"
+            configuration value isn't false)
+    
+    Returns:
+        The capability's return value
+    
+    Raises:
+        Exception: Whatever the capability raises
+    """
+    if coalesce is None:
+        coalesce = is_idempotent(func) and bool(get_config().get("single_flight", True))
+    if not coalesce:
+        return _execute(name, func, args, kwargs, stats)
+    
+    key = content_key(name, list(args), kwargs or {})
+    result, shared = CAPABILITY_CALLS.do(key, lambda: _execute(name, func, args, kwargs, stats))
+    if shared and isinstance(result, collections.abc.Iterator):
+        return _execute(name, func, args, kwargs, stats)
+    return result
+
+
+def _record(name: str, elapsed: float, ok: bool, stats: Optional[ExecutionStats]) -> None:
+    try:
+        stats = stats or get_execution_stats()
+        if stats:
+            stats.record(name, elapsed, ok)
+    except sqlite3.Error:
+        pass
+
+
+def _recorded_iterator(name: str, iterator: collections.abc.Iterator, start: float,
+                       stats: Optional[ExecutionStats]) -> collections.abc.Generator:
+    """Pass an iterator's items through, recording the execution once iteration ends."""
+    ok = False
+    try:
+        yield from iterator
+        ok = True
+    except GeneratorExit:
+        # Closed early by the consumer, which isn't a failure of the capability
+        ok = True
+        raise
+    finally:
+        _record(name, time.perf_counter() - start, ok, stats)
+
+
+def _execute(name: str, func: Callable, args: Any, kwargs: Optional[Dict[str, Any]],
+             stats: Optional[ExecutionStats]) -> Any:
+    start = time.perf_counter()
+    try:
+        result = func(*args, **(kwargs or {}))
+    except BaseException:
+        _record(name, time.perf_counter() - start, False, stats)
+        raise
+    if isinstance(result, collections.abc.Iterator):
+        return _recorded_iterator(name, result, start, stats)
+    _record(name, time.perf_counter() - start, True, stats)
+    return result
@@ -0,0 +1,192 @@
+"""
+Capability health checks for Strangeloop.
+Runs capabilities with declared or synthesized arguments on a bounded worker
+pool with timeouts, and reports success rates and latency against SLOs.
+"""
+import inspect
+import queue
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .stats import percentile, summarize
+from .validation import synthesize_arguments
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_ITERATIONS = 3
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_SLO_P95_MS = 1000.0
+DEFAULT_SLO_SUCCESS_RATE = 0.99
+
+# Module-level name a capability module can use to declare its check arguments
+SAMPLES_ATTRIBUTE = "SAMPLES"
+
+Call = Tuple[str, Callable, List[Any], Dict[str, Any]]
+
+
+def sample_arguments(func: Callable) -> List[Tuple[List[Any], Dict[str, Any]]]:
+    """
+    Get the argument sets to check a capability with.
+    
+    A capability module can declare them as a module-level SAMPLES list, each
+    entry being a list of positional arguments or a dict of keyword
+    arguments. Otherwise one argument set is synthesized from the signature.
+    
+    Args:
+        func: The capability function
+    
+    Returns:
+        List of (args, kwargs) tuples
+    """
+    module = sys.modules.get(func.__module__) or inspect.getmodule(func)
+    declared = getattr(module, SAMPLES_ATTRIBUTE, None)
+    if declared:
+        return [([], dict(sample)) if isinstance(sample, dict) else (list(sample), {}) for sample in declared]
+    return [synthesize_arguments(func)]
+
+
+class _WorkerPool:
+    """
+    Bounded pool of daemon worker threads for calls that may hang.
+    
+    A call that exceeds its timeout is abandoned and its worker replaced, so
+    a hung capability neither blocks the other checks nor process exit.
+    """
+    
+    def __init__(self, concurrency: int, timeout: float):
+        self.timeout = timeout
+        self.tasks: "queue.Queue[Optional[Tuple[int, Call]]]" = queue.Queue()
+        self.results: "queue.Queue[Tuple[int, Dict[str, Any]]]" = queue.Queue()
+        self.started: Dict[int, float] = {}
+        self.lock = threading.Lock()
+        self.workers = 0
+        for _ in range(max(concurrency, 1)):
+            self._spawn()
+    
+    def _spawn(self) -> None:
+        self.workers += 1
+        threading.Thread(target=self._work, daemon=True).start()
+    
+    def _work(self) -> None:
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            task_id, (_, func, args, kwargs) = task
+            start = time.perf_counter()
+            with self.lock:
+                self.started[task_id] = start
+            try:
+                func(*args, **kwargs)
+                outcome = {"ok": True}
+            except Exception as e:
+                outcome = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            outcome["seconds"] = time.perf_counter() - start
+            self.results.put((task_id, outcome))
+    
+    def run(self, calls: Sequence[Call]) -> Iterable[Tuple[Call, Dict[str, Any]]]:
+        """Run calls, yielding each with its outcome as it finishes or times out."""
+        for task_id, call in enumerate(calls):
+            self.tasks.put((task_id, call))
+        
+        remaining = set(range(len(calls)))
+        while remaining:
+            try:
+                task_id, outcome = self.results.get(timeout=0.05)
+                if task_id in remaining:
+                    remaining.discard(task_id)
+                    yield calls[task_id], outcome
+            except queue.Empty:
+                pass
+            
+            now = time.perf_counter()
+            with self.lock:
+                expired = [task_id for task_id in remaining
+                           if task_id in self.started and now - self.started[task_id] > self.timeout]
+            for task_id in expired:
+                remaining.discard(task_id)
+                self._spawn()
+                yield calls[task_id], {"ok": False, "timeout": True, "seconds": self.timeout,
+                                       "error": f"Timed out after {self.timeout:g}s"}
+        
+        # Stop the workers; abandoned ones exit with the process
+        for _ in range(self.workers):
+            self.tasks.put(None)
+
+
+def check_capabilities(capabilities: Dict[str, Callable], iterations: int = DEFAULT_ITERATIONS,
+                       concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT,
+                       slos: Optional[Dict[str, Dict[str, float]]] = None,
+                       default_slo: Optional[Dict[str, float]] = None,
+                       on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Check capabilities by calling them with their sample arguments.
+    
+    Args:
+        capabilities: Mapping of capability name to function
+        iterations: Calls per argument set
+        concurrency: Maximum number of calls in flight
+        timeout: Seconds before a call counts as timed out
+        slos: Per-capability SLOs, each with optional p95_ms and success_rate
+        default_slo: SLO for capabilities without their own (p95_ms and success_rate)
+        on_result: Callback invoked with the capability name and outcome of every call
+    
+    Returns:
+        Report with a result per capability (calls, failures, timeouts, success
+        rate, latency in ms, errors, SLO and breaches) and a list of breaching capabilities
+    """
+    slos = slos or {}
+    default_slo = {"p95_ms": DEFAULT_SLO_P95_MS, "success_rate": DEFAULT_SLO_SUCCESS_RATE, **(default_slo or {})}
+    
+    calls: List[Call] = []
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, func in sorted(capabilities.items()):
+        results[name] = {"calls": 0, "failures": 0, "timeouts": 0, "errors": [], "samples": []}
+        try:
+            argument_sets = sample_arguments(func)
+        except Exception as e:
+            results[name]["errors"].append(f"Could not build arguments: {e}")
+            continue
+        for args, kwargs in argument_sets:
+            calls.extend((name, func, args, kwargs) for _ in range(iterations))
+    
+    start = time.perf_counter()
+    for call, outcome in _WorkerPool(concurrency, timeout).run(calls):
+        name = call[0]
+        result = results[name]
+        result["calls"] += 1
+        if outcome["ok"]:
+            result["samples"].append(outcome["seconds"])
+        else:
+            result["failures"] += 1
+            result["timeouts"] += bool(outcome.get("timeout"))
+            if outcome["error"] not in result["errors"]:
+                result["errors"].append(outcome["error"])
+        if on_result:
+            on_result(name, outcome)
+    
+    breaching = []
+    for name, result in results.items():
+        samples = result.pop("samples")
+        result["success_rate"] = (result["calls"] - result["failures"]) / result["calls"] if result["calls"] else 0.0
+        result["latency_ms"] = {**summarize(samples), "p99": percentile(samples, 99) * 1000.0} if samples else {}
+        
+        slo = {**default_slo, **slos.get(name, {})}
+        result["slo"] = slo
+        result["breaches"] = []
+        if result["success_rate"] < slo["success_rate"]:
+            result["breaches"].append(f"success rate {result['success_rate']:.0%} is below {slo['success_rate']:.0%}")
+        if samples and result["latency_ms"]["p95"] > slo["p95_ms"]:
+            result["breaches"].append(f"p95 latency {result['latency_ms']['p95']:.0f} ms exceeds {slo['p95_ms']:.0f} ms")
+        if result["breaches"]:
+            breaching.append(name)
+    
+    return {
+        "timestamp": time.time(),
+        "seconds": time.perf_counter() - start,
+        "iterations": iterations,
+        "timeout": timeout,
+        "capabilities": results,
+        "breaching": breaching,
+    }
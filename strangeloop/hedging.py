@@ -0,0 +1,256 @@
+"""
+Hedged LLM requests for Strangeloop.
+Decides when a slow request gets a duplicate and records time-to-first-byte
+metrics, so hedging's effect on tail latency and its extra cost can be measured.
+"""
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .stats import percentile
+from .storage import connect
+
+DEFAULT_PERCENTILE = 95.0
+DEFAULT_MAX_RATE = 0.1
+DEFAULT_INITIAL_DELAY_MS = 1000.0
+DEFAULT_MIN_DELAY_MS = 50.0
+
+# Samples needed before the threshold adapts, and requests kept per model
+MIN_SAMPLES = 20
+WINDOW = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model TEXT NOT NULL,
+    at REAL NOT NULL,
+    first_byte REAL NOT NULL,
+    unhedged_first_byte REAL,
+    hedged INTEGER NOT NULL,
+    hedge_won INTEGER NOT NULL,
+    extra_tokens INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS requests_model ON requests (model, id);
+"""
+
+
+class HedgeMetrics:
+    """
+    Recent hedged-mode requests, shared by all strangeloop processes.
+    
+    Each request records the time to its first byte as the caller saw it and,
+    when known, the time the first (unhedged) attempt alone would have taken.
+    """
+    
+    def __init__(self, connection: Optional[sqlite3.Connection] = None, window: int = WINDOW):
+        """
+        Initialize the metrics store.
+        
+        Args:
+            connection: Optional database connection (defaults to llm_metrics.db in the data dir)
+            window: Number of recent requests kept per model
+        """
+        self.connection = connection or connect("llm_metrics.db")
+        self.connection.executescript(SCHEMA)
+        self.window = window
+        self._lock = threading.Lock()
+    
+    def record(self, model: str, first_byte: float, unhedged_first_byte: Optional[float], hedged: bool,
+               hedge_won: bool, extra_tokens: int) -> int:
+        """
+        Record one request, dropping the model's requests that fell out of the window.
+        
+        Args:
+            model: The model the request was sent to
+            first_byte: Seconds until the caller got its first byte
+            unhedged_first_byte: Seconds the first attempt took to its first byte (None if not known yet)
+            hedged: Whether a duplicate request was sent
+            hedge_won: Whether the duplicate answered first
+            extra_tokens: Estimated input tokens billed for the duplicate
+        
+        Returns:
+            The id of the recorded request
+        """
+        with self._lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO requests (model, at, first_byte, unhedged_first_byte, hedged, hedge_won, extra_tokens) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (model, time.time(), first_byte, unhedged_first_byte, int(hedged), int(hedge_won), extra_tokens))
+            # Ids are shared by all models, so the window is counted in the model's own rows
+            self.connection.execute(
+                "DELETE FROM requests WHERE model = ? AND id NOT IN "
+                "(SELECT id FROM requests WHERE model = ? ORDER BY id DESC LIMIT ?)", (model, model, self.window))
+            return cursor.lastrowid
+    
+    def set_unhedged_first_byte(self, request_id: int, seconds: float) -> None:
+        """
+        Record when the first attempt of a request the duplicate won finally answered.
+        
+        Args:
+            request_id: The id returned by record
+            seconds: Seconds from the start of the request to the first attempt's first byte
+        """
+        with self._lock, self.connection:
+            self.connection.execute("UPDATE requests SET unhedged_first_byte = ? WHERE id = ?",
+                                    (seconds, request_id))
+    
+    def unhedged_samples(self, model: str) -> List[float]:
+        """
+        Get the recent first-attempt times to first byte of a model.
+        
+        Requests the duplicate won before the first attempt answered are
+        counted with the time the caller waited, a lower bound.
+        
+        Args:
+            model: The model name
+        
+        Returns:
+            Times in seconds, oldest first
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT COALESCE(unhedged_first_byte, first_byte) AS seconds FROM requests "
+                "WHERE model = ? ORDER BY id", (model,)).fetchall()
+        return [row["seconds"] for row in rows]
+    
+    def hedge_rate(self) -> float:
+        """Get the fraction of the most recent requests that sent a duplicate."""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT COUNT(*) AS requests, COALESCE(SUM(hedged), 0) AS hedged FROM "
+                "(SELECT hedged FROM requests ORDER BY id DESC LIMIT ?)", (self.window,)).fetchone()
+        return row["hedged"] / row["requests"] if row["requests"] else 0.0
+    
+    def summaries(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarize recent requests by model.
+        
+        Returns:
+            Mapping of model name to its request, hedge and hedge win counts, the
+            hedge rate, extra input tokens, and p50/p95/p99 time to first byte in
+            ms both as observed and as the first attempts alone would have had it
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT model, first_byte, COALESCE(unhedged_first_byte, first_byte) AS unhedged, hedged, "
+                "hedge_won, extra_tokens FROM requests").fetchall()
+        
+        by_model: Dict[str, List[sqlite3.Row]] = {}
+        for row in rows:
+            by_model.setdefault(row["model"], []).append(row)
+        
+        summaries = {}
+        for model, model_rows in by_model.items():
+            observed = [row["first_byte"] for row in model_rows]
+            unhedged = [row["unhedged"] for row in model_rows]
+            hedges = sum(row["hedged"] for row in model_rows)
+            summaries[model] = {
+                "requests": len(model_rows),
+                "hedges": hedges,
+                "hedge_wins": sum(row["hedge_won"] for row in model_rows),
+                "hedge_rate": hedges / len(model_rows),
+                "extra_tokens": sum(row["extra_tokens"] for row in model_rows),
+                "first_byte_ms": {f"p{q}": percentile(observed, q) * 1000.0 for q in (50, 95, 99)},
+                "unhedged_first_byte_ms": {f"p{q}": percentile(unhedged, q) * 1000.0 for q in (50, 95, 99)},
+            }
+        return summaries
+    
+    def reset(self) -> int:
+        """
+        Forget all recorded requests.
+        
+        Returns:
+            The number of requests removed
+        """
+        with self._lock, self.connection:
+            return self.connection.execute("DELETE FROM requests").rowcount
+
+
+class Hedger:
+    """
+    Hedging policy: how long to wait before duplicating a request, and whether it may be.
+    
+    The delay adapts to the observed time to first byte of the model (its p95
+    by default), and duplicates are capped to a fraction of recent requests so
+    a slow API doesn't double the traffic.
+    """
+    
+    def __init__(self, metrics: Optional[HedgeMetrics] = None, quantile: float = DEFAULT_PERCENTILE,
+                 max_rate: float = DEFAULT_MAX_RATE, initial_delay_ms: float = DEFAULT_INITIAL_DELAY_MS,
+                 min_delay_ms: float = DEFAULT_MIN_DELAY_MS, min_samples: int = MIN_SAMPLES):
+        """
+        Initialize the policy.
+        
+        Args:
+            metrics: Metrics store (defaults to the shared one in the data dir)
+            quantile: Percentile of the time to first byte after which a request is duplicated
+            max_rate: Maximum fraction of recent requests that may be duplicated
+            initial_delay_ms: Delay used until enough requests have been observed
+            min_delay_ms: Lower bound of the delay
+            min_samples: Requests to observe before the delay adapts
+        """
+        self.metrics = metrics or HedgeMetrics()
+        self.quantile = quantile
+        self.max_rate = max_rate
+        self.initial_delay = initial_delay_ms / 1000.0
+        self.min_delay = min_delay_ms / 1000.0
+        self.min_samples = min_samples
+    
+    @classmethod
+    def from_config(cls, config: Any) -> "Hedger":
+        """
+        Create a policy from the llm_hedge_* configuration values.
+        
+        Args:
+            config: The Config instance
+        
+        Returns:
+            The Hedger
+        """
+        return cls(quantile=float(config.get("llm_hedge_percentile", DEFAULT_PERCENTILE)),
+                   max_rate=float(config.get("llm_hedge_max_rate", DEFAULT_MAX_RATE)),
+                   initial_delay_ms=float(config.get("llm_hedge_initial_delay_ms", DEFAULT_INITIAL_DELAY_MS)),
+                   min_delay_ms=float(config.get("llm_hedge_min_delay_ms", DEFAULT_MIN_DELAY_MS)))
+    
+    def delay(self, model: str) -> float:
+        """
+        Get how long to wait for a first byte before duplicating a request.
+        
+        Args:
+            model: The model the request is sent to
+        
+        Returns:
+            The delay in seconds
+        """
+        try:
+            samples = self.metrics.unhedged_samples(model)
+        except sqlite3.Error:
+            samples = []
+        if len(samples) < self.min_samples:
+            return max(self.initial_delay, self.min_delay)
+        return max(percentile(samples, self.quantile), self.min_delay)
+    
+    def allow(self) -> bool:
+        """Whether another duplicate request stays within the maximum hedge rate."""
+        try:
+            return self.metrics.hedge_rate() < self.max_rate
+        except sqlite3.Error:
+            return False
+    
+    def record(self, model: str, first_byte: float, unhedged_first_byte: Optional[float], hedged: bool,
+               hedge_won: bool, extra_tokens: int) -> Optional[int]:
+        """Record a request (see HedgeMetrics.record), returning its id or None if it couldn't be stored."""
+        try:
+            return self.metrics.record(model, first_byte, unhedged_first_byte, hedged, hedge_won, extra_tokens)
+        except sqlite3.Error:
+            return None
+    
+    def record_unhedged(self, request_id: Optional[int], seconds: float) -> None:
+        """Record the late first byte of a first attempt (see HedgeMetrics.set_unhedged_first_byte)."""
+        if request_id is None:
+            return
+        try:
+            self.metrics.set_unhedged_first_byte(request_id, seconds)
+        except sqlite3.Error:
+            pass
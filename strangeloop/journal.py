@@ -0,0 +1,385 @@
+"""
+Run journal for Strangeloop.
+Records what `do` and `capability run` did in an append-only log of JSON
+records, with a fixed-width index that is memory-mapped for queries.
+
+Every run appends one JSON line to runs.log and one index entry to runs.idx:
+    
+    offset (8 bytes) | length (4) | timestamp (8) | duration ms (4) | kind (1) | status (1) | capability hash (8) | padding
+
+Entry N of the index describes run N, so runs are looked up by id in constant
+time, time ranges are found by binary search (index timestamps never go
+backwards, so a run that overlapped a later-started one is indexed at that
+run's start), and filters on kind, status and capability scan the index
+without reading the log.
+
+Results can hold secrets, so by default only a short preview and a digest of
+each result are stored, and results of capabilities marked SENSITIVE are
+redacted entirely.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .config import get_data_dir
+from .filelock import file_lock
+
+ENTRY = struct.Struct("<QIdfBBQ6x")
+# Byte offset of the capability hash within an entry
+CAPABILITY_OFFSET = struct.calcsize("<QIdfBB")
+
+KINDS = ("do", "run")
+STATUSES = ("ok", "error")
+
+# Index entries unpacked at a time while scanning
+SCAN_CHUNK = 4096
+
+# Seconds in each unit of a relative time such as 2h
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+# Results longer than this are stored truncated, to keep the log compact
+MAX_RESULT_CHARS = 65536
+
+# How results are stored: a preview of at most PREVIEW_CHARS characters with a
+# digest of the whole result, the whole result, or nothing
+RESULT_MODES = ("preview", "full", "none")
+PREVIEW_CHARS = 200
+REDACTED = "<redacted>"
+
+
+def capability_hash(name: Optional[str]) -> int:
+    """Hash a capability name into the 64-bit value stored in the index (0 for no capability)."""
+    if not name:
+        return 0
+    return int.from_bytes(hashlib.sha256(name.encode("utf-8")).digest()[:8], "little") or 1
+
+
+def _stored(value: Any) -> Tuple[Any, bool]:
+    """
+    Convert a value to the form stored in the journal.
+    
+    Returns:
+        Tuple of the value itself if it is JSON-serializable and short enough,
+        else its (possibly truncated) repr, and whether it is stored exactly
+    """
+    try:
+        if len(json.dumps(value)) <= MAX_RESULT_CHARS:
+            return value, True
+    except (TypeError, ValueError):
+        pass
+    return repr(value)[:MAX_RESULT_CHARS], False
+
+
+def _digest(value: Any) -> str:
+    """Hash a value's JSON (or repr) form, so runs can be compared without storing the value."""
+    encoded = json.dumps(value, sort_keys=True, default=repr)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _stored_result(value: Any, mode: str, sensitive: bool) -> Dict[str, Any]:
+    """
+    Convert a result to the fields stored in the journal.
+    
+    Returns:
+        Dictionary with the stored result, whether it is exact, how it was
+        stored ("full", "preview", "redacted" or "none") and, for previews,
+        the digest of the whole result
+    """
+    if value is None:
+        return {"result": None, "result_exact": True, "result_stored": "full"}
+    if sensitive:
+        return {"result": REDACTED, "result_exact": False, "result_stored": "redacted"}
+    if mode == "none":
+        return {"result": None, "result_exact": False, "result_stored": "none"}
+    
+    stored, exact = _stored(value)
+    if mode == "full":
+        return {"result": stored, "result_exact": exact, "result_stored": "full"}
+    if exact and len(json.dumps(stored)) <= PREVIEW_CHARS:
+        return {"result": stored, "result_exact": True, "result_stored": "full"}
+    return {"result": (stored if isinstance(stored, str) else json.dumps(stored))[:PREVIEW_CHARS],
+            "result_exact": False, "result_stored": "preview", "result_digest": _digest(value)}
+
+
+class Journal:
+    """Append-only journal of runs, safe to share between threads and processes."""
+    
+    def __init__(self, directory: Optional[Path] = None, results: str = "preview"):
+        """
+        Open (or create) a journal.
+        
+        Args:
+            directory: Directory holding the journal files (defaults to "journal" in the data dir)
+            results: How results are stored: "preview" (the first PREVIEW_CHARS
+                characters and a digest), "full" or "none"
+        
+        Raises:
+            ValueError: If results isn't one of RESULT_MODES
+        """
+        if results not in RESULT_MODES:
+            raise ValueError(f"Invalid journal result mode '{results}': use one of {', '.join(RESULT_MODES)}")
+        self.results = results
+        self.directory = Path(directory or get_data_dir() / "journal")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.log_path = self.directory / "runs.log"
+        self.index_path = self.directory / "runs.idx"
+        self.lock_path = self.directory / "runs.lock"
+        self._lock = threading.Lock()
+    
+    def append(self, kind: str, status: str, request: Optional[str] = None, action: Optional[str] = None,
+               capability: Optional[str] = None, arguments: Any = None, result: Any = None,
+               error: Optional[str] = None, timings: Optional[Dict[str, float]] = None,
+               timestamp: Optional[float] = None, sensitive: bool = False) -> int:
+        """
+        Record a run.
+        
+        Args:
+            kind: "do" or "run" (capability run)
+            status: "ok" or "error"
+            request: The request text, for "do" runs
+            action: The action chosen by the planner
+            capability: The capability that was run or suggested
+            arguments: Its arguments
+            result: Its result (stored as the journal's result mode says, as its repr
+                if it isn't JSON-serializable)
+            error: The error message, if the run failed
+            timings: Durations in ms by step; "total_ms" is also stored in the index
+            timestamp: When the run started (defaults to now)
+            sensitive: Whether the result must not be stored (see execution.is_sensitive)
+        
+        Returns:
+            The id of the run
+        """
+        timings = timings or {}
+        timestamp = time.time() if timestamp is None else timestamp
+        arguments, _ = _stored(arguments)
+        record = {
+            "at": timestamp,
+            "kind": kind,
+            "status": status,
+            "request": request,
+            "action": action,
+            "capability": capability,
+            "arguments": arguments,
+            **_stored_result(result, self.results, sensitive),
+            "error": error,
+            "timings": timings,
+        }
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        
+        with self._lock, file_lock(self.lock_path):
+            with open(self.log_path, "ab") as log, open(self.index_path, "a+b") as index:
+                # Drop a torn index entry left by a crashed writer
+                entries, torn = divmod(index.seek(0, os.SEEK_END), ENTRY.size)
+                if torn:
+                    index.truncate(entries * ENTRY.size)
+                
+                # Keep the index sorted by time for binary search, even when
+                # concurrent runs finish out of order
+                indexed_at = timestamp
+                if entries:
+                    index.seek((entries - 1) * ENTRY.size)
+                    indexed_at = max(timestamp, ENTRY.unpack(index.read(ENTRY.size))[2])
+                
+                offset = log.seek(0, os.SEEK_END)
+                log.write(line)
+                log.flush()
+                index.write(ENTRY.pack(offset, len(line), indexed_at, float(timings.get("total_ms", 0.0)),
+                                       KINDS.index(kind), STATUSES.index(status), capability_hash(capability)))
+        return entries
+    
+    def __len__(self) -> int:
+        try:
+            return self.index_path.stat().st_size // ENTRY.size
+        except FileNotFoundError:
+            return 0
+    
+    def _read(self, index: mmap.mmap, log, run_id: int) -> Dict[str, Any]:
+        offset, length = ENTRY.unpack_from(index, run_id * ENTRY.size)[:2]
+        log.seek(offset)
+        record = json.loads(log.read(length))
+        record["id"] = run_id
+        return record
+    
+    def get(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a run by id.
+        
+        Args:
+            run_id: The run id
+        
+        Returns:
+            The run record with its id, or None if there is no such run
+        """
+        if run_id < 0 or run_id >= len(self):
+            return None
+        with open(self.index_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as index:
+            with open(self.log_path, "rb") as log:
+                return self._read(index, log, run_id)
+    
+    def _bisect(self, index: mmap.mmap, count: int, timestamp: float) -> int:
+        """Find the first entry at or after a timestamp."""
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if ENTRY.unpack_from(index, middle * ENTRY.size)[2] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    def query(self, capability: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+              status: Optional[str] = None, kind: Optional[str] = None,
+              limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Find runs, newest first.
+        
+        Only the index is scanned; the log is read for matching runs alone.
+        
+        Args:
+            capability: Only runs of this capability
+            since: Only runs at or after this Unix time
+            until: Only runs before this Unix time
+            status: Only runs with this status ("ok" or "error")
+            kind: Only runs of this kind ("do" or "run")
+            limit: Maximum number of runs
+        
+        Yields:
+            Run records with their ids
+        """
+        count = len(self)
+        if not count or limit == 0:
+            return
+        
+        wanted_capability = capability_hash(capability) if capability else None
+        wanted_status = STATUSES.index(status) if status else None
+        wanted_kind = KINDS.index(kind) if kind else None
+        
+        with open(self.index_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as index:
+            with open(self.log_path, "rb") as log:
+                count = min(count, len(index) // ENTRY.size)
+                start = self._bisect(index, count, since) if since is not None else 0
+                end = self._bisect(index, count, until) if until is not None else count
+                
+                found = 0
+                for position, entry_kind, entry_status in self._scan(index, start, end, wanted_capability):
+                    if wanted_status is not None and entry_status != wanted_status:
+                        continue
+                    if wanted_kind is not None and entry_kind != wanted_kind:
+                        continue
+                    
+                    record = self._read(index, log, position)
+                    # Guard against the rare hash collision
+                    if capability and record.get("capability") != capability:
+                        continue
+                    yield record
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+    
+    def _scan(self, index: mmap.mmap, start: int, end: int,
+              capability: Optional[int]) -> Iterator[Tuple[int, int, int]]:
+        """
+        Walk index entries from end down to start.
+        
+        With a capability hash, the index is searched for its bytes instead of
+        unpacking every entry, so runs of a rarely used capability are found fast.
+        
+        Yields:
+            Tuples of the entry position, kind and status
+        """
+        if capability is not None:
+            needle = capability.to_bytes(8, "little")
+            low, high = start * ENTRY.size, end * ENTRY.size
+            while high > low:
+                found = index.rfind(needle, low, high)
+                if found < 0:
+                    return
+                position, field = divmod(found, ENTRY.size)
+                if field == CAPABILITY_OFFSET:
+                    entry_kind, entry_status = ENTRY.unpack_from(index, position * ENTRY.size)[4:6]
+                    yield position, entry_kind, entry_status
+                    high = position * ENTRY.size
+                else:
+                    high = found + len(needle) - 1
+            return
+        
+        while end > start:
+            chunk_start = max(start, end - SCAN_CHUNK)
+            entries = list(ENTRY.iter_unpack(index[chunk_start * ENTRY.size:end * ENTRY.size]))
+            for position in range(len(entries) - 1, -1, -1):
+                yield chunk_start + position, entries[position][4], entries[position][5]
+            end = chunk_start
+
+
+def parse_time(value: str, now: Optional[float] = None) -> float:
+    """
+    Parse a point in time given on the command line.
+    
+    Args:
+        value: A duration ago such as 90s, 30m, 2h or 7d, or an ISO 8601 date or
+            date and time (local time unless it has an offset)
+        now: The current Unix time (defaults to now)
+    
+    Returns:
+        The Unix time
+    
+    Raises:
+        ValueError: If the value isn't a duration or an ISO 8601 date
+    """
+    value = value.strip()
+    unit = DURATION_UNITS.get(value[-1:].lower())
+    if unit and value[:-1].replace(".", "", 1).isdigit():
+        return (time.time() if now is None else now) - float(value[:-1]) * unit
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid time '{value}': use a duration such as 30m, 2h or 7d, or an ISO 8601 date")
+
+
+_journal: Optional[Journal] = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> Optional[Journal]:
+    """
+    Get the process-wide journal.
+    
+    Returns:
+        The journal, or None if the journal configuration value is false
+    """
+    global _journal
+    from .config import get_config
+    
+    if not get_config().get("journal", True):
+        return None
+    with _journal_lock:
+        if _journal is None:
+            _journal = Journal(results=str(get_config().get("journal_results", "preview")))
+        return _journal
+
+
+def record_run(kind: str, status: str, **fields: Any) -> Optional[int]:
+    """
+    Record a run in the process-wide journal, without ever failing.
+    
+    Args:
+        kind: "do" or "run"
+        status: "ok" or "error"
+        **fields: Other fields accepted by Journal.append
+    
+    Returns:
+        The id of the run, or None if the journal is disabled or couldn't be written
+    """
+    try:
+        journal = get_journal()
+        return journal.append(kind, status, **fields) if journal is not None else None
+    except OSError:
+        return None
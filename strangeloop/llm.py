@@ -1,46 +1,163 @@
 """
 LLM integration module for Strangeloop.
-Provides functionality to interact with Claude Sonnet 3.7.
+Provides functionality to interact with Claude, routing each call site to a configurable model.
 """
 import os
+import queue
+import threading
+import time
 import requests
 import json
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Iterator, List, Optional
 from .config import get_config
+from .singleflight import SingleFlight, content_key
+
+DEFAULT_BASE_URL = "https://api.anthropic.com"
+
+# Rough characters-per-token ratio used for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Retries of rate-limited (429) requests when client-side rate limiting is enabled
+MAX_RATE_LIMIT_RETRIES = 3
+
+DEFAULT_MODEL = "claude-3-7-sonnet-20250219"
+FAST_MODEL = "claude-3-5-haiku-20241022"
+
+# Call sites that can be routed to different models
+PLANNING = "planning"
+GENERATION = "generation"
+ANSWER = "answer"
+SUMMARIZATION = "summarization"
+PURPOSES = (PLANNING, GENERATION, ANSWER, SUMMARIZATION)
+
+# Short structured outputs don't need the largest model
+DEFAULT_ROUTES = {
+    PLANNING: FAST_MODEL,
+    SUMMARIZATION: FAST_MODEL,
+}
+
+# Connections kept open to the API, enough for concurrent callers sharing one client
+CONNECTION_POOL_SIZE = 32
+
+# Status codes meaning the model is overloaded rather than the request being wrong
+OVERLOADED_STATUS_CODES = (503, 529)
+
+# Identical requests in flight at the same time, from any client in the process, are sent once
+LLM_CALLS = SingleFlight()
+
+
+def resolve_model(purpose: Optional[str] = None, override: Optional[str] = None) -> str:
+    """
+    Pick the model for a call site.
+    
+    In order of priority: an explicit override (e.g. a --model option), the
+    "models" configuration entry for the purpose, the built-in route for the
+    purpose, the "model" configuration value, and the default model.
+    
+    Args:
+        purpose: The call site (planning, generation, answer or summarization)
+        override: Model name that takes precedence over everything else
+    
+    Returns:
+        The model name
+    """
+    if override:
+        return override
+    config = get_config()
+    if purpose:
+        routed = (config.get("models") or {}).get(purpose) or DEFAULT_ROUTES.get(purpose)
+        if routed:
+            return routed
+    return config.get("model") or DEFAULT_MODEL
+
+
+def resolve_fallback_model(purpose: Optional[str] = None, override: Optional[str] = None) -> Optional[str]:
+    """
+    Pick the model to fall back to when the routed model is overloaded.
+    
+    Args:
+        purpose: The call site (planning, generation, answer or summarization)
+        override: Fallback model that takes precedence over the configuration
+    
+    Returns:
+        The fallback model name from the "fallback_models" configuration entry
+        (by purpose, then "default"), or None to not fall back
+    """
+    if override:
+        return override
+    fallbacks = get_config().get("fallback_models") or {}
+    return (purpose and fallbacks.get(purpose)) or fallbacks.get("default")
 
 
 class ClaudeClient:
-    """Client for interacting with Anthropic's Claude API."""
+    """Client for interacting with Anthropic's Claude API (the "anthropic" LLM backend)."""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "claude-3-7-sonnet-20250219"):
+    name = "anthropic"
+    
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None,
+                 base_url: Optional[str] = None, fallback_model: Optional[str] = None,
+                 hedge: Optional[bool] = None):
         """
         Initialize the Claude client.
         
         Args:
             api_key: Anthropic API key. If None, will try to get from config, then ANTHROPIC_API_KEY env var.
-            model: The Claude model to use. Defaults to Claude Sonnet 3.7.
+            model: The Claude model to use. If None, uses the "model" config value, then Claude Sonnet 3.7.
+            base_url: API base URL. If None, will try to get from config, then ANTHROPIC_BASE_URL env var.
+            fallback_model: Model to retry with when the model is overloaded. If None, requests are not retried.
+            hedge: Whether to send a duplicate of requests that are slow to start answering.
+                If None, uses the "llm_hedging" config value (off by default).
         """
         # Try to get API key from different sources in order of priority:
         # 1. Directly provided api_key parameter
         # 2. Configuration file
         # 3. Environment variable
+        config = get_config()
         if api_key is None:
-            config = get_config()
             api_key = config.get("anthropic_api_key")
             
         self.api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("Anthropic API key must be provided, set in configuration with 'config set anthropic_api_key YOUR_KEY', or set as ANTHROPIC_API_KEY environment variable")
         
-        self.model = model
-        self.api_url = "https://api.anthropic.com/v1/messages"
+        # The base URL can be pointed at a proxy or a local stand-in server
+        if base_url is None:
+            base_url = config.get("anthropic_base_url") or os.environ.get("ANTHROPIC_BASE_URL") or DEFAULT_BASE_URL
+        
+        self.model = model or resolve_model()
+        self.fallback_model = fallback_model
+        self.api_url = f"{base_url.rstrip('/')}/v1/messages"
         self.headers = {
             "x-api-key": self.api_key,
             "anthropic-version": "2023-06-01",
             "content-type": "application/json"
         }
+        
+        # Reuse connections across requests, including from several threads sharing the client
+        self.session = requests.Session()
+        self.session.mount(self.api_url, HTTPAdapter(pool_maxsize=CONNECTION_POOL_SIZE))
+        
+        # Optional client-side rate limiting shared by all strangeloop processes
+        from .ratelimit import RateLimiter
+        self.rate_limiter = RateLimiter.from_config(config, self.api_key)
+        
+        # Optional hedging of requests stuck waiting for their first byte
+        if hedge is None:
+            hedge = bool(config.get("llm_hedging", False))
+        self.hedger = None
+        if hedge:
+            from .hedging import Hedger
+            self.hedger = Hedger.from_config(config)
+        
+        self._usage = {"requests": 0, "input_tokens": 0, "output_tokens": 0}
+        self._usage_lock = threading.Lock()
+        
+        # Identical concurrent requests share one API call
+        self.single_flight = bool(config.get("single_flight", True))
     
-    def ask(self, prompt: str, max_tokens: int = 1024, temperature: float = 0.7) -> Dict[str, Any]:
+    def ask(self, prompt: str, max_tokens: int = 1024, temperature: float = 0.7,
+            model: Optional[str] = None) -> Dict[str, Any]:
         """
         Ask Claude a question and get a response.
         
@@ -48,12 +165,15 @@ class ClaudeClient:
             prompt: The question or prompt to send to Claude
             max_tokens: Maximum number of tokens in the response
             temperature: Controls randomness (0 = deterministic, 1 = creative)
+            model: Model to use for this request instead of the client's model
             
         Returns:
-            Dict containing the response and metadata
+            Dict containing the response and metadata (shared by identical
+            concurrent requests at temperature 0, so treat it as read-only)
         """
+        model = model or self.model
         payload = {
-            "model": self.model,
+            "model": model,
             "max_tokens": max_tokens,
             "temperature": temperature,
             "messages": [
@@ -61,13 +181,186 @@ class ClaudeClient:
             ]
         }
         
+        # Sampled responses are meant to differ, so only deterministic requests are shared
+        if not self.single_flight or temperature > 0:
+            return self._send(payload, prompt)
+        key = content_key(self.name, self.api_url, self.api_key, self.fallback_model, payload)
+        result, _ = LLM_CALLS.do(key, lambda: self._send(payload, prompt))
+        return result
+    
+    def _send(self, payload: Dict[str, Any], prompt: str) -> Dict[str, Any]:
+        """Send a request, retrying on the fallback model if the model is overloaded."""
+        model = payload["model"]
+        estimated_tokens = estimate_tokens(prompt) + payload["max_tokens"]
+        models = [model]
+        if self.fallback_model and self.fallback_model != model:
+            models.append(self.fallback_model)
+        
+        try:
+            for index, current_model in enumerate(models):
+                payload["model"] = current_model
+                if self.hedger:
+                    response = self._post_hedged(payload, estimated_tokens, estimate_tokens(prompt))
+                else:
+                    response = self._post(payload, estimated_tokens)
+                
+                if response.status_code in OVERLOADED_STATUS_CODES and index < len(models) - 1:
+                    response.close()
+                    continue
+                
+                response.raise_for_status()
+                result = _read_message_stream(response) if self.hedger else response.json()
+                self._record_usage(result.get("usage", {}), estimated_tokens)
+                return result
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Error communicating with Claude API: {str(e)}")
+    
+    def stream(self, prompt: str, max_tokens: int = 1024, temperature: float = 0.7,
+               model: Optional[str] = None) -> Iterator[str]:
+        """
+        Ask Claude a question and yield the response text as it is generated.
+        
+        Args:
+            prompt: The question or prompt to send to Claude
+            max_tokens: Maximum number of tokens in the response
+            temperature: Controls randomness (0 = deterministic, 1 = creative)
+            model: Model to use for this request instead of the client's model
+        
+        Yields:
+            Chunks of the response text
+        """
+        payload = {
+            "model": model or self.model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "stream": True
+        }
+        estimated_tokens = estimate_tokens(prompt) + max_tokens
+        
         try:
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
+            response = self._post(payload, estimated_tokens, stream=True)
             response.raise_for_status()
-            return response.json()
+            message = yield from _stream_message(response)
+            self._record_usage(message.get("usage", {}), estimated_tokens)
         except requests.exceptions.RequestException as e:
             raise Exception(f"Error communicating with Claude API: {str(e)}")
     
+    def usage(self) -> Dict[str, int]:
+        """
+        Report the usage of this client so far.
+        
+        Returns:
+            Dictionary with the number of requests and the input and output tokens they used
+        """
+        with self._usage_lock:
+            return dict(self._usage)
+    
+    def _record_usage(self, usage: Dict[str, Any], estimated_tokens: int) -> None:
+        """Count a finished request, and correct the rate limiter's token estimate."""
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+        with self._usage_lock:
+            self._usage["requests"] += 1
+            self._usage["input_tokens"] += input_tokens
+            self._usage["output_tokens"] += output_tokens
+        
+        if self.rate_limiter:
+            self.rate_limiter.reconcile(estimated_tokens, (input_tokens + output_tokens) or estimated_tokens)
+    
+    def _post(self, payload: Dict[str, Any], estimated_tokens: int, stream: bool = False) -> requests.Response:
+        """Send a request, backing off and retrying while it is rate limited."""
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire(estimated_tokens)
+            
+            response = self.session.post(self.api_url, headers=self.headers, json=payload, stream=stream)
+            
+            # Make every process back off together instead of retrying into the limit
+            if response.status_code == 429 and self.rate_limiter and attempt < MAX_RATE_LIMIT_RETRIES:
+                response.close()
+                self.rate_limiter.block(_retry_after(response))
+                continue
+            
+            return response
+    
+    def _post_hedged(self, payload: Dict[str, Any], estimated_tokens: int, prompt_tokens: int) -> requests.Response:
+        """
+        Send a streaming request, duplicating it if no first byte arrives within the hedge delay.
+        
+        The first attempt to start answering wins and the other one is
+        closed, which cancels it. Streaming makes the first byte arrive as soon
+        as generation starts, so a stuck request can be told from a long answer.
+        
+        Args:
+            payload: The request payload
+            estimated_tokens: Tokens to reserve with the rate limiter for each attempt
+            prompt_tokens: Estimated input tokens, billed again for a duplicate
+        
+        Returns:
+            The winning response, with its body not read yet
+        """
+        payload = {**payload, "stream": True}
+        model = payload["model"]
+        arrivals: "queue.Queue" = queue.Queue()
+        start = time.perf_counter()
+        
+        def attempt(index: int) -> None:
+            try:
+                response = self._post(payload, estimated_tokens, stream=True)
+                arrivals.put((index, time.perf_counter() - start, response, None))
+            except requests.exceptions.RequestException as e:
+                arrivals.put((index, time.perf_counter() - start, None, e))
+        
+        threading.Thread(target=attempt, args=(0,), daemon=True).start()
+        hedged = False
+        pending = 1
+        try:
+            arrival = arrivals.get(timeout=self.hedger.delay(model))
+        except queue.Empty:
+            arrival = None
+            if self.hedger.allow():
+                threading.Thread(target=attempt, args=(1,), daemon=True).start()
+                hedged = True
+                pending += 1
+        
+        # Take the first successful response; an error only wins if every attempt failed
+        failures: List[tuple] = []
+        while True:
+            if arrival is None:
+                arrival = arrivals.get()
+            pending -= 1
+            index, seconds, response, error = arrival
+            if response is not None and response.status_code < 400:
+                break
+            failures.append(arrival)
+            if not pending:
+                index, seconds, response, error = failures[0]
+                if error is not None:
+                    raise error
+                break
+            arrival = None
+        
+        request_id = self.hedger.record(model, seconds, seconds if index == 0 else None, hedged, index == 1,
+                                        prompt_tokens if hedged else 0)
+        
+        for _, _, failed, _ in failures:
+            if failed is not response and failed is not None:
+                failed.close()
+        if pending:
+            threading.Thread(target=self._cancel_loser, args=(arrivals, request_id), daemon=True).start()
+        return response
+    
+    def _cancel_loser(self, arrivals: "queue.Queue", request_id: Optional[int]) -> None:
+        """Close the losing attempt once it starts answering, noting when the first attempt did."""
+        index, seconds, response, _ = arrivals.get()
+        if response is not None:
+            response.close()
+        if index == 0:
+            self.hedger.record_unhedged(request_id, seconds)
+    
     def get_response_text(self, response: Dict[str, Any]) -> str:
         """
         Extract the text content from Claude's response.
@@ -87,7 +380,70 @@ class ClaudeClient:
             raise Exception(f"Error parsing Claude response: {str(e)}")
 
 
-def ask_claude(prompt: str, max_tokens: int = 1024, temperature: float = 0.7) -> str:
+def _stream_message(response: requests.Response):
+    """
+    Read a streamed Messages API response, yielding its text as it arrives.
+    
+    Args:
+        response: A response to a request sent with "stream": true
+    
+    Yields:
+        Chunks of the response text
+    
+    Returns:
+        The message dict in the shape of a non-streamed response, with its
+        text content, stop reason and usage
+    """
+    message: Dict[str, Any] = {}
+    blocks: Dict[int, Dict[str, Any]] = {}
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            event = json.loads(line[5:])
+            kind = event.get("type")
+            if kind == "message_start":
+                message = event.get("message", {})
+            elif kind == "content_block_start":
+                blocks[event["index"]] = dict(event.get("content_block", {}))
+            elif kind == "content_block_delta":
+                delta = event.get("delta", {})
+                block = blocks.setdefault(event["index"], {"type": "text", "text": ""})
+                if delta.get("type") == "text_delta":
+                    block["text"] = block.get("text", "") + delta.get("text", "")
+                    yield delta.get("text", "")
+            elif kind == "message_delta":
+                message.update(event.get("delta", {}))
+                message["usage"] = {**message.get("usage", {}), **event.get("usage", {})}
+            elif kind == "error":
+                raise requests.exceptions.RequestException(event.get("error", {}).get("message", "stream error"))
+    finally:
+        response.close()
+    
+    message["content"] = [blocks[index] for index in sorted(blocks)]
+    return message
+
+
+def _read_message_stream(response: requests.Response) -> Dict[str, Any]:
+    """Assemble a streamed Messages API response into the shape of a non-streamed one."""
+    stream = _stream_message(response)
+    while True:
+        try:
+            next(stream)
+        except StopIteration as done:
+            return done.value
+
+
+def _retry_after(response: requests.Response) -> float:
+    """Get how long to back off after a 429 response, from its retry-after header."""
+    try:
+        return max(float(response.headers.get("retry-after", 1.0)), 0.0)
+    except ValueError:
+        return 1.0
+
+
+def ask_claude(prompt: str, max_tokens: int = 1024, temperature: float = 0.7,
+               purpose: Optional[str] = None, model: Optional[str] = None, hedge: Optional[bool] = None) -> str:
     """
     Convenience function to ask Claude a question and get the text response.
     
@@ -95,10 +451,50 @@ def ask_claude(prompt: str, max_tokens: int = 1024, temperature: float = 0.7) ->
         prompt: The question or prompt to send to Claude
         max_tokens: Maximum number of tokens in the response
         temperature: Controls randomness (0 = deterministic, 1 = creative)
+        purpose: The call site, used to route the request to a model (see resolve_model)
+        model: Model that overrides the routing
+        hedge: Whether to hedge slow requests (None for the "llm_hedging" config value)
         
     Returns:
         The text content of Claude's response
     """
-    client = ClaudeClient()
+    client = ClaudeClient(model=resolve_model(purpose, model), fallback_model=resolve_fallback_model(purpose),
+                          hedge=hedge)
     response = client.ask(prompt, max_tokens, temperature)
-    return client.get_response_text(response)
\ No newline at end of file
+    return client.get_response_text(response)
+
+
+def ask_llm(prompt: str, max_tokens: int = 1024, temperature: float = 0.7, purpose: Optional[str] = None,
+            model: Optional[str] = None, backend: Optional[str] = None, hedge: Optional[bool] = None) -> str:
+    """
+    Ask the LLM backend routed for a call site and get the text response.
+    
+    Args:
+        prompt: The question or prompt to send
+        max_tokens: Maximum number of tokens in the response
+        temperature: Controls randomness (0 = deterministic, 1 = creative)
+        purpose: The call site, used to pick the backend and model
+        model: Model that overrides the routing
+        backend: Backend name that overrides the routing (see backends.resolve_backend)
+        hedge: Whether to hedge slow requests, for backends that support it
+    
+    Returns:
+        The text content of the response
+    """
+    from .backends import create_backend
+    
+    client = create_backend(backend, purpose, model, hedge)
+    return client.get_response_text(client.ask(prompt, max_tokens, temperature))
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text without calling the API.
+    
+    Args:
+        text: The text to estimate
+    
+    Returns:
+        Approximate token count
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
@@ -0,0 +1,392 @@
+"""
+Profile-driven optimization of capabilities for Strangeloop.
+Profiles a capability on its sample inputs, checks that a rewrite returns the
+same outputs and benchmarks it against the original, and keeps backups of
+replaced capabilities for rollback.
+"""
+import collections.abc
+import cProfile
+import io
+import itertools
+import pstats
+import shutil
+import statistics
+import string
+import time
+import types
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import get_data_dir
+from .validation import static_checks, uses_system
+
+DEFAULT_ITERATIONS = 20
+DEFAULT_MIN_IMPROVEMENT = 10.0
+PROFILE_ITERATIONS = 5
+
+# Profile entries included in the prompt, and items compared from a streamed result
+PROFILE_ENTRIES = 25
+MAX_COMPARED_ITEMS = 1000
+
+# Extra calls of each function when outputs vary, to compare their properties
+PROPERTY_CALLS = 5
+
+CHARACTER_CLASSES = {
+    "uppercase": set(string.ascii_uppercase),
+    "lowercase": set(string.ascii_lowercase),
+    "digits": set(string.digits),
+    "punctuation": set(string.punctuation),
+    "whitespace": set(string.whitespace),
+}
+
+ArgumentSet = Tuple[List[Any], Dict[str, Any]]
+
+OPTIMIZATION_PROMPT = """
+The following Python module implements the capability `{name}`:
+
+```python
+{source}
+```
+
+It was profiled with cProfile over {calls} calls with these sample arguments:
+
+{samples}
+
+Profile, sorted by cumulative time:
+
+```
+{profile}
+```
+
+Rewrite the module so that `{name}` runs faster, focusing on the hotspots in the profile.
+Keep every public function with the same name, signature, return values and errors, and keep
+module-level names such as SAMPLES. `{name}` must be the first function defined in the module.
+Only return the complete module code, nothing else.
+"""
+
+
+def _call(func: Callable, args: List[Any], kwargs: Dict[str, Any]) -> Any:
+    """Call a function, collecting a streamed result so it can be compared."""
+    result = func(*args, **kwargs)
+    if isinstance(result, collections.abc.Iterator):
+        result = list(itertools.islice(result, MAX_COMPARED_ITEMS))
+    return result
+
+
+def profile_capability(func: Callable, argument_sets: List[ArgumentSet], iterations: int = PROFILE_ITERATIONS) -> str:
+    """
+    Profile a capability on its sample inputs.
+    
+    Args:
+        func: The capability function
+        argument_sets: The (args, kwargs) sample inputs
+        iterations: Calls per sample input
+    
+    Returns:
+        The profile report, sorted by cumulative time
+    """
+    profiler = cProfile.Profile()
+    for args, kwargs in argument_sets:
+        for _ in range(iterations):
+            profiler.enable()
+            try:
+                _call(func, args, kwargs)
+            except Exception:
+                pass
+            finally:
+                profiler.disable()
+    
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).strip_dirs().sort_stats("cumulative").print_stats(PROFILE_ENTRIES)
+    return output.getvalue().strip()
+
+
+def build_optimization_prompt(name: str, source: str, profile: str, argument_sets: List[ArgumentSet],
+                              calls: int) -> str:
+    """
+    Build the prompt asking Claude for a faster version of a capability module.
+    
+    Args:
+        name: The capability name
+        source: Source code of the capability's module
+        profile: The profile report
+        argument_sets: The sample inputs that were profiled
+        calls: Total number of profiled calls
+    
+    Returns:
+        The optimization prompt
+    """
+    samples = "\n".join(f"- args={args!r}, kwargs={kwargs!r}" for args, kwargs in argument_sets)
+    return OPTIMIZATION_PROMPT.format(name=name, source=source, calls=calls, samples=samples, profile=profile)
+
+
+def check_candidate(code: str, original_source: str) -> List[str]:
+    """
+    Statically check a rewritten module before anything executes it.
+    
+    The rewrite may not reach the file system, other processes or dynamic
+    code unless the original already did, nor add performance anti-patterns
+    that the original doesn't have (see validation.static_checks).
+    
+    Args:
+        code: The rewritten module source code
+        original_source: Source code of the current module
+    
+    Returns:
+        List of problems (empty if the rewrite may be executed)
+    """
+    issues = static_checks(code)
+    syntax = [issue for issue in issues if issue["check"] == "syntax"]
+    if syntax:
+        return [f"line {syntax[0]['line']}: {syntax[0]['message']}"]
+    
+    problems = []
+    if uses_system(code) and not uses_system(original_source):
+        problems.append("it uses the file system, processes or dynamic code, which the original doesn't")
+    existing = {issue["check"] for issue in static_checks(original_source)}
+    problems.extend(f"line {issue['line']}: {issue['message']}" for issue in issues if issue["check"] not in existing)
+    return problems
+
+
+def load_candidate(code: str, name: str, module_name: str, original_source: str) -> types.ModuleType:
+    """
+    Execute a rewritten module without installing it, once it passes check_candidate.
+    
+    Args:
+        code: The module source code
+        name: The capability the module must define
+        module_name: Name to give the module
+        original_source: Source code of the current module, for check_candidate
+    
+    Returns:
+        The executed module
+    
+    Raises:
+        ValueError: If the code fails the static checks or doesn't define the capability
+    """
+    problems = check_candidate(code, original_source)
+    if problems:
+        raise ValueError("The rewrite was rejected before running it: " + "; ".join(problems))
+    
+    module = types.ModuleType(module_name)
+    module.__file__ = f"<optimized {name}>"
+    exec(compile(code, module.__file__, "exec"), module.__dict__)
+    if not callable(getattr(module, name, None)):
+        raise ValueError(f"The rewritten module doesn't define '{name}'")
+    return module
+
+
+def _outcome(func: Callable, args: List[Any], kwargs: Dict[str, Any]) -> Tuple[bool, Any]:
+    try:
+        return True, _call(func, args, kwargs)
+    except Exception as e:
+        return False, type(e).__name__
+
+
+def _same(a: Any, b: Any) -> bool:
+    try:
+        return bool(a == b)
+    except Exception:
+        return repr(a) == repr(b)
+
+
+def _characters(value: Any) -> str:
+    """Get the characters of every string in a value, looking into lists, tuples and dict values."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        return "".join(_characters(item) for item in value)
+    return ""
+
+
+def _properties(outputs: List[Any]) -> Dict[str, Any]:
+    """Summarize outputs that vary between calls: their types, lengths and character classes."""
+    lengths = [len(output) for output in outputs if isinstance(output, collections.abc.Sized)]
+    per_output = [{name for name, members in CHARACTER_CLASSES.items() if set(_characters(output)) & members}
+                  for output in outputs]
+    return {
+        "types": {type(output) for output in outputs},
+        "lengths": (min(lengths), max(lengths)) if lengths else None,
+        "classes": set().union(*per_output),
+        # Classes in most outputs, which the other function's outputs can't plausibly all miss by chance
+        "common_classes": {name for name in CHARACTER_CLASSES
+                           if sum(name in classes for classes in per_output) * 2 >= len(outputs)},
+        "distinct": len({repr(output) for output in outputs}),
+    }
+
+
+def _property_mismatch(expected: Dict[str, Any], actual: Dict[str, Any]) -> Optional[str]:
+    """Describe how outputs of a rewrite differ in their properties from the original's (None if they don't)."""
+    if actual["types"] != expected["types"]:
+        return f"types {sorted(t.__name__ for t in actual['types'])} instead of " \
+               f"{sorted(t.__name__ for t in expected['types'])}"
+    if expected["lengths"] and not (expected["lengths"][0] <= actual["lengths"][0]
+                                    and actual["lengths"][1] <= expected["lengths"][1]):
+        return f"lengths {actual['lengths']} outside {expected['lengths']}"
+    if not actual["classes"] <= expected["classes"]:
+        return f"character classes the original never returns: {sorted(actual['classes'] - expected['classes'])}"
+    if not expected["common_classes"] <= actual["classes"]:
+        return f"no {', '.join(sorted(expected['common_classes'] - actual['classes']))} characters"
+    if actual["distinct"] == 1:
+        return "the same output on every call, while the original's varies"
+    return None
+
+
+def compare_outputs(original: Callable, candidate: Callable, argument_sets: List[ArgumentSet]) -> Dict[str, Any]:
+    """
+    Check that a rewrite returns the same outputs as the original on the sample inputs.
+    
+    Outputs must be equal, or both calls must raise the same exception type.
+    When the original itself returns different outputs for the same input
+    (e.g. random passwords), both are called several more times and their
+    outputs must have the same properties instead: types, lengths within the
+    original's range, character classes (uppercase, digits, ...) that the
+    original returns, including those in most of its outputs, and outputs
+    that vary too.
+    
+    Args:
+        original: The current capability function
+        candidate: The rewritten function
+        argument_sets: The sample inputs
+    
+    Returns:
+        Dictionary with an equivalent flag, whether any comparison fell back to
+        properties ("nondeterministic"), and a list of mismatches
+    """
+    mismatches = []
+    nondeterministic = False
+    
+    for args, kwargs in argument_sets:
+        expected = _outcome(original, args, kwargs)
+        actual = _outcome(candidate, args, kwargs)
+        if expected[0] == actual[0] and _same(expected[1], actual[1]):
+            continue
+        
+        describe_call = f"args={args!r}, kwargs={kwargs!r}"
+        repeated = _outcome(original, args, kwargs)
+        if expected[0] and actual[0] and repeated[0] and not _same(expected[1], repeated[1]):
+            nondeterministic = True
+            originals = [expected, repeated] + [_outcome(original, args, kwargs) for _ in range(PROPERTY_CALLS)]
+            candidates = [actual] + [_outcome(candidate, args, kwargs) for _ in range(PROPERTY_CALLS)]
+            if not all(outcome[0] for outcome in originals + candidates):
+                mismatches.append(f"{describe_call}: raised on some calls but not others")
+                continue
+            problem = _property_mismatch(_properties([outcome[1] for outcome in originals]),
+                                         _properties([outcome[1] for outcome in candidates]))
+            if problem is None:
+                continue
+            mismatches.append(f"{describe_call}: outputs vary between calls, and the rewrite's have {problem}")
+            continue
+        
+        describe = (lambda outcome: repr(outcome[1])[:200] if outcome[0] else f"raised {outcome[1]}")
+        mismatches.append(f"{describe_call}: expected {describe(expected)}, got {describe(actual)}")
+    
+    return {"equivalent": not mismatches, "nondeterministic": nondeterministic, "mismatches": mismatches}
+
+
+def benchmark_pair(original: Callable, candidate: Callable, argument_sets: List[ArgumentSet],
+                   iterations: int = DEFAULT_ITERATIONS) -> Dict[str, Any]:
+    """
+    Benchmark a rewrite against the original on the sample inputs.
+    
+    Rounds of the two alternate, so drift in machine load affects both alike.
+    Each round calls the function once per sample input.
+    
+    Args:
+        original: The current capability function
+        candidate: The rewritten function
+        argument_sets: The sample inputs
+        iterations: Number of timed rounds per function
+    
+    Returns:
+        Dictionary with the median round time of each in ms and the improvement in percent
+    """
+    def round_time(func: Callable) -> float:
+        start = time.perf_counter()
+        for args, kwargs in argument_sets:
+            try:
+                _call(func, args, kwargs)
+            except Exception:
+                pass
+        return time.perf_counter() - start
+    
+    round_time(original)
+    round_time(candidate)
+    samples: Dict[str, List[float]] = {"original": [], "candidate": []}
+    for _ in range(iterations):
+        samples["original"].append(round_time(original))
+        samples["candidate"].append(round_time(candidate))
+    
+    original_ms = statistics.median(samples["original"]) * 1000.0
+    candidate_ms = statistics.median(samples["candidate"]) * 1000.0
+    return {
+        "original_ms": original_ms,
+        "candidate_ms": candidate_ms,
+        "improvement_pct": (original_ms - candidate_ms) / original_ms * 100.0 if original_ms > 0 else 0.0,
+    }
+
+
+def backups_directory(name: str) -> Path:
+    """Get the directory holding the backups of a capability."""
+    return get_data_dir() / "backups" / name
+
+
+def backup_capability(name: str, file_path: Path) -> Path:
+    """
+    Keep a copy of a capability's module before it is replaced.
+    
+    Args:
+        name: The capability name
+        file_path: The module file
+    
+    Returns:
+        Path of the backup
+    """
+    directory = backups_directory(name)
+    directory.mkdir(parents=True, exist_ok=True)
+    backup = directory / f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')}.py"
+    shutil.copy2(file_path, backup)
+    return backup
+
+
+def list_backups(name: str) -> List[Path]:
+    """
+    List the backups of a capability.
+    
+    Args:
+        name: The capability name
+    
+    Returns:
+        Backup paths, oldest first
+    """
+    directory = backups_directory(name)
+    return sorted(directory.glob("*.py")) if directory.is_dir() else []
+
+
+def restore_backup(name: str, directory: Optional[Path] = None) -> Tuple[Path, Path]:
+    """
+    Restore the most recent backup of a capability, removing that backup.
+    
+    Args:
+        name: The capability name
+        directory: The capabilities directory (defaults to strangeloop/capabilities)
+    
+    Returns:
+        Tuple of the restored module path and the backup it came from
+    
+    Raises:
+        FileNotFoundError: If the capability has no backup
+    """
+    from .dynamic import save_function_to_file
+    
+    backups = list_backups(name)
+    if not backups:
+        raise FileNotFoundError(f"Capability '{name}' has no backups")
+    
+    backup = backups[-1]
+    restored = save_function_to_file(backup.read_text(encoding="utf-8"), directory)
+    backup.unlink()
+    return restored, backup
@@ -0,0 +1,308 @@
+"""
+Packed capability bundles for Strangeloop.
+Compiles a capabilities package into a single file of marshalled code objects
+with an offset index, so discovery only reads the index and each capability's
+module is loaded on demand instead of importing every file.
+
+Layout of a pack file:
+    
+    MAGIC | index length (8 bytes, little-endian) | JSON index | code blobs
+
+The index records the capability metadata, the offset and size of every
+module's code blob, and the state of the capabilities directory it was built
+from. A pack is only used while that state is unchanged.
+"""
+import ast
+import hashlib
+import json
+import marshal
+import os
+import struct
+import sys
+import threading
+import types
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import get_cache_dir
+
+MAGIC = b"SLPACK1\n"
+INDEX_LENGTH = struct.Struct("<Q")
+DEFAULT_PACKAGE = "strangeloop.capabilities"
+
+
+def capabilities_directory() -> Path:
+    """Get the directory of the strangeloop.capabilities package."""
+    return Path(__file__).parent / "capabilities"
+
+
+def default_pack_path(directory: Path, package: str = DEFAULT_PACKAGE) -> Path:
+    """
+    Get where the pack of a capabilities directory is stored.
+    
+    Marshalled code is specific to the Python version, so the path includes
+    the interpreter's cache tag.
+    
+    Args:
+        directory: The capabilities directory
+        package: The package name of the directory
+    
+    Returns:
+        Path of the pack file in the strangeloop cache dir
+    """
+    key = hashlib.sha256(str(directory.resolve()).encode()).hexdigest()[:12]
+    return get_cache_dir() / "packs" / f"{package}-{key}.{sys.implementation.cache_tag}.pack"
+
+
+def source_state(directory: Path) -> Dict[str, Any]:
+    """
+    Capture the state of a capabilities directory that a pack depends on.
+    
+    Every module's modification time and size is included, so editing a
+    capability in place (e.g. by capability optimize or by hand) is detected
+    as well as adding or removing one. They are collected in one scandir pass.
+    
+    Args:
+        directory: The capabilities directory
+    
+    Returns:
+        Dictionary with a hash of the module file names, modification times and sizes
+    """
+    modules = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".py"):
+            stat = entry.stat()
+            modules.append(f"{entry.name}\0{stat.st_mtime_ns}\0{stat.st_size}")
+    return {"modules": hashlib.sha256("\n".join(sorted(modules)).encode()).hexdigest()}
+
+
+def parse_exports(init_source: str, package: str) -> Dict[str, Tuple[str, str]]:
+    """
+    Find the capabilities a package's __init__.py imports from its submodules.
+    
+    Args:
+        init_source: Source code of the __init__.py
+        package: The package name
+    
+    Returns:
+        Mapping of exported name to (submodule, attribute name)
+    """
+    exports = {}
+    for node in ast.parse(init_source).body:
+        if not isinstance(node, ast.ImportFrom) or not node.module:
+            continue
+        if node.level == 1:
+            submodule = node.module
+        elif node.level == 0 and node.module.startswith(package + "."):
+            submodule = node.module[len(package) + 1:]
+        else:
+            continue
+        for alias in node.names:
+            exports[alias.asname or alias.name] = (submodule, alias.name)
+    return exports
+
+
+def _new_module(package: str, submodule: str, filename: str) -> types.ModuleType:
+    module = types.ModuleType(f"{package}.{submodule}")
+    module.__file__ = filename
+    module.__package__ = package
+    return module
+
+
+def build_pack(directory: Optional[Path] = None, package: str = DEFAULT_PACKAGE,
+               path: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Compile a capabilities package into a pack.
+    
+    Every module imported by the package's __init__.py is compiled once and
+    executed to describe its capabilities for the index.
+    
+    Args:
+        directory: The capabilities directory (defaults to strangeloop/capabilities)
+        package: The package name of the directory
+        path: Where to write the pack (defaults to default_pack_path)
+    
+    Returns:
+        Summary with the pack path, its size and the number of modules and capabilities
+    """
+    from .dynamic import BATCH_SUFFIX
+    from .registry import describe_capability
+    
+    directory = Path(directory or capabilities_directory())
+    path = Path(path or default_pack_path(directory, package))
+    
+    # Capture the state first, so changes made while packing leave the pack stale
+    state = source_state(directory)
+    exports = parse_exports((directory / "__init__.py").read_text(encoding="utf-8"), package)
+    
+    modules: Dict[str, Dict[str, Any]] = {}
+    loaded: Dict[str, types.ModuleType] = {}
+    blobs: List[bytes] = []
+    offset = 0
+    
+    for submodule in sorted({submodule for submodule, _ in exports.values()}):
+        filename = directory.joinpath(*submodule.split(".")).with_suffix(".py")
+        code = compile(filename.read_bytes(), str(filename), "exec")
+        blob = marshal.dumps(code)
+        modules[submodule] = {"offset": offset, "size": len(blob), "file": str(filename)}
+        blobs.append(blob)
+        offset += len(blob)
+        
+        module = _new_module(package, submodule, str(filename))
+        exec(code, module.__dict__)
+        loaded[submodule] = module
+    
+    capabilities = []
+    for name in sorted(exports):
+        submodule, attribute = exports[name]
+        func = getattr(loaded[submodule], attribute, None)
+        if name.startswith("_") or not callable(func):
+            continue
+        if name.endswith(BATCH_SUFFIX) and name[:-len(BATCH_SUFFIX)] in exports:
+            continue
+        batch = f"{name}{BATCH_SUFFIX}" if f"{name}{BATCH_SUFFIX}" in exports else None
+        capabilities.append(describe_capability(name, func, batch))
+    
+    index = {
+        "python": sys.implementation.cache_tag,
+        "package": package,
+        "directory": str(directory.resolve()),
+        "source": state,
+        "modules": modules,
+        "functions": {name: list(target) for name, target in exports.items()},
+        "capabilities": capabilities,
+    }
+    encoded = json.dumps(index, default=repr).encode("utf-8")
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(".tmp")
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(INDEX_LENGTH.pack(len(encoded)))
+        f.write(encoded)
+        for blob in blobs:
+            f.write(blob)
+    temporary.replace(path)
+    
+    return {"path": str(path), "bytes": path.stat().st_size, "modules": len(modules),
+            "capabilities": len(capabilities)}
+
+
+class CapabilityPack:
+    """A pack file opened for random access to individual capability modules."""
+    
+    def __init__(self, path: Path):
+        """
+        Open a pack and read its index.
+        
+        Args:
+            path: Path to the pack file
+        
+        Raises:
+            OSError: If the file can't be read
+            ValueError: If the file is not a pack
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a capability pack")
+            (length,) = INDEX_LENGTH.unpack(f.read(INDEX_LENGTH.size))
+            self.index = json.loads(f.read(length))
+        self.data_offset = len(MAGIC) + INDEX_LENGTH.size + length
+        self.package = self.index["package"]
+        self._lock = threading.Lock()
+    
+    def is_fresh(self) -> bool:
+        """Whether the pack matches the current Python version and capabilities directory."""
+        try:
+            return (self.index["python"] == sys.implementation.cache_tag
+                    and source_state(Path(self.index["directory"])) == self.index["source"])
+        except OSError:
+            return False
+    
+    def capabilities_info(self) -> List[Dict[str, Any]]:
+        """Get the capability information recorded in the index, as get_available_capabilities returns it."""
+        return [dict(capability) for capability in self.index["capabilities"]]
+    
+    def load_module(self, submodule: str) -> types.ModuleType:
+        """
+        Load one capability module from the pack, reusing it if already imported.
+        
+        Args:
+            submodule: The module name within the package
+        
+        Returns:
+            The module
+        """
+        name = f"{self.package}.{submodule}"
+        with self._lock:
+            if name in sys.modules:
+                return sys.modules[name]
+            
+            entry = self.index["modules"][submodule]
+            with open(self.path, "rb") as f:
+                f.seek(self.data_offset + entry["offset"])
+                code = marshal.loads(f.read(entry["size"]))
+            
+            module = _new_module(self.package, submodule, entry["file"])
+            sys.modules[name] = module
+            try:
+                exec(code, module.__dict__)
+            except BaseException:
+                del sys.modules[name]
+                raise
+            return module
+    
+    def get_function(self, name: str) -> Optional[Callable]:
+        """
+        Get a capability function, loading only the module that defines it.
+        
+        Args:
+            name: The capability name (or the name of a batch entry point)
+        
+        Returns:
+            The function, or None if the pack has no such capability
+        """
+        target = self.index["functions"].get(name)
+        if target is None:
+            return None
+        func = getattr(self.load_module(target[0]), target[1], None)
+        return func if callable(func) else None
+
+
+def load_pack(directory: Optional[Path] = None, package: str = DEFAULT_PACKAGE) -> Optional[CapabilityPack]:
+    """
+    Open the pack of a capabilities directory if one exists and is fresh.
+    
+    Args:
+        directory: The capabilities directory (defaults to strangeloop/capabilities)
+        package: The package name of the directory
+    
+    Returns:
+        The pack, or None if there is no usable pack
+    """
+    path = default_pack_path(Path(directory or capabilities_directory()), package)
+    try:
+        pack = CapabilityPack(path)
+    except (OSError, ValueError, KeyError):
+        return None
+    return pack if pack.is_fresh() else None
+
+
+def remove_pack(directory: Optional[Path] = None, package: str = DEFAULT_PACKAGE) -> bool:
+    """
+    Remove the pack of a capabilities directory, so capabilities load from their files.
+    
+    Args:
+        directory: The capabilities directory (defaults to strangeloop/capabilities)
+        package: The package name of the directory
+    
+    Returns:
+        True if a pack was removed
+    """
+    path = default_pack_path(Path(directory or capabilities_directory()), package)
+    try:
+        path.unlink()
+        return True
+    except FileNotFoundError:
+        return False
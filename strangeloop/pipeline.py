@@ -0,0 +1,352 @@
+"""
+Streaming map-reduce pipeline for Strangeloop.
+Pushes arbitrarily large files through Claude in token-sized chunks with bounded memory.
+"""
+import hashlib
+import json
+import mmap
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .config import get_cache_dir
+from .llm import CHARS_PER_TOKEN, estimate_tokens
+
+DEFAULT_CHUNK_TOKENS = 2000
+DEFAULT_CONCURRENCY = 4
+
+DEFAULT_MAP_PROMPT = (
+    "Summarize the key information in the following part of a larger document. "
+    "Be concise and keep concrete facts, names, numbers and errors."
+)
+DEFAULT_REDUCE_PROMPT = (
+    "Merge the following partial results, which come from consecutive parts of one document, "
+    "into a single coherent result. Remove duplication and keep concrete facts."
+)
+
+
+def iter_chunk_bounds(data: mmap.mmap, chunk_tokens: int) -> Iterator[Tuple[int, int]]:
+    """
+    Split a memory-mapped file into chunks of roughly chunk_tokens tokens.
+    
+    Chunks end on a line boundary where one exists in the second half of the
+    chunk, and never split a UTF-8 multi-byte sequence. Only offsets are
+    produced, so no file content is held in memory.
+    
+    Args:
+        data: The memory-mapped file
+        chunk_tokens: Target chunk size in tokens
+    
+    Yields:
+        (start, end) byte offsets of each chunk
+    """
+    chunk_bytes = max(chunk_tokens * CHARS_PER_TOKEN, 16)
+    size = len(data)
+    start = 0
+    
+    while start < size:
+        end = start + chunk_bytes
+        if end >= size:
+            end = size
+        else:
+            newline = data.rfind(b"\n", start + chunk_bytes // 2, end)
+            if newline != -1:
+                end = newline + 1
+            else:
+                # Back off to the start of a UTF-8 sequence
+                while end > start + 1 and data[end] & 0xC0 == 0x80:
+                    end -= 1
+        
+        yield start, end
+        start = end
+
+
+def ordered_map(fn: Callable[[Any], Any], items: Iterable[Any], concurrency: int) -> Iterator[Any]:
+    """
+    Apply fn to items on a thread pool, yielding results in input order.
+    
+    At most 2 * concurrency items are in flight or waiting to be yielded at
+    any time, so memory stays bounded however long the input is.
+    
+    Args:
+        fn: The function to apply
+        items: The input items (consumed lazily)
+        concurrency: Number of worker threads
+    
+    Yields:
+        fn(item) for each item, in order
+    """
+    window = max(concurrency, 1) * 2
+    items = iter(items)
+    
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        pending: Dict[Future, int] = {}
+        completed: Dict[int, Any] = {}
+        next_index = 0
+        next_to_yield = 0
+        exhausted = False
+        
+        try:
+            while True:
+                while not exhausted and len(pending) + len(completed) < window:
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[executor.submit(fn, item)] = next_index
+                    next_index += 1
+                
+                if next_to_yield in completed:
+                    yield completed.pop(next_to_yield)
+                    next_to_yield += 1
+                    continue
+                
+                if not pending:
+                    break
+                
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    completed[pending.pop(future)] = future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class StageCheckpoint:
+    """
+    Append-only checkpoint of one pipeline stage's results, stored as JSON lines.
+    
+    Results are appended in input order, so a stage that was interrupted can
+    resume by skipping the first `len(checkpoint)` items.
+    """
+    
+    def __init__(self, path: Path):
+        """
+        Initialize the checkpoint, discarding a partially written trailing line.
+        
+        Args:
+            path: Path to the checkpoint file
+        """
+        self.path = path
+        self.count = 0
+        
+        if path.exists():
+            good_size = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    good_size += len(line)
+                    self.count += 1
+            os.truncate(path, good_size)
+        
+        self._file = open(path, "a", encoding="utf-8")
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append a record and flush it to disk."""
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        self.count += 1
+    
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Stream the records written so far."""
+        self._file.flush()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+    
+    def close(self) -> None:
+        """Close the checkpoint file."""
+        self._file.close()
+    
+    def remove(self) -> None:
+        """Close and delete the checkpoint file."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+def checkpoint_key(path: Path, chunk_tokens: int, prompt: str, model: str = "") -> str:
+    """
+    Build a key identifying the map stage of a processing run, so its checkpoints are only reused for the same work.
+    
+    Args:
+        path: The input file
+        chunk_tokens: Target chunk size in tokens
+        prompt: The per-chunk instruction
+        model: Identifier of the model answering the prompts
+    
+    Returns:
+        Hex digest identifying the run
+    """
+    stat = path.stat()
+    identity = f"{path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}|{chunk_tokens}|{prompt}|{model}"
+    return hashlib.sha256(identity.encode()).hexdigest()[:32]
+
+
+def reduce_checkpoint_key(key: str, reduce_prompt: str) -> str:
+    """
+    Build a key identifying the reduce stages of a processing run.
+    
+    Changing only the reduce prompt redoes the reduction but keeps the chunk results.
+    
+    Args:
+        key: The run's map stage key (see checkpoint_key)
+        reduce_prompt: The instruction used to merge chunk results
+    
+    Returns:
+        Hex digest identifying the reduction
+    """
+    return hashlib.sha256(f"{key}|{reduce_prompt}".encode()).hexdigest()[:32]
+
+
+def group_by_tokens(results: Iterable[str], budget: int) -> Iterator[List[str]]:
+    """
+    Group consecutive results so that each group fits within a token budget.
+    
+    Every group holds at least two results (when available), so repeated
+    reduction always converges.
+    
+    Args:
+        results: The results to group
+        budget: Token budget per group
+    
+    Yields:
+        Lists of consecutive results
+    """
+    group: List[str] = []
+    tokens = 0
+    
+    for result in results:
+        size = estimate_tokens(result)
+        if len(group) >= 2 and tokens + size > budget:
+            yield group
+            group, tokens = [], 0
+        group.append(result)
+        tokens += size
+    
+    if group:
+        yield group
+
+
+class FilePipeline:
+    """Map-reduce pipeline that runs a file through an LLM chunk by chunk."""
+    
+    def __init__(self, ask: Callable[[str], str], map_prompt: str = DEFAULT_MAP_PROMPT,
+                 reduce_prompt: str = DEFAULT_REDUCE_PROMPT, chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+                 concurrency: int = DEFAULT_CONCURRENCY, checkpoint_dir: Optional[Path] = None, model: str = ""):
+        """
+        Initialize the pipeline.
+        
+        Args:
+            ask: Function sending a prompt to the LLM and returning the response text
+            map_prompt: Instruction applied to every chunk
+            reduce_prompt: Instruction used to merge chunk results
+            chunk_tokens: Target chunk size in tokens
+            concurrency: Maximum number of LLM requests in flight
+            checkpoint_dir: Directory for checkpoints (defaults to the strangeloop cache dir)
+            model: Identifier of the model behind ask, so checkpoints of another model aren't reused
+        """
+        self.ask = ask
+        self.map_prompt = map_prompt
+        self.reduce_prompt = reduce_prompt
+        self.chunk_tokens = chunk_tokens
+        self.concurrency = concurrency
+        self.model = model
+        self.checkpoint_dir = checkpoint_dir or get_cache_dir() / "process"
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    
+    def _map_chunk(self, data: mmap.mmap, bounds: Tuple[int, int]) -> Dict[str, Any]:
+        start, end = bounds
+        text = data[start:end].decode("utf-8", errors="replace")
+        result = self.ask(f"{self.map_prompt}\n\n<document_part>\n{text}\n</document_part>")
+        return {"start": start, "end": end, "result": result}
+    
+    def _reduce_group(self, group: List[str]) -> Dict[str, Any]:
+        parts = "\n\n".join(f"<partial_result>\n{result}\n</partial_result>" for result in group)
+        return {"result": self.ask(f"{self.reduce_prompt}\n\n{parts}")}
+    
+    def _run_stage(self, checkpoint: StageCheckpoint, items: Iterable[Any],
+                   fn: Callable[[Any], Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Replay checkpointed records, then process the remaining items and checkpoint them."""
+        resumed = len(checkpoint)
+        yield from checkpoint.records()
+        
+        remaining = (item for index, item in enumerate(items) if index >= resumed)
+        for record in ordered_map(fn, remaining, self.concurrency):
+            record = {"index": len(checkpoint), **record}
+            checkpoint.append(record)
+            yield record
+    
+    def run(self, path: Path, reduce: bool = True,
+            on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None,
+            on_progress: Optional[Callable[[str, int], None]] = None) -> Optional[str]:
+        """
+        Run the pipeline over a file.
+        
+        Args:
+            path: The file to process
+            reduce: Whether to merge the chunk results into a single result
+            on_chunk: Callback invoked with every chunk result, in order (including resumed ones)
+            on_progress: Callback invoked with the stage name and number of results completed
+        
+        Returns:
+            The merged result if reduce is True and the file is not empty, otherwise None
+        """
+        path = Path(path)
+        key = checkpoint_key(path, self.chunk_tokens, self.map_prompt, self.model)
+        checkpoints = [StageCheckpoint(self.checkpoint_dir / f"{key}.map.jsonl")]
+        
+        if path.stat().st_size == 0:
+            checkpoints[0].remove()
+            return None
+        
+        try:
+            result = self._run(path, key, checkpoints, reduce, on_chunk, on_progress)
+        finally:
+            for checkpoint in checkpoints:
+                checkpoint.close()
+        
+        # Only a completed run discards its checkpoints
+        for checkpoint in checkpoints:
+            checkpoint.remove()
+        
+        return result
+    
+    def _run(self, path: Path, key: str, checkpoints: List[StageCheckpoint], reduce: bool,
+             on_chunk: Optional[Callable[[Dict[str, Any]], None]],
+             on_progress: Optional[Callable[[str, int], None]]) -> Optional[str]:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            # Map stage: stream every chunk result to the caller as it is checkpointed
+            chunks = iter_chunk_bounds(data, self.chunk_tokens)
+            count = 0
+            for record in self._run_stage(checkpoints[0], chunks, lambda bounds: self._map_chunk(data, bounds)):
+                count += 1
+                if on_chunk:
+                    on_chunk(record)
+                if on_progress:
+                    on_progress("map", count)
+        
+        result = None
+        if reduce:
+            # Reduce stage: merge results level by level until a single result remains
+            level = 0
+            reduce_key = reduce_checkpoint_key(key, self.reduce_prompt)
+            while count > 1:
+                level += 1
+                previous = checkpoints[-1]
+                checkpoints.append(StageCheckpoint(self.checkpoint_dir / f"{reduce_key}.reduce{level}.jsonl"))
+                groups = group_by_tokens((r["result"] for r in previous.records()), self.chunk_tokens)
+                count = 0
+                for _ in self._run_stage(checkpoints[-1], groups, self._reduce_group):
+                    count += 1
+                    if on_progress:
+                        on_progress(f"reduce {level}", count)
+            
+            result = next(checkpoints[-1].records())["result"]
+        
+        return result
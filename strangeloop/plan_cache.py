@@ -0,0 +1,171 @@
+"""
+Plan cache for Strangeloop.
+Reuses `do` action plans for repeated requests against the same capability catalog.
+"""
+import difflib
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .storage import connect
+
+MAX_ENTRIES = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    request TEXT NOT NULL,
+    catalog TEXT NOT NULL,
+    plan TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (request, catalog)
+);
+"""
+
+
+def normalize_request(request: str) -> str:
+    """
+    Normalize a request into its exact-match cache key.
+    
+    Only whitespace is normalized: case and punctuation can matter to the
+    plan's arguments (say "Hello" and say "hello" need different plans).
+    
+    Args:
+        request: The request text
+    
+    Returns:
+        The request with collapsed whitespace
+    """
+    return " ".join(request.split())
+
+
+def similarity_key(request: str) -> str:
+    """
+    Normalize a request for the opt-in similarity match, where trivially different phrasings should match.
+    
+    Args:
+        request: The request text
+    
+    Returns:
+        The request lower-cased, without punctuation and with collapsed whitespace
+    """
+    return " ".join(re.sub(r"[^\w\s]", " ", request.lower()).split())
+
+
+def catalog_version(capabilities_info: List[Dict[str, Any]]) -> str:
+    """
+    Compute a version hash of the capability catalog.
+    
+    The hash changes whenever a capability is added, removed, or changes its
+    signature or documentation, which invalidates plans made against it.
+    
+    Args:
+        capabilities_info: Capability information from get_available_capabilities
+    
+    Returns:
+        Hex digest of the catalog
+    """
+    catalog = sorted((cap["name"], cap["signature"], cap["docstring"]) for cap in capabilities_info)
+    return hashlib.sha256(json.dumps(catalog).encode()).hexdigest()[:16]
+
+
+class PlanCache:
+    """Persistent cache of action plans keyed by whitespace-normalized request and catalog version."""
+    
+    def __init__(self, connection: Optional[sqlite3.Connection] = None):
+        """
+        Initialize the plan cache.
+        
+        Args:
+            connection: Optional database connection (defaults to plan_cache.db in the data dir)
+        """
+        self.connection = connection or connect("plan_cache.db")
+        self.connection.executescript(SCHEMA)
+    
+    def get(self, request: str, catalog: str, similarity: float = 1.0) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Look up a cached plan.
+        
+        Args:
+            request: The request text
+            catalog: The current catalog version
+            similarity: Minimum similarity (0-1) for a near match; 1.0 only accepts exact matches
+        
+        Returns:
+            Tuple of the cached plan and its similarity score, or None on a miss
+        """
+        key = normalize_request(request)
+        row = self.connection.execute(
+            "SELECT request, plan FROM plans WHERE request = ? AND catalog = ?", (key, catalog)).fetchone()
+        score = 1.0
+        
+        if row is None and similarity < 1.0:
+            row, score = self._nearest(key, catalog, similarity)
+        if row is None:
+            return None
+        
+        with self.connection:
+            self.connection.execute(
+                "UPDATE plans SET hits = hits + 1 WHERE request = ? AND catalog = ?", (row["request"], catalog))
+        return json.loads(row["plan"]), score
+    
+    def _nearest(self, key: str, catalog: str, similarity: float) -> Tuple[Optional[sqlite3.Row], float]:
+        best, best_score = None, similarity
+        matcher = difflib.SequenceMatcher(b=similarity_key(key), autojunk=False)
+        
+        for row in self.connection.execute("SELECT request, plan FROM plans WHERE catalog = ?", (catalog,)):
+            matcher.set_seq1(similarity_key(row["request"]))
+            # Cheap upper bounds first, so most candidates are rejected without a full comparison
+            if matcher.real_quick_ratio() < best_score or matcher.quick_ratio() < best_score:
+                continue
+            score = matcher.ratio()
+            if score >= best_score:
+                best, best_score = row, score
+        
+        return best, best_score
+    
+    def put(self, request: str, catalog: str, plan: Dict[str, Any]) -> None:
+        """
+        Store a plan, dropping plans made against other catalog versions.
+        
+        Args:
+            request: The request text
+            catalog: The current catalog version
+            plan: The action plan
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM plans WHERE catalog != ?", (catalog,))
+            self.connection.execute(
+                "INSERT OR REPLACE INTO plans (request, catalog, plan, created_at) VALUES (?, ?, ?, ?)",
+                (normalize_request(request), catalog, json.dumps(plan), time.time()))
+            self.connection.execute(
+                "DELETE FROM plans WHERE rowid NOT IN "
+                "(SELECT rowid FROM plans ORDER BY created_at DESC LIMIT ?)", (MAX_ENTRIES,))
+    
+    def evict(self, catalog: str, plan: Dict[str, Any]) -> int:
+        """
+        Remove a plan that failed, whichever requests it was cached for.
+        
+        Args:
+            catalog: The current catalog version
+            plan: The action plan, as returned by get or given to put
+        
+        Returns:
+            The number of cached entries removed
+        """
+        with self.connection:
+            return self.connection.execute(
+                "DELETE FROM plans WHERE catalog = ? AND plan = ?", (catalog, json.dumps(plan))).rowcount
+    
+    def clear(self) -> int:
+        """
+        Remove all cached plans.
+        
+        Returns:
+            The number of plans removed
+        """
+        with self.connection:
+            return self.connection.execute("DELETE FROM plans").rowcount
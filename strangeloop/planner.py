@@ -0,0 +1,118 @@
+"""
+Planning for Strangeloop's AI agent loop.
+Builds the planning prompt and parses the action plan Claude responds with.
+"""
+import json
+from typing import Any, Dict
+
+
+def strip_code_fences(text: str, language: str = "") -> str:
+    """
+    Remove a surrounding markdown code block from an LLM response.
+    
+    Args:
+        text: The response text
+        language: Optional language tag of the code block (e.g. "json")
+    
+    Returns:
+        The text without code fences
+    """
+    text = text.strip()
+    if language and text.startswith(f"```{language}"):
+        text = text[len(f"```{language}"):].strip()
+    if text.startswith("```"):
+        text = text[len("```"):].strip()
+    if text.endswith("```"):
+        text = text[:-len("```")].strip()
+    return text
+
+
+def build_planning_prompt(request_str: str, capabilities_text: str, context: str = "",
+                          session_name: str = "", candidates: int = 1) -> str:
+    """
+    Build the prompt asking Claude how to fulfill a request.
+    
+    Args:
+        request_str: The user's request
+        capabilities_text: Capabilities formatted by format_capabilities_for_prompt
+        context: Optional conversation context of the session the request belongs to
+        session_name: Name of that session
+        candidates: Number of ranked capability candidates to ask for (1 for just the best one)
+    
+    Returns:
+        The planning prompt
+    """
+    history_text = ""
+    if context:
+        history_text = f"""
+        # Conversation History
+        This request continues an earlier conversation (session "{session_name}"):
+        
+        {context}
+        """
+    
+    candidates_text = ""
+    if candidates > 1:
+        candidates_text = f"""
+           If the request is ambiguous, also include up to {candidates - 1} alternative capabilities
+           (or other arguments) that might fulfill it, most likely first, as
+           "candidates": [{{"capability": "other_capability", "arguments": [...]}}, ...]
+           They are run concurrently with your first choice and the first to succeed is used."""
+    
+    return f"""
+        # Request
+        The user has requested: "{request_str}"
+        {history_text}
+        # Available Capabilities
+        You have the following capabilities available:
+        
+        {capabilities_text}
+        
+        # Your Task
+        Analyze the request and determine the best course of action:
+        
+        1. If an existing capability can handle the request (or part of it), respond with a JSON object like this:
+           {{
+             "action": "use_capability",
+             "capability": "capability_name",
+             "arguments": ["arg1", "arg2", ...],
+             "explanation": "Why this capability is appropriate"
+           }}
+           If several capabilities fit, prefer the one with the lowest latency and error rate
+           according to its Performance line.{candidates_text}
+        
+        2. If the request requires a new capability, respond with a JSON object like this:
+           {{
+             "action": "create_capability",
+             "description": "Detailed description of the capability needed",
+             "explanation": "Why a new capability is needed"
+           }}
+        
+        3. If the request can be answered directly without using or creating capabilities, respond with:
+           {{
+             "action": "direct_response",
+             "response": "Your detailed response to the request",
+             "explanation": "Why a direct response is sufficient"
+           }}
+        
+        Respond ONLY with a valid JSON object matching one of these formats. Do not include any other text.
+        """
+
+
+def parse_plan(response: str) -> Dict[str, Any]:
+    """
+    Parse the action plan from Claude's planning response.
+    
+    Args:
+        response: The raw response text
+    
+    Returns:
+        The action plan dictionary
+    
+    Raises:
+        json.JSONDecodeError: If the response is not valid JSON
+    """
+    plan = json.loads(strip_code_fences(response, "json"))
+    if not isinstance(plan, dict):
+        raise json.JSONDecodeError("Expected a JSON object", response, 0)
+    return plan
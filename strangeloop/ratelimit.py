@@ -0,0 +1,157 @@
+"""
+Client-side rate limiting for Strangeloop's LLM traffic.
+A token bucket shared by all strangeloop processes on a host through a locked state file.
+"""
+import hashlib
+import json
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .config import get_cache_dir
+from .filelock import file_lock
+
+DEFAULT_HEADROOM = 0.95
+MAX_SLEEP = 1.0
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute token buckets shared across processes.
+    
+    Both buckets refill continuously. Callers block in acquire() until their
+    request fits in both buckets, so the aggregate rate of every process
+    using the same state file stays just under the configured budgets
+    instead of overshooting and backing off in 429 storms.
+    """
+    
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 headroom: float = DEFAULT_HEADROOM, state_path: Optional[Path] = None):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            requests_per_minute: Request budget (None for unlimited)
+            tokens_per_minute: Token budget (None for unlimited)
+            headroom: Fraction of the budgets to actually use
+            state_path: Shared state file (defaults to ratelimit.json in the cache dir)
+        """
+        self.request_capacity = requests_per_minute * headroom if requests_per_minute else None
+        self.token_capacity = tokens_per_minute * headroom if tokens_per_minute else None
+        self.state_path = state_path or get_cache_dir() / "ratelimit.json"
+        self.lock_path = self.state_path.with_suffix(".lock")
+    
+    @classmethod
+    def from_config(cls, config: Any, api_key: str) -> Optional["RateLimiter"]:
+        """
+        Create a rate limiter from the rate_limit_rpm and rate_limit_tpm configuration values.
+        
+        Processes using the same API key share one set of buckets.
+        
+        Args:
+            config: The Config instance
+            api_key: The API key the limits apply to
+        
+        Returns:
+            A RateLimiter, or None if no limits are configured
+        """
+        rpm = config.get("rate_limit_rpm")
+        tpm = config.get("rate_limit_tpm")
+        if not rpm and not tpm:
+            return None
+        
+        key = hashlib.sha256(api_key.encode()).hexdigest()[:12]
+        return cls(float(rpm) if rpm else None, float(tpm) if tpm else None,
+                   float(config.get("rate_limit_headroom", DEFAULT_HEADROOM)),
+                   get_cache_dir() / f"ratelimit-{key}.json")
+    
+    def _load(self, now: float) -> Dict[str, float]:
+        try:
+            state = json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            state = {"requests": self.request_capacity or 0.0, "tokens": self.token_capacity or 0.0,
+                     "updated": now, "blocked_until": 0.0}
+        
+        # Refill both buckets for the time since the last update
+        elapsed = max(now - state["updated"], 0.0)
+        if self.request_capacity:
+            state["requests"] = min(self.request_capacity,
+                                    state["requests"] + elapsed * self.request_capacity / 60.0)
+        if self.token_capacity:
+            state["tokens"] = min(self.token_capacity, state["tokens"] + elapsed * self.token_capacity / 60.0)
+        state["updated"] = now
+        return state
+    
+    def _save(self, state: Dict[str, float]) -> None:
+        temporary = self.state_path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(state))
+        temporary.replace(self.state_path)
+    
+    def acquire(self, tokens: int) -> float:
+        """
+        Block until a request of the given size fits within the budgets, then consume it.
+        
+        Args:
+            tokens: Estimated tokens the request will use
+        
+        Returns:
+            Seconds spent waiting
+        """
+        if self.token_capacity:
+            # A single request larger than the whole bucket would otherwise wait forever
+            tokens = min(tokens, self.token_capacity)
+        
+        start = time.monotonic()
+        while True:
+            with file_lock(self.lock_path):
+                now = time.time()
+                state = self._load(now)
+                
+                wait = max(state.get("blocked_until", 0.0) - now, 0.0)
+                if self.request_capacity and state["requests"] < 1:
+                    wait = max(wait, (1 - state["requests"]) * 60.0 / self.request_capacity)
+                if self.token_capacity and state["tokens"] < tokens:
+                    wait = max(wait, (tokens - state["tokens"]) * 60.0 / self.token_capacity)
+                
+                if wait <= 0:
+                    if self.request_capacity:
+                        state["requests"] -= 1
+                    if self.token_capacity:
+                        state["tokens"] -= tokens
+                    self._save(state)
+                    return time.monotonic() - start
+                
+                self._save(state)
+            
+            # Jitter keeps waiting processes from waking up in lockstep
+            time.sleep(min(wait, MAX_SLEEP) * random.uniform(0.9, 1.1))
+    
+    def reconcile(self, estimated: int, actual: int) -> None:
+        """
+        Correct the token bucket once a request's actual usage is known.
+        
+        Args:
+            estimated: Tokens consumed in acquire()
+            actual: Tokens the request actually used
+        """
+        if not self.token_capacity or estimated == actual:
+            return
+        
+        with file_lock(self.lock_path):
+            state = self._load(time.time())
+            state["tokens"] = min(self.token_capacity, state["tokens"] + min(estimated, self.token_capacity) - actual)
+            self._save(state)
+    
+    def block(self, seconds: float) -> None:
+        """
+        Make every process sharing the buckets hold off, e.g. after a 429 response.
+        
+        Args:
+            seconds: How long to hold off
+        """
+        with file_lock(self.lock_path):
+            now = time.time()
+            state = self._load(now)
+            state["blocked_until"] = max(state.get("blocked_until", 0.0), now + seconds)
+            self._save(state)
@@ -0,0 +1,198 @@
+"""
+Capability registry for Strangeloop.
+Discovers available capabilities and describes them for prompts.
+"""
+import importlib
+import inspect
+import types
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import click
+
+from .dynamic import BATCH_SUFFIX
+
+
+def get_available_capabilities(module: Optional[types.ModuleType] = None) -> List[Dict[str, Any]]:
+    """
+    Get information about all available capabilities.
+    
+    When no module is given and a fresh capability pack exists (see
+    `strangeloop capability pack`), the information is read from the pack's
+    index without importing any capability.
+    
+    Args:
+        module: Optional capabilities package to inspect (defaults to strangeloop.capabilities)
+    
+    Returns:
+        List of dictionaries with capability information
+    """
+    capabilities_info = []
+    
+    try:
+        if module is None:
+            from .pack import load_pack
+            pack = load_pack()
+            if pack is not None:
+                return pack.capabilities_info()
+        
+        # Import capabilities module
+        try:
+            if module is None:
+                import strangeloop.capabilities as module
+            capabilities = importlib.reload(module)  # Reload to catch any new capabilities
+        except ImportError:
+            return capabilities_info
+        
+        # Get all functions from the capabilities module
+        for name in dir(capabilities):
+            if name.startswith('_'):
+                continue
+            
+            # Batch entry points are recorded on the capability they belong to
+            if name.endswith(BATCH_SUFFIX) and inspect.isfunction(getattr(capabilities, name[:-len(BATCH_SUFFIX)], None)):
+                continue
+            
+            obj = getattr(capabilities, name)
+            if inspect.isfunction(obj):
+                # Batch entry point taking a list of argument tuples, if the capability has one
+                batch = get_batch_function(capabilities, name)
+                
+                # Add to capabilities list
+                capabilities_info.append(describe_capability(name, obj, batch.__name__ if batch else None))
+    
+    except Exception as e:
+        click.echo(f"Warning: Error getting capabilities: {str(e)}", err=True)
+    
+    return capabilities_info
+
+
+def describe_capability(name: str, func: Callable, batch: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Describe a capability function.
+    
+    Args:
+        name: The capability name
+        func: The capability function
+        batch: Name of its batch entry point, if it has one
+    
+    Returns:
+        Dictionary with the name, signature, docstring, batch entry point and parameters
+    """
+    # Get function signature
+    sig = inspect.signature(func)
+    
+    # Get docstring
+    doc = inspect.getdoc(func) or "No documentation"
+    
+    return {
+        "name": name,
+        "signature": str(sig),
+        "docstring": doc,
+        "batch": batch,
+        "parameters": [
+            {
+                "name": param_name,
+                "annotation": str(param.annotation) if param.annotation != inspect.Parameter.empty else "Any",
+                "default": None if param.default == inspect.Parameter.empty else param.default,
+                "required": param.default == inspect.Parameter.empty and param.kind not in (
+                    inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+            }
+            for param_name, param in sig.parameters.items()
+        ]
+    }
+
+
+def get_capability(name: str) -> Optional[Callable]:
+    """
+    Get a capability function by name.
+    
+    With a fresh capability pack only the module defining the capability is
+    loaded; otherwise the capabilities package is (re)imported.
+    
+    Args:
+        name: The capability name (or the name of a batch entry point)
+    
+    Returns:
+        The function, or None if there is no such capability
+    """
+    if name.startswith('_'):
+        return None
+    
+    from .pack import load_pack
+    pack = load_pack()
+    if pack is not None:
+        return pack.get_function(name)
+    
+    try:
+        import strangeloop.capabilities as capabilities
+        capabilities = importlib.reload(capabilities)  # Reload to catch any new capabilities
+    except ImportError:
+        return None
+    
+    obj = getattr(capabilities, name, None)
+    return obj if inspect.isfunction(obj) else None
+
+
+def get_batch_function(module: types.ModuleType, name: str) -> Optional[Callable[[List[Sequence[Any]]], List[Any]]]:
+    """
+    Get the batch entry point of a capability.
+    
+    A capability NAME can provide NAME_batch(args_list), which takes a list of
+    positional argument tuples and returns the list of results, so that many
+    calls are served by one vectorized call.
+    
+    Args:
+        module: The capabilities module
+        name: The capability name
+    
+    Returns:
+        The batch function, or None if the capability has none
+    """
+    batch = getattr(module, f"{name}{BATCH_SUFFIX}", None)
+    return batch if inspect.isfunction(batch) else None
+
+
+def format_capabilities_for_prompt(capabilities_info: List[Dict[str, Any]],
+                                   execution_stats: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """
+    Format capabilities information for inclusion in a prompt.
+    
+    Args:
+        capabilities_info: List of dictionaries with capability information
+        execution_stats: Optional recent execution statistics by capability name
+                         (from ExecutionStats.summaries), shown so the fastest
+                         reliable capability can be preferred
+    
+    Returns:
+        Formatted string describing capabilities
+    """
+    if not capabilities_info:
+        return "No capabilities available."
+    
+    formatted_text = ""
+    
+    for cap in capabilities_info:
+        # Format the first line of the docstring
+        doc_first_line = cap["docstring"].split('\n')[0]
+        
+        # Format the capability
+        formatted_text += f"- {cap['name']}{cap['signature']}\n"
+        formatted_text += f"  Description: {doc_first_line}\n"
+        
+        # Add recent latency and reliability
+        stats = (execution_stats or {}).get(cap["name"])
+        if stats:
+            formatted_text += (f"  Performance: median {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, "
+                               f"{stats['error_rate']:.0%} errors over the last {stats['runs']} runs\n")
+        
+        # Add parameter details
+        if cap["parameters"]:
+            formatted_text += "  Parameters:\n"
+            for param in cap["parameters"]:
+                required = " (required)" if param["required"] else ""
+                default = f" (default: {param['default']})" if param["default"] is not None else ""
+                formatted_text += f"    - {param['name']}: {param['annotation']}{required}{default}\n"
+        
+        formatted_text += "\n"
+    
+    return formatted_text.strip()
@@ -0,0 +1,4 @@
+"""
+Runtime support for Strangeloop capabilities.
+Shared services that generated capabilities can use instead of rolling their own.
+"""
@@ -0,0 +1,486 @@
+"""
+Shared HTTP layer for Strangeloop capabilities.
+
+Provides a process-wide pooled session with per-host connection limits,
+default timeouts, DNS caching, and an on-disk HTTP cache that honors
+ETag, Last-Modified and Cache-Control, so capabilities don't open a new
+connection or re-download unchanged data on every call.
+
+Usage from a capability:
+    
+    from strangeloop.runtime import http
+    
+    response = http.get("https://api.example.com/data", params={"q": "x"})
+    response.raise_for_status()
+"""
+import hashlib
+import json
+import socket
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+from ..config import get_cache_dir, get_config
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (3.05, 10.0)
+DEFAULT_POOL_CONNECTIONS = 16
+DEFAULT_POOL_MAXSIZE = 8
+DEFAULT_DNS_TTL = 300.0
+MAX_CACHED_BODY = 10 * 1024 * 1024
+
+__all__ = ["RequestException", "get", "post", "request", "get_session", "clear_cache", "set_host_overrides"]
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_cache: Optional["HTTPCache"] = None
+_host_overrides: Optional[Dict[str, str]] = None
+
+
+class _DNSCache:
+    """Cache of host name resolutions, for the connections of one session."""
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+    
+    def resolve(self, host: str, port: int) -> List[str]:
+        """
+        Get the addresses of a host, resolving it only if the cached answer expired.
+        
+        Raises:
+            socket.gaierror: If the host can't be resolved
+        """
+        family = allowed_gai_family()
+        key = (host, family)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+        
+        addresses = list(dict.fromkeys(info[4][0] for info in socket.getaddrinfo(host, port, family,
+                                                                                   socket.SOCK_STREAM)))
+        with self._lock:
+            self._entries[key] = (now + self.ttl, addresses)
+        return addresses
+
+
+class _CachedDNSConnection:
+    """
+    Connection mixin that resolves its host through the session's DNS cache.
+    
+    The resolved addresses are tried in order as IP literals, while the host
+    name is kept for the Host header, SNI and certificate verification. This
+    relies on the connection internals of urllib3 2.x (_new_conn and
+    _dns_host), which is why urllib3 is a direct dependency pinned to 2.x.
+    """
+    
+    dns_cache: _DNSCache
+    
+    def _new_conn(self):
+        hostname = self._dns_host
+        try:
+            addresses = self.dns_cache.resolve(hostname.strip("[]"), self.port)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        
+        error: Optional[Exception] = None
+        for address in addresses:
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except (NewConnectionError, ConnectTimeoutError) as e:
+                error = e
+            finally:
+                self._dns_host = hostname
+        raise error
+
+
+def _dns_cached_pools(cache: _DNSCache) -> Dict[str, type]:
+    """Build connection pool classes, by scheme, whose connections use a DNS cache."""
+    pools = {}
+    for scheme, pool, connection in (("http", HTTPConnectionPool, HTTPConnection),
+                                     ("https", HTTPSConnectionPool, HTTPSConnection)):
+        connection_class = type(f"DNSCached{connection.__name__}", (_CachedDNSConnection, connection),
+                                {"dns_cache": cache})
+        pools[scheme] = type(f"DNSCached{pool.__name__}", (pool,), {"ConnectionCls": connection_class})
+    return pools
+
+
+class _TimeoutAdapter(HTTPAdapter):
+    """HTTP adapter that applies a default timeout to every request, and optionally caches DNS lookups."""
+    
+    def __init__(self, timeout: Union[float, Tuple[float, float]], dns_ttl: float = 0.0, **kwargs):
+        self.timeout = timeout
+        self.dns_cache = _DNSCache(dns_ttl) if dns_ttl > 0 else None
+        super().__init__(**kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        if self.dns_cache is not None:
+            self.poolmanager.pool_classes_by_scheme = _dns_cached_pools(self.dns_cache)
+    
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=timeout if timeout is not None else self.timeout, **kwargs)
+
+
+def get_session() -> requests.Session:
+    """
+    Get the shared pooled session, creating it on first use.
+    
+    Pool sizes, the default timeout and the DNS cache TTL come from the
+    http_pool_maxsize, http_timeout and http_dns_ttl configuration values.
+    
+    Returns:
+        The shared requests session
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            config = get_config()
+            timeout = config.get("http_timeout", DEFAULT_TIMEOUT)
+            adapter = _TimeoutAdapter(
+                tuple(timeout) if isinstance(timeout, list) else timeout,
+                # Pooled connections already avoid most lookups; this covers new
+                # connections to hosts that were resolved recently
+                dns_ttl=float(config.get("http_dns_ttl", DEFAULT_DNS_TTL)),
+                pool_connections=DEFAULT_POOL_CONNECTIONS,
+                pool_maxsize=int(config.get("http_pool_maxsize", DEFAULT_POOL_MAXSIZE)),
+                # Block instead of opening extra connections beyond the per-host limit
+                pool_block=True,
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = "strangeloop"
+            _session = session
+        return _session
+
+
+class CacheEntry:
+    """A cached GET response with its freshness and validator metadata."""
+    
+    def __init__(self, meta: Dict[str, Any], body: bytes):
+        self.meta = meta
+        self.body = body
+    
+    @property
+    def headers(self) -> CaseInsensitiveDict:
+        return CaseInsensitiveDict(self.meta["headers"])
+    
+    def is_fresh(self) -> bool:
+        """Whether the entry can be served without revalidating it with the server."""
+        directives = _cache_control(self.headers.get("cache-control", ""))
+        if "no-cache" in directives:
+            return False
+        
+        age = time.time() - self.meta["stored_at"]
+        if "max-age" in directives:
+            try:
+                return age < int(directives["max-age"])
+            except ValueError:
+                return False
+        
+        expires = self.headers.get("expires")
+        if expires:
+            try:
+                return parsedate_to_datetime(expires).timestamp() > time.time()
+            except (TypeError, ValueError):
+                return False
+        return False
+    
+    def refresh(self, headers: CaseInsensitiveDict) -> None:
+        """Update the entry after the server confirmed it is unchanged (304)."""
+        merged = self.headers
+        for name in ("cache-control", "expires", "etag", "last-modified", "date"):
+            if name in headers:
+                merged[name] = headers[name]
+        self.meta["headers"] = dict(merged)
+        self.meta["stored_at"] = time.time()
+    
+    def to_response(self, request: Optional[requests.PreparedRequest] = None) -> requests.Response:
+        """Build a requests Response from the entry."""
+        response = requests.Response()
+        response.status_code = self.meta["status"]
+        response.headers = self.headers
+        response._content = self.body
+        response.url = self.meta["url"]
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.request = request
+        response.from_cache = True
+        return response
+
+
+def _cache_control(value: str) -> Dict[str, str]:
+    """Parse a Cache-Control header into a dictionary of directives."""
+    directives = {}
+    for part in value.split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"')
+    return directives
+
+
+def _vary(headers: CaseInsensitiveDict) -> List[str]:
+    """Get the request header names listed in a response's Vary header, lower-cased."""
+    return sorted({name.strip().lower() for name in headers.get("vary", "").split(",") if name.strip()})
+
+
+class HTTPCache:
+    """
+    On-disk cache of GET responses, shared by all strangeloop processes.
+    
+    Entries are keyed by URL and the values of the request headers the
+    response's Vary header lists, which are recorded per URL.
+    """
+    
+    def __init__(self, directory: Optional[Path] = None):
+        """
+        Initialize the cache.
+        
+        Args:
+            directory: Cache directory (defaults to the strangeloop cache dir)
+        """
+        self.directory = directory or get_cache_dir() / "http"
+        self.directory.mkdir(parents=True, exist_ok=True)
+    
+    def _vary_path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode()).hexdigest()}.vary"
+    
+    def _paths(self, url: str, varied: Dict[str, str]) -> Tuple[Path, Path]:
+        variant = "".join(f"\n{name}: {value}" for name, value in sorted(varied.items()))
+        key = hashlib.sha256((url + variant).encode()).hexdigest()
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+    
+    def load(self, url: str, headers: Optional[CaseInsensitiveDict] = None) -> Optional[CacheEntry]:
+        """
+        Load the cached entry for a URL, if any.
+        
+        Args:
+            url: The request URL
+            headers: The request headers, matched against the headers the cached response varies on
+        """
+        headers = headers if headers is not None else CaseInsensitiveDict()
+        try:
+            names = json.loads(self._vary_path(url).read_text())
+        except (OSError, ValueError):
+            names = []
+        if "*" in names:
+            return None
+        
+        meta_path, body_path = self._paths(url, {name: headers.get(name, "") for name in names})
+        try:
+            meta = json.loads(meta_path.read_text())
+            return CacheEntry(meta, body_path.read_bytes())
+        except (OSError, ValueError):
+            return None
+    
+    def save(self, url: str, entry: CacheEntry, write_body: bool = True) -> None:
+        """Write an entry to disk, replacing files atomically."""
+        meta_path, body_path = self._paths(url, entry.meta.get("varied", {}))
+        if write_body:
+            temporary = body_path.with_suffix(".body.tmp")
+            temporary.write_bytes(entry.body)
+            temporary.replace(body_path)
+        temporary = meta_path.with_suffix(".json.tmp")
+        temporary.write_text(json.dumps(entry.meta))
+        temporary.replace(meta_path)
+    
+    def store(self, url: str, response: requests.Response, headers: Optional[CaseInsensitiveDict] = None) -> None:
+        """
+        Store a 200 response if its headers allow it and make it worth caching.
+        
+        Args:
+            url: The request URL
+            response: The response
+            headers: The request headers, of which those listed in Vary become part of the key
+        """
+        headers = headers if headers is not None else CaseInsensitiveDict()
+        directives = _cache_control(response.headers.get("cache-control", ""))
+        names = _vary(response.headers)
+        if "no-store" in directives or "*" in names or len(response.content) > MAX_CACHED_BODY:
+            return
+        
+        cacheable = ("max-age" in directives or "expires" in response.headers
+                     or "etag" in response.headers or "last-modified" in response.headers)
+        if not cacheable:
+            return
+        
+        meta = {"url": url, "status": response.status_code, "headers": dict(response.headers),
+                "varied": {name: headers.get(name, "") for name in names}, "stored_at": time.time()}
+        self.save(url, CacheEntry(meta, response.content))
+        temporary = self._vary_path(url).with_suffix(".vary.tmp")
+        temporary.write_text(json.dumps(names))
+        temporary.replace(self._vary_path(url))
+    
+    def clear(self) -> int:
+        """
+        Remove all cached responses.
+        
+        Returns:
+            The number of responses removed
+        """
+        count = 0
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+            path.with_suffix(".body").unlink(missing_ok=True)
+            count += 1
+        for path in self.directory.glob("*.vary"):
+            path.unlink(missing_ok=True)
+        return count
+
+
+def _get_cache() -> Optional[HTTPCache]:
+    global _cache
+    with _lock:
+        if _cache is None and get_config().get("http_cache", True):
+            _cache = HTTPCache()
+        return _cache
+
+
+def set_host_overrides(overrides: Dict[str, str]) -> None:
+    """
+    Send requests for some hosts to other base URLs, e.g. local stand-ins for external APIs.
+    
+    Overrides replace the http_host_overrides configuration value for this process.
+    
+    Args:
+        overrides: Mapping of host (or host:port) to base URL, e.g.
+            {"httpbin.org": "http://127.0.0.1:8080"}
+    """
+    global _host_overrides
+    with _lock:
+        _host_overrides = dict(overrides)
+
+
+def _get_host_overrides() -> Dict[str, str]:
+    global _host_overrides
+    with _lock:
+        if _host_overrides is None:
+            _host_overrides = dict(get_config().get("http_host_overrides") or {})
+        return _host_overrides
+
+
+def _override_host(url: str) -> str:
+    """Rewrite a URL whose host has an override to point at the override's base URL."""
+    overrides = _get_host_overrides()
+    if not overrides:
+        return url
+    
+    parts = urlsplit(url)
+    target = overrides.get(parts.netloc) or overrides.get(parts.hostname or "")
+    if not target:
+        return url
+    
+    base = urlsplit(target)
+    return urlunsplit((base.scheme, base.netloc, base.path.rstrip("/") + parts.path, parts.query, parts.fragment))
+
+
+def request(method: str, url: str, cache: bool = True, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared pooled session.
+    
+    GET requests go through the HTTP cache: fresh responses are served from
+    disk, stale ones are revalidated with If-None-Match/If-Modified-Since.
+    Requests with credentials (an Authorization header or auth) bypass it.
+    
+    Hosts listed in the http_host_overrides configuration value (or set with
+    set_host_overrides) are sent to their override's base URL instead.
+    
+    Args:
+        method: The HTTP method
+        url: The URL
+        cache: Whether to use the HTTP cache for GET requests
+        **kwargs: Passed on to requests (params, headers, json, timeout, ...)
+    
+    Returns:
+        The response; responses served from the cache have from_cache set to True
+    """
+    url = _override_host(url)
+    session = get_session()
+    http_cache = _get_cache() if cache else None
+    if method.upper() != "GET" or http_cache is None or kwargs.get("stream"):
+        return session.request(method, url, **kwargs)
+    
+    prepared = session.prepare_request(requests.Request("GET", url, params=kwargs.get("params"),
+                                                        headers=kwargs.get("headers"), auth=kwargs.get("auth")))
+    if "authorization" in prepared.headers:
+        response = session.request(method, url, **kwargs)
+        response.from_cache = False
+        return response
+    
+    entry = http_cache.load(prepared.url, prepared.headers)
+    if entry and entry.is_fresh():
+        return entry.to_response(prepared)
+    
+    headers = dict(kwargs.pop("headers", None) or {})
+    if entry:
+        if "etag" in entry.headers:
+            headers["If-None-Match"] = entry.headers["etag"]
+        if "last-modified" in entry.headers:
+            headers["If-Modified-Since"] = entry.headers["last-modified"]
+    
+    response = session.request("GET", url, headers=headers, **kwargs)
+    
+    if response.status_code == 304 and entry:
+        entry.refresh(response.headers)
+        http_cache.save(prepared.url, entry, write_body=False)
+        return entry.to_response(prepared)
+    
+    if response.status_code == 200:
+        http_cache.store(prepared.url, response, prepared.headers)
+    response.from_cache = False
+    return response
+
+
+def get(url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> requests.Response:
+    """
+    Send a GET request through the shared session and HTTP cache.
+    
+    Args:
+        url: The URL
+        params: Optional query parameters
+        **kwargs: Passed on to requests
+    
+    Returns:
+        The response
+    """
+    return request("GET", url, params=params, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """
+    Send a POST request through the shared session.
+    
+    Args:
+        url: The URL
+        **kwargs: Passed on to requests (data, json, headers, timeout, ...)
+    
+    Returns:
+        The response
+    """
+    return request("POST", url, **kwargs)
+
+
+def clear_cache() -> int:
+    """
+    Remove all cached HTTP responses.
+    
+    Returns:
+        The number of responses removed
+    """
+    return HTTPCache().clear()
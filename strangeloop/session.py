@@ -0,0 +1,239 @@
+"""
+Session memory for Strangeloop.
+Keeps named conversations for `do` with a bounded, compacted context.
+"""
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .llm import CHARS_PER_TOKEN, estimate_tokens
+from .storage import connect
+
+DEFAULT_TOKEN_BUDGET = 2000
+DEFAULT_KEEP_RECENT = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_session_id ON turns (session, id);
+CREATE TABLE IF NOT EXISTS summaries (
+    session TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    upto_id INTEGER NOT NULL
+);
+"""
+
+SUMMARY_PROMPT = """
+Summarize the following conversation between a user and the strangeloop agent
+so that it can be continued later. Keep facts, names, values, results and open
+questions that later requests may refer to. Write at most {words} words.
+
+{conversation}
+
+Respond with the summary only.
+"""
+
+
+class SessionStore:
+    """Persistent store of session turns and their compacted summaries, safe to share between threads."""
+    
+    def __init__(self, connection: Optional[sqlite3.Connection] = None):
+        """
+        Initialize the session store.
+        
+        Args:
+            connection: Optional database connection (defaults to sessions.db in the data dir)
+        """
+        self.connection = connection or connect("sessions.db")
+        self.connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+    
+    def append(self, session: str, role: str, content: str) -> int:
+        """
+        Append a turn to a session.
+        
+        Args:
+            session: The session name
+            role: Who produced the turn ("user" or "assistant")
+            content: The turn text
+        
+        Returns:
+            The id of the new turn
+        """
+        with self._lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO turns (session, role, content, tokens, created_at) VALUES (?, ?, ?, ?, ?)",
+                (session, role, content, estimate_tokens(content), time.time()))
+        return cursor.lastrowid
+    
+    def tail(self, session: str, limit: int, after_id: int = 0) -> List[Dict[str, Any]]:
+        """
+        Get the most recent turns of a session, oldest first.
+        
+        Args:
+            session: The session name
+            limit: Maximum number of turns to return
+            after_id: Only return turns with an id greater than this
+        
+        Returns:
+            List of turns as dictionaries
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT id, role, content, tokens, created_at FROM turns "
+                "WHERE session = ? AND id > ? ORDER BY id DESC LIMIT ?",
+                (session, after_id, limit)).fetchall()
+        return [dict(row) for row in reversed(rows)]
+    
+    def get_summary(self, session: str) -> Tuple[str, int]:
+        """
+        Get the compacted summary of a session.
+        
+        Args:
+            session: The session name
+        
+        Returns:
+            Tuple of the summary text (empty if none) and the id of the last summarized turn
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT content, upto_id FROM summaries WHERE session = ?", (session,)).fetchone()
+        return (row["content"], row["upto_id"]) if row else ("", 0)
+    
+    def set_summary(self, session: str, content: str, upto_id: int) -> None:
+        """
+        Replace the compacted summary of a session.
+        
+        Args:
+            session: The session name
+            content: The summary text
+            upto_id: The id of the last turn covered by the summary
+        """
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO summaries (session, content, tokens, upto_id) VALUES (?, ?, ?, ?)",
+                (session, content, estimate_tokens(content), upto_id))
+    
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        """
+        List all sessions.
+        
+        Returns:
+            List of dictionaries with session name, turn count and last activity time
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT session, COUNT(*) AS turns, MAX(created_at) AS last_active "
+                "FROM turns GROUP BY session ORDER BY last_active DESC").fetchall()
+        return [dict(row) for row in rows]
+    
+    def delete(self, session: str) -> bool:
+        """
+        Delete a session and its summary.
+        
+        Args:
+            session: The session name
+        
+        Returns:
+            True if the session existed, False otherwise
+        """
+        with self._lock, self.connection:
+            deleted = self.connection.execute("DELETE FROM turns WHERE session = ?", (session,)).rowcount
+            self.connection.execute("DELETE FROM summaries WHERE session = ?", (session,))
+        return deleted > 0
+
+
+class SessionMemory:
+    """Bounded conversation memory for one session."""
+    
+    def __init__(self, store: SessionStore, session: str, summarize: Callable[[str], str],
+                 token_budget: int = DEFAULT_TOKEN_BUDGET, keep_recent: int = DEFAULT_KEEP_RECENT):
+        """
+        Initialize the session memory.
+        
+        Args:
+            store: The session store
+            session: The session name
+            summarize: Function sending a prompt to the LLM and returning the response text
+            token_budget: Maximum size of the context in tokens
+            keep_recent: Number of most recent turns always kept verbatim
+        """
+        self.store = store
+        self.session = session
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+    
+    def _unsummarized(self) -> Tuple[str, List[Dict[str, Any]]]:
+        summary, upto_id = self.store.get_summary(self.session)
+        # Compaction keeps unsummarized turns within the budget, so this read is bounded
+        limit = max(self.token_budget, self.keep_recent)
+        return summary, self.store.tail(self.session, limit, after_id=upto_id)
+    
+    def compact(self) -> bool:
+        """
+        Fold older turns into the summary if the context is over budget.
+        
+        Returns:
+            True if a compaction happened
+        """
+        summary, turns = self._unsummarized()
+        total = estimate_tokens(summary) + sum(turn["tokens"] for turn in turns)
+        if total <= self.token_budget or len(turns) <= self.keep_recent:
+            return False
+        
+        older = turns[:-self.keep_recent] if self.keep_recent else turns
+        conversation = "\n".join(f"{turn['role'].capitalize()}: {turn['content']}" for turn in older)
+        if summary:
+            conversation = f"Summary of the conversation before this:\n{summary}\n\n{conversation}"
+        
+        words = max(self.token_budget // 4, 50)
+        new_summary = self.summarize(SUMMARY_PROMPT.format(words=words, conversation=conversation)).strip()
+        
+        # Never let the summary itself outgrow its share of the budget
+        max_chars = (self.token_budget // 2) * CHARS_PER_TOKEN
+        self.store.set_summary(self.session, new_summary[:max_chars], older[-1]["id"])
+        return True
+    
+    def context(self) -> str:
+        """
+        Get the session context for a prompt, compacting first if needed.
+        
+        Returns:
+            The summary and recent turns as text (empty for a new session)
+        """
+        self.compact()
+        summary, turns = self._unsummarized()
+        
+        # Keep a single oversized turn from blowing the budget
+        turn_chars = max(self.token_budget * CHARS_PER_TOKEN // (len(turns) + 1), 200) if turns else 0
+        
+        lines = []
+        if summary:
+            lines.append(f"Summary of earlier conversation: {summary}")
+        for turn in turns:
+            content = turn["content"]
+            if len(content) > turn_chars:
+                content = content[:turn_chars] + " [...]"
+            lines.append(f"{turn['role'].capitalize()}: {content}")
+        
+        return "\n".join(lines)
+    
+    def record(self, request: str, outcome: str) -> None:
+        """
+        Record a request and its outcome as a pair of turns.
+        
+        Args:
+            request: What the user asked for
+            outcome: What the agent did or answered
+        """
+        self.store.append(self.session, "user", request)
+        self.store.append(self.session, "assistant", outcome)
@@ -0,0 +1,101 @@
+"""
+Single-flight call coalescing for Strangeloop.
+Identical calls made while one is already in flight wait for it and share its
+result instead of each paying for their own.
+"""
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def content_key(*parts: Any) -> str:
+    """
+    Hash the content of a call into a coalescing key.
+    
+    Args:
+        *parts: JSON-serializable parts identifying the call (others are hashed by repr)
+    
+    Returns:
+        The hex digest
+    """
+    encoded = json.dumps(parts, sort_keys=True, default=repr, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """A call in flight, with its outcome once it finishes."""
+    
+    __slots__ = ("done", "result", "error")
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Group of calls where concurrent calls with the same key run only once.
+    
+    The first caller of a key runs the call; callers arriving before it
+    finishes wait and receive the same result, or the same exception. Nothing
+    is cached: a call made after the previous one finished runs again.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+    
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run a call, or join the identical call already in flight.
+        
+        Args:
+            key: Key identifying identical calls (see content_key)
+            fn: The call
+        
+        Returns:
+            Tuple of the result and whether it was shared with another caller
+        
+        Raises:
+            Exception: Whatever the call raises
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    def counters(self) -> Dict[str, int]:
+        """
+        Get the call counters.
+        
+        Returns:
+            Dictionary with the number of calls executed, calls coalesced into
+            another one, and calls in flight
+        """
+        with self._lock:
+            return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self._calls)}
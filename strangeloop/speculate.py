@@ -0,0 +1,209 @@
+"""
+Speculative execution for Strangeloop's AI agent loop.
+Runs the planner's top candidate capabilities, concurrently when they are
+idempotent, and keeps the first successful result, instead of paying another
+planning round trip when the first choice fails.
+"""
+import collections.abc
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .execution import execute_capability, is_idempotent
+
+# Upper bound on candidates run at once, whatever is requested
+MAX_CANDIDATES = 5
+
+
+def candidate_list(plan: Dict[str, Any], k: int) -> List[Dict[str, Any]]:
+    """
+    Get the ranked candidates of a use_capability plan.
+    
+    The plan's own capability and arguments come first, followed by its
+    "candidates" entries; duplicates and malformed entries are dropped.
+    
+    Args:
+        plan: The action plan
+        k: Maximum number of candidates
+    
+    Returns:
+        Up to k dictionaries with a capability name and arguments, best first
+    """
+    ranked = [{"capability": plan.get("capability"), "arguments": plan.get("arguments", [])}]
+    ranked.extend(plan.get("candidates") or [])
+    
+    candidates: List[Dict[str, Any]] = []
+    seen = set()
+    for candidate in ranked:
+        if not isinstance(candidate, dict) or not candidate.get("capability"):
+            continue
+        arguments = candidate.get("arguments") or []
+        if not isinstance(arguments, list):
+            arguments = [arguments]
+        key = (candidate["capability"], repr(arguments))
+        if key in seen:
+            continue
+        seen.add(key)
+        candidates.append({"capability": candidate["capability"], "arguments": arguments})
+        if len(candidates) >= k:
+            break
+    return candidates
+
+
+def _discard(result: Any) -> None:
+    """Release a result nobody will read."""
+    if isinstance(result, collections.abc.Generator):
+        result.close()
+
+
+def _drain(arrivals: "queue.Queue", pending: int) -> None:
+    """Discard the results of cancelled candidates as they finish."""
+    for _ in range(pending):
+        _discard(arrivals.get()[2])
+
+
+def _prepend(first: Any, rest: collections.abc.Iterator) -> collections.abc.Generator:
+    """Yield an item already taken from an iterator, then the rest of it."""
+    try:
+        yield first
+        yield from rest
+    finally:
+        if isinstance(rest, collections.abc.Generator):
+            rest.close()
+
+
+def _first_item(result: Any) -> Any:
+    """
+    Take the first item of a streamed result, so a capability that fails as soon
+    as it is iterated fails here instead of winning.
+    """
+    if not isinstance(result, collections.abc.Iterator):
+        return result
+    try:
+        first = next(result)
+    except StopIteration:
+        return iter(())
+    return _prepend(first, result)
+
+
+def _stages(funcs: List[Optional[Callable]]) -> List[List[int]]:
+    """
+    Group candidates into stages run one after another.
+    
+    Consecutive idempotent candidates race each other in one stage; any other
+    candidate may have side effects and runs alone, so it never runs
+    alongside another candidate or after one has already won.
+    """
+    stages: List[List[int]] = []
+    racing = False
+    for index, func in enumerate(funcs):
+        if func is None:
+            continue
+        idempotent = is_idempotent(func)
+        if idempotent and racing:
+            stages[-1].append(index)
+        else:
+            stages.append([index])
+        racing = idempotent
+    return stages
+
+
+def run_speculative(candidates: List[Dict[str, Any]], lookup: Callable[[str], Optional[Callable]],
+                    deadline: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Run candidate capabilities concurrently and take the first successful result.
+    
+    Only idempotent candidates (see execution.is_idempotent) run concurrently:
+    consecutive ones start at once, each on its own thread, and the first to
+    succeed wins. The others are cancelled: their results are dropped
+    (generators are closed) and their threads are left to finish in the
+    background, as Python can't interrupt a running call. Any other candidate
+    runs alone, in its rank order, and only if every candidate before it
+    failed. A candidate that returns an iterator succeeds once it produces
+    its first item, and one that isn't available counts as failed.
+    
+    Args:
+        candidates: Candidates as returned by candidate_list, best first
+        lookup: Function returning the capability function for a name, or None
+        deadline: Seconds to wait for a successful result (None to wait for all candidates)
+    
+    Returns:
+        Dictionary with the winning candidate (or None), its result, and the
+        candidates with their status ("won", "failed", "cancelled", "timed_out"
+        or "skipped" if never started), time in ms until they finished or were
+        given up on (None if skipped), and error
+    """
+    arrivals: "queue.Queue" = queue.Queue()
+    start = time.perf_counter()
+    report = [{"capability": c["capability"], "arguments": c["arguments"], "status": "skipped",
+               "ms": None, "error": None} for c in candidates]
+    
+    funcs: List[Optional[Callable]] = []
+    for entry in report:
+        try:
+            func = lookup(entry["capability"])
+            if func is None:
+                raise LookupError(f"Capability '{entry['capability']}' not found")
+        except Exception as e:
+            func = None
+            entry.update(status="failed", ms=(time.perf_counter() - start) * 1000.0,
+                         error=f"{type(e).__name__}: {e}")
+        funcs.append(func)
+    
+    def attempt(index: int) -> None:
+        candidate = candidates[index]
+        try:
+            result = execute_capability(candidate["capability"], funcs[index], candidate["arguments"])
+            arrivals.put((index, time.perf_counter() - start, _first_item(result), None))
+        except Exception as e:
+            arrivals.put((index, time.perf_counter() - start, None, f"{type(e).__name__}: {e}"))
+    
+    winner = None
+    result = None
+    pending = 0
+    for stage in _stages(funcs):
+        for index in stage:
+            report[index]["status"] = "cancelled"
+            threading.Thread(target=attempt, args=(index,), daemon=True).start()
+        
+        pending = len(stage)
+        timed_out = False
+        while pending:
+            timeout = None if deadline is None else deadline - (time.perf_counter() - start)
+            try:
+                if timeout is not None and timeout <= 0:
+                    raise queue.Empty
+                index, seconds, value, error = arrivals.get(timeout=timeout)
+            except queue.Empty:
+                timed_out = True
+                for index in stage:
+                    if report[index]["ms"] is None:
+                        report[index]["status"] = "timed_out"
+                break
+            
+            pending -= 1
+            report[index]["ms"] = seconds * 1000.0
+            if error is None:
+                report[index]["status"] = "won"
+                winner, result = index, value
+                break
+            report[index]["status"] = "failed"
+            report[index]["error"] = error
+        
+        if winner is not None or timed_out:
+            break
+    
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    if pending:
+        threading.Thread(target=_drain, args=(arrivals, pending), daemon=True).start()
+        for entry in report:
+            if entry["ms"] is None and entry["status"] != "skipped":
+                entry["ms"] = elapsed_ms
+    
+    return {
+        "winner": None if winner is None else candidates[winner],
+        "result": result,
+        "candidates": report,
+        "ms": elapsed_ms,
+    }
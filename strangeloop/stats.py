@@ -0,0 +1,59 @@
+"""
+Statistics helpers for Strangeloop.
+Provides percentile and summary calculations for latency samples.
+"""
+import math
+import statistics
+from typing import Dict, List, Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Calculate a percentile using linear interpolation between closest ranks.
+    
+    Args:
+        values: The samples to calculate the percentile over
+        q: The percentile to calculate (0-100)
+    
+    Returns:
+        The percentile value, or 0.0 if there are no samples
+    """
+    if not values:
+        return 0.0
+    
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return float(ordered[0])
+    
+    rank = (len(ordered) - 1) * (q / 100.0)
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return float(ordered[int(rank)])
+    
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(samples: List[float], scale: float = 1000.0) -> Dict[str, float]:
+    """
+    Summarize a list of timing samples.
+    
+    Args:
+        samples: Timing samples in seconds
+        scale: Multiplier applied to every statistic (defaults to milliseconds)
+    
+    Returns:
+        Dictionary with run count, min, max, mean, median, p95 and stdev
+    """
+    if not samples:
+        return {"runs": 0}
+    
+    return {
+        "runs": len(samples),
+        "min": min(samples) * scale,
+        "max": max(samples) * scale,
+        "mean": statistics.fmean(samples) * scale,
+        "median": statistics.median(samples) * scale,
+        "p95": percentile(samples, 95) * scale,
+        "stdev": (statistics.stdev(samples) if len(samples) > 1 else 0.0) * scale,
+    }
@@ -0,0 +1,31 @@
+"""
+Embedded storage for Strangeloop.
+Provides SQLite databases in the XDG data directory for persistent local state.
+"""
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+from .config import get_data_dir
+
+
+def connect(name: str, directory: Optional[Path] = None) -> sqlite3.Connection:
+    """
+    Open (or create) a SQLite database tuned for many small appends.
+    
+    The database uses write-ahead logging, so appends don't block readers
+    and concurrent strangeloop processes can share it.
+    
+    Args:
+        name: The database file name
+        directory: Optional directory for the database (defaults to the data dir)
+    
+    Returns:
+        An open connection with rows returned as sqlite3.Row
+    """
+    path = (directory or get_data_dir()) / name
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
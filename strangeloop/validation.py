@@ -0,0 +1,404 @@
+"""
+Performance validation for LLM-generated capabilities.
+Runs static checks for known anti-patterns, and optionally a micro-benchmark
+in a subprocess, before generated code is saved.
+"""
+import ast
+import inspect
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BUDGET_MS = 50.0
+DEFAULT_ITERATIONS = 20
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_ROUNDS = 2
+
+HTTP_CLIENTS = {"requests", "httpx"}
+HTTP_METHODS = {"get", "post", "put", "patch", "delete", "head", "options", "request"}
+NETWORK_MODULES = {"requests", "httpx", "urllib", "http", "socket", "aiohttp"}
+# Modules and builtins that reach the file system, other processes or arbitrary code
+SYSTEM_MODULES = {"os", "shutil", "subprocess", "pathlib", "tempfile", "glob", "io", "ctypes", "multiprocessing",
+                  "signal", "sys", "importlib", "builtins", "pickle", "sqlite3"}
+SYSTEM_CALLS = {"open", "exec", "eval", "compile", "__import__"}
+# Environment variables passed on to the benchmark subprocess; everything else (API keys included) is dropped
+BENCHMARK_ENV = ("PATH", "LANG", "LC_ALL", "SYSTEMROOT", "TMPDIR")
+RANDOM_PICKERS = {"choice", "randint", "randrange", "random"}
+
+REGENERATION_PROMPT = """
+The following Python function was generated for this capability description:
+
+{description}
+
+```python
+{code}
+```
+
+It failed performance validation with these problems:
+
+{problems}
+
+Rewrite the function so that it fixes every problem while keeping the same name,
+signature and behavior. Only return the function code, nothing else.
+"""
+
+
+def _call_name(node: ast.Call) -> str:
+    """Get the dotted name of a call target, e.g. "requests.get" (empty if not a plain name)."""
+    parts = []
+    target = node.func
+    while isinstance(target, ast.Attribute):
+        parts.append(target.attr)
+        target = target.value
+    if isinstance(target, ast.Name):
+        parts.append(target.id)
+        return ".".join(reversed(parts))
+    return ""
+
+
+class _AntiPatternVisitor(ast.NodeVisitor):
+    """Collects performance anti-patterns from a module's AST."""
+    
+    def __init__(self):
+        self.issues: List[Dict[str, Any]] = []
+        # Loop depth of the latest string assignment to each name in the current function
+        self.string_depths: Dict[str, int] = {}
+        self.loop_depth = 0
+    
+    def _issue(self, check: str, node: ast.AST, message: str) -> None:
+        self.issues.append({"check": check, "line": getattr(node, "lineno", 0), "message": message})
+    
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        outer = self.string_depths, self.loop_depth
+        self.string_depths, self.loop_depth = {}, 0
+        self.generic_visit(node)
+        self.string_depths, self.loop_depth = outer
+    
+    visit_AsyncFunctionDef = visit_FunctionDef
+    
+    def visit_Assign(self, node: ast.Assign) -> None:
+        if isinstance(node.value, (ast.Constant, ast.JoinedStr)) and isinstance(getattr(node.value, "value", ""), str):
+            self.string_depths.update((t.id, self.loop_depth) for t in node.targets if isinstance(t, ast.Name))
+        self.generic_visit(node)
+    
+    def _visit_loop(self, node: ast.AST) -> None:
+        self.loop_depth += 1
+        self.generic_visit(node)
+        self.loop_depth -= 1
+    
+    visit_For = _visit_loop
+    visit_While = _visit_loop
+    
+    def visit_AugAssign(self, node: ast.AugAssign) -> None:
+        # Only a string started outside the loop grows with every iteration; one reset
+        # in each iteration only gets a fixed number of parts
+        if (isinstance(node.op, ast.Add) and isinstance(node.target, ast.Name)
+                and self.string_depths.get(node.target.id, self.loop_depth) < self.loop_depth):
+            self._issue("string-concat-in-loop", node,
+                        f"String '{node.target.id}' is built with += across loop iterations; "
+                        "collect parts and join once")
+        self.generic_visit(node)
+    
+    def visit_Call(self, node: ast.Call) -> None:
+        name = _call_name(node)
+        module, _, method = name.rpartition(".")
+        keywords = {keyword.arg for keyword in node.keywords}
+        
+        if module in HTTP_CLIENTS and method in HTTP_METHODS:
+            self._issue("per-call-connection", node,
+                        f"{name}() opens a new connection on every call; use strangeloop.runtime.http instead")
+            if "timeout" not in keywords:
+                self._issue("no-timeout", node, f"{name}() has no timeout and can hang forever")
+        elif name in ("urllib.request.urlopen", "urlopen") and "timeout" not in keywords and len(node.args) < 3:
+            self._issue("no-timeout", node, f"{name}() has no timeout and can hang forever")
+        elif name == "time.sleep":
+            self._issue("sleep", node, "time.sleep() adds fixed latency to every call")
+        
+        # "".join(random.choice(pool) for _ in range(n)) makes one Python-level call per item.
+        # secrets.choice is left alone: its bulk replacement would be random.choices, which
+        # isn't cryptographically secure
+        is_join = isinstance(node.func, ast.Attribute) and node.func.attr == "join"
+        if is_join and node.args and isinstance(node.args[0], (ast.GeneratorExp, ast.ListComp)):
+            element = node.args[0].elt
+            if isinstance(element, ast.Call):
+                picker = _call_name(element).rpartition(".")
+                if picker[0] == "random" and picker[2] in RANDOM_PICKERS:
+                    self._issue("per-item-loop", node,
+                                f"{_call_name(element)}() is called once per item; generate items in bulk "
+                                "(e.g. random.choices(k=n))")
+        
+        self.generic_visit(node)
+
+
+def static_checks(code: str) -> List[Dict[str, Any]]:
+    """
+    Check source code for known performance anti-patterns.
+    
+    Args:
+        code: The Python source code
+    
+    Returns:
+        List of issues, each with the check name, line number and a message
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return [{"check": "syntax", "line": e.lineno or 0, "message": f"Syntax error: {e.msg}"}]
+    
+    visitor = _AntiPatternVisitor()
+    visitor.visit(tree)
+    return visitor.issues
+
+
+def _imported_names(code: str) -> List[str]:
+    """Get the dotted names imported anywhere in source code (empty if it doesn't parse)."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+    
+    names: List[str] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            names.extend(f"{node.module}.{alias.name}" for alias in node.names)
+    return names
+
+
+def uses_network(code: str) -> bool:
+    """
+    Check whether source code imports a networking module.
+    
+    Args:
+        code: The Python source code
+    
+    Returns:
+        True if the code imports requests, urllib, socket or a similar module
+    """
+    return any(name.split(".")[0] in NETWORK_MODULES or name.startswith("strangeloop.runtime.http")
+               for name in _imported_names(code))
+
+
+def uses_system(code: str) -> bool:
+    """
+    Check whether source code can reach the file system, other processes or arbitrary code.
+    
+    Args:
+        code: The Python source code
+    
+    Returns:
+        True if the code imports os, shutil, subprocess or a similar module, or
+        calls open, exec, eval, compile or __import__
+    """
+    if any(name.split(".")[0] in SYSTEM_MODULES for name in _imported_names(code)):
+        return True
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return False
+    return any(isinstance(node, ast.Call) and _call_name(node) in SYSTEM_CALLS for node in ast.walk(tree))
+
+
+SAMPLE_VALUES = {
+    "int": 8,
+    "float": 1.0,
+    "bool": True,
+    "str": "strangeloop",
+    "bytes": b"strangeloop",
+    "list": [],
+    "List": [],
+    "dict": {},
+    "Dict": {},
+    "tuple": (),
+    "Tuple": (),
+}
+
+
+def _sample_value(annotation: Any) -> Any:
+    """Pick a sample value for a type annotation such as int, "str" or Optional[List[int]]."""
+    if isinstance(annotation, type):
+        type_name = annotation.__name__
+    else:
+        type_name = str(annotation).replace("typing.", "")
+    
+    # Optional[X], Union[X, ...] and X | None: use the first type mentioned
+    if type_name.startswith(("Optional[", "Union[")):
+        type_name = type_name.split("[", 1)[1]
+    type_name = type_name.split("|")[0].split(",")[0].split("[")[0].strip(" ]")
+    
+    return SAMPLE_VALUES.get(type_name, "strangeloop")
+
+
+def synthesize_arguments(func: Callable) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Build plausible arguments for a function from its signature.
+    
+    Parameters with defaults keep them; required parameters get a sample
+    value based on their type annotation.
+    
+    Args:
+        func: The function to build arguments for
+    
+    Returns:
+        Tuple of positional and keyword arguments
+    """
+    args: List[Any] = []
+    kwargs: Dict[str, Any] = {}
+    
+    for name, param in inspect.signature(func).parameters.items():
+        if param.default is not inspect.Parameter.empty:
+            continue
+        if param.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD):
+            continue
+        
+        value = _sample_value(param.annotation)
+        if param.kind == inspect.Parameter.KEYWORD_ONLY:
+            kwargs[name] = value
+        else:
+            args.append(value)
+    
+    return args, kwargs
+
+
+def _run_harness() -> None:
+    """Benchmark harness run in a subprocess: reads a job from stdin and prints timings as JSON."""
+    job = json.load(sys.stdin)
+    namespace: Dict[str, Any] = {}
+    result: Dict[str, Any] = {}
+    
+    try:
+        exec(job["code"], namespace)
+        func = namespace[job["name"]]
+        args, kwargs = synthesize_arguments(func)
+        result["arguments"] = repr((args, kwargs))
+        
+        func(*args, **kwargs)
+        samples = []
+        for _ in range(job["iterations"]):
+            start = time.perf_counter()
+            func(*args, **kwargs)
+            samples.append(time.perf_counter() - start)
+        
+        samples.sort()
+        result["median_ms"] = samples[len(samples) // 2] * 1000.0
+        result["max_ms"] = samples[-1] * 1000.0
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    
+    print(json.dumps(result))
+
+
+def benchmark_code(code: str, function_name: str, iterations: int = DEFAULT_ITERATIONS,
+                   timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+    """
+    Micro-benchmark a generated function with synthetic arguments in a subprocess.
+    
+    This is not a sandbox: the code runs with the user's privileges. The
+    subprocess only gets a minimal environment (no API keys) and runs in an
+    empty temporary directory with its own XDG homes, so the code can't read
+    credentials from the environment or touch files relative to the user's
+    working directory by accident.
+    
+    Args:
+        code: The Python source code
+        function_name: Name of the function to benchmark
+        iterations: Number of timed calls
+        timeout: Seconds before the benchmark is aborted
+    
+    Returns:
+        Dictionary with median_ms and max_ms, or an error message
+    """
+    package_parent = str(Path(__file__).resolve().parent.parent)
+    job = json.dumps({"code": code, "name": function_name, "iterations": iterations})
+    
+    with tempfile.TemporaryDirectory(prefix="strangeloop-benchmark-") as scratch:
+        env = {name: os.environ[name] for name in BENCHMARK_ENV if name in os.environ}
+        env["PYTHONPATH"] = package_parent
+        env["HOME"] = scratch
+        for var in ("XDG_CONFIG_HOME", "XDG_CACHE_HOME", "XDG_DATA_HOME"):
+            env[var] = scratch
+        
+        try:
+            completed = subprocess.run([sys.executable, "-m", "strangeloop.validation"], input=job,
+                                       capture_output=True, text=True, timeout=timeout, env=env, cwd=scratch)
+        except subprocess.TimeoutExpired:
+            return {"error": f"Timed out after {timeout:.0f}s", "timeout": True}
+    
+    try:
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    except (IndexError, json.JSONDecodeError):
+        return {"error": completed.stderr.strip() or "Benchmark produced no output"}
+
+
+def validate_capability(code: str, function_name: str, budget_ms: float = DEFAULT_BUDGET_MS,
+                        iterations: int = DEFAULT_ITERATIONS, timeout: float = DEFAULT_TIMEOUT,
+                        benchmark: bool = False, benchmark_network: bool = False) -> Dict[str, Any]:
+    """
+    Validate a generated capability before it is saved.
+    
+    The static checks always run. The micro-benchmark executes the unreviewed
+    code, so it only runs when asked for, and never for code that imports
+    file system or process modules or calls open, exec or eval.
+    
+    Args:
+        code: The Python source code
+        function_name: Name of the capability function
+        budget_ms: Maximum median call time with synthetic arguments
+        iterations: Number of timed calls in the micro-benchmark
+        timeout: Seconds before the micro-benchmark is aborted
+        benchmark: Whether to run the micro-benchmark
+        benchmark_network: Whether to benchmark code that performs network I/O
+    
+    Returns:
+        Dictionary with a passed flag, the list of issues and the benchmark result
+    """
+    issues = static_checks(code)
+    report: Dict[str, Any] = {"issues": issues, "benchmark": None}
+    
+    if not any(issue["check"] == "syntax" for issue in issues):
+        if not benchmark:
+            report["benchmark"] = {"skipped": "not enabled"}
+        elif uses_system(code):
+            report["benchmark"] = {"skipped": "uses the file system, processes or dynamic code"}
+        elif uses_network(code) and not benchmark_network:
+            report["benchmark"] = {"skipped": "performs network I/O"}
+        else:
+            timing = benchmark_code(code, function_name, iterations, timeout)
+            report["benchmark"] = timing
+            if timing.get("timeout"):
+                issues.append({"check": "benchmark-timeout", "line": 0,
+                               "message": f"A single call took longer than {timeout:.0f}s"})
+            elif timing.get("median_ms", 0.0) > budget_ms:
+                issues.append({"check": "benchmark-budget", "line": 0,
+                               "message": f"Median call time {timing['median_ms']:.1f} ms with arguments "
+                                          f"{timing['arguments']} exceeds the {budget_ms:.0f} ms budget"})
+    
+    report["passed"] = not issues
+    return report
+
+
+def build_regeneration_prompt(description: str, code: str, issues: List[Dict[str, Any]]) -> str:
+    """
+    Build the prompt asking Claude to fix a capability that failed validation.
+    
+    Args:
+        description: The original capability description
+        code: The generated code
+        issues: The validation issues
+    
+    Returns:
+        The regeneration prompt
+    """
+    problems = "\n".join(f"- line {issue['line']}: {issue['message']}" if issue["line"]
+                         else f"- {issue['message']}" for issue in issues)
+    return REGENERATION_PROMPT.format(description=description, code=code, problems=problems)
+
+
+if __name__ == "__main__":
+    _run_harness()
@@ -0,0 +1,108 @@
+"""
+Tests for the runtime HTTP cache's freshness and keying rules.
+"""
+import tempfile
+import time
+import unittest
+from email.utils import formatdate
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from strangeloop.runtime.http import CacheEntry, HTTPCache
+
+URL = "https://api.example.com/data"
+
+
+def make_entry(headers, stored_at=None):
+    return CacheEntry({"url": URL, "status": 200, "headers": headers,
+                       "stored_at": time.time() if stored_at is None else stored_at}, b"body")
+
+
+def make_response(headers, body=b"body"):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body
+    response.url = URL
+    return response
+
+
+class FreshnessTest(unittest.TestCase):
+    def test_max_age(self):
+        self.assertTrue(make_entry({"Cache-Control": "max-age=60"}).is_fresh())
+        self.assertFalse(make_entry({"Cache-Control": "max-age=60"}, stored_at=time.time() - 61).is_fresh())
+    
+    def test_max_age_wins_over_expires(self):
+        entry = make_entry({"Cache-Control": "public, max-age=60", "Expires": formatdate(time.time() - 3600)})
+        self.assertTrue(entry.is_fresh())
+    
+    def test_no_cache_always_revalidates(self):
+        self.assertFalse(make_entry({"Cache-Control": "no-cache, max-age=60"}).is_fresh())
+    
+    def test_expires(self):
+        self.assertTrue(make_entry({"Expires": formatdate(time.time() + 3600)}).is_fresh())
+        self.assertFalse(make_entry({"Expires": formatdate(time.time() - 3600)}).is_fresh())
+        self.assertFalse(make_entry({"Expires": "not a date"}).is_fresh())
+    
+    def test_validators_alone_are_stale(self):
+        self.assertFalse(make_entry({"ETag": '"abc"'}).is_fresh())
+    
+    def test_refresh_renews_freshness_and_validators(self):
+        entry = make_entry({"Cache-Control": "max-age=60", "ETag": '"old"'}, stored_at=time.time() - 120)
+        entry.refresh(CaseInsensitiveDict({"ETag": '"new"', "Cache-Control": "max-age=30"}))
+        self.assertTrue(entry.is_fresh())
+        self.assertEqual(entry.headers["etag"], '"new"')
+
+
+class HTTPCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cache = HTTPCache(Path(self.directory.name))
+    
+    def test_store_and_load(self):
+        self.cache.store(URL, make_response({"Cache-Control": "max-age=60"}))
+        entry = self.cache.load(URL)
+        self.assertEqual(entry.body, b"body")
+        self.assertTrue(entry.to_response().from_cache)
+    
+    def test_uncacheable_responses_are_not_stored(self):
+        self.cache.store(URL, make_response({"Cache-Control": "no-store, max-age=60"}))
+        self.cache.store(URL + "?plain", make_response({}))
+        self.assertIsNone(self.cache.load(URL))
+        self.assertIsNone(self.cache.load(URL + "?plain"))
+    
+    def test_vary_headers_are_part_of_the_key(self):
+        english = CaseInsensitiveDict({"Accept-Language": "en"})
+        french = CaseInsensitiveDict({"Accept-Language": "fr"})
+        self.cache.store(URL, make_response({"Cache-Control": "max-age=60", "Vary": "Accept-Language"}, b"hello"),
+                         english)
+        self.cache.store(URL, make_response({"Cache-Control": "max-age=60", "Vary": "Accept-Language"}, b"bonjour"),
+                         french)
+        self.assertEqual(self.cache.load(URL, english).body, b"hello")
+        self.assertEqual(self.cache.load(URL, french).body, b"bonjour")
+        self.assertIsNone(self.cache.load(URL, CaseInsensitiveDict({"Accept-Language": "de"})))
+    
+    def test_vary_star_is_never_cached(self):
+        self.cache.store(URL, make_response({"Cache-Control": "max-age=60", "Vary": "*"}))
+        self.assertIsNone(self.cache.load(URL))
+    
+    def test_save_after_refresh_keeps_the_variant(self):
+        english = CaseInsensitiveDict({"Accept-Language": "en"})
+        self.cache.store(URL, make_response({"ETag": '"v1"', "Vary": "Accept-Language"}), english)
+        entry = self.cache.load(URL, english)
+        entry.refresh(CaseInsensitiveDict({"Cache-Control": "max-age=60"}))
+        self.cache.save(URL, entry, write_body=False)
+        self.assertTrue(self.cache.load(URL, english).is_fresh())
+    
+    def test_clear(self):
+        self.cache.store(URL, make_response({"Cache-Control": "max-age=60", "Vary": "Accept"}))
+        self.assertEqual(self.cache.clear(), 1)
+        self.assertIsNone(self.cache.load(URL))
+        self.assertEqual(list(Path(self.directory.name).iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Tests for the run journal.
+"""
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from strangeloop.journal import ENTRY, PREVIEW_CHARS, REDACTED, Journal, parse_time
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.journal = Journal(Path(self.directory.name))
+    
+    def append_runs(self, count, start=1000.0):
+        for number in range(count):
+            self.journal.append("run", "error" if number % 10 == 0 else "ok", capability=f"cap{number % 3}",
+                                arguments=[number], result=number, timestamp=start + number)
+    
+    def test_ids_follow_append_order(self):
+        self.assertEqual(len(self.journal), 0)
+        self.assertEqual(self.journal.append("run", "ok", capability="a", result=1), 0)
+        self.assertEqual(self.journal.append("do", "ok", request="hi"), 1)
+        self.assertEqual(len(self.journal), 2)
+        self.assertEqual(self.journal.get(1)["request"], "hi")
+        self.assertIsNone(self.journal.get(2))
+        self.assertIsNone(self.journal.get(-1))
+    
+    def test_query_is_newest_first(self):
+        self.append_runs(5)
+        self.assertEqual([run["id"] for run in self.journal.query()], [4, 3, 2, 1, 0])
+    
+    def test_time_range_uses_index_timestamps(self):
+        self.append_runs(100)
+        runs = list(self.journal.query(since=1010.0, until=1020.0))
+        self.assertEqual([run["id"] for run in runs], list(range(19, 9, -1)))
+    
+    def test_time_range_bounds(self):
+        self.append_runs(10)
+        self.assertEqual(len(list(self.journal.query(since=0.0))), 10)
+        self.assertEqual(list(self.journal.query(since=5000.0)), [])
+        self.assertEqual(list(self.journal.query(until=1000.0)), [])
+        self.assertEqual([run["id"] for run in self.journal.query(until=1000.5)], [0])
+    
+    def test_out_of_order_timestamps_keep_the_index_sorted(self):
+        for timestamp in (1000.0, 1005.0, 1003.0, 1010.0):
+            self.journal.append("run", "ok", timestamp=timestamp)
+        with open(self.journal.index_path, "rb") as f:
+            indexed = [entry[2] for entry in ENTRY.iter_unpack(f.read())]
+        self.assertEqual(indexed, [1000.0, 1005.0, 1005.0, 1010.0])
+        # The run is indexed at the later run's start, but keeps its own time in the log
+        self.assertEqual(self.journal.get(2)["at"], 1003.0)
+        self.assertEqual([run["id"] for run in self.journal.query(since=1004.0, until=1006.0)], [2, 1])
+    
+    def test_filters(self):
+        self.append_runs(30)
+        runs = list(self.journal.query(capability="cap1"))
+        self.assertEqual(len(runs), 10)
+        self.assertTrue(all(run["capability"] == "cap1" for run in runs))
+        self.assertEqual([run["id"] for run in self.journal.query(status="error")], [20, 10, 0])
+        self.assertEqual(list(self.journal.query(kind="do")), [])
+        self.assertEqual([run["id"] for run in self.journal.query(capability="cap0", status="error")], [0])
+    
+    def test_limit(self):
+        self.append_runs(10)
+        self.assertEqual([run["id"] for run in self.journal.query(limit=3)], [9, 8, 7])
+        self.assertEqual(list(self.journal.query(limit=0)), [])
+    
+    def test_torn_index_entry_is_dropped_on_append(self):
+        self.append_runs(2)
+        with open(self.journal.index_path, "ab") as f:
+            f.write(b"\0" * (ENTRY.size // 2))
+        self.assertEqual(self.journal.append("run", "ok", result="after"), 2)
+        self.assertEqual(self.journal.get(2)["result"], "after")
+
+
+class ResultStorageTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+    
+    def test_short_results_are_stored_whole(self):
+        journal = Journal(Path(self.directory.name))
+        run = journal.get(journal.append("run", "ok", result={"price": 1.5}))
+        self.assertEqual((run["result"], run["result_exact"], run["result_stored"]), ({"price": 1.5}, True, "full"))
+    
+    def test_long_results_are_previewed_with_a_digest(self):
+        journal = Journal(Path(self.directory.name))
+        run = journal.get(journal.append("run", "ok", result="x" * 1000))
+        self.assertEqual(run["result_stored"], "preview")
+        self.assertEqual(len(run["result"]), PREVIEW_CHARS)
+        self.assertEqual(len(run["result_digest"]), 64)
+    
+    def test_full_mode_stores_whole_results(self):
+        journal = Journal(Path(self.directory.name), results="full")
+        run = journal.get(journal.append("run", "ok", result="x" * 1000))
+        self.assertEqual((run["result"], run["result_exact"]), ("x" * 1000, True))
+    
+    def test_sensitive_results_are_redacted(self):
+        journal = Journal(Path(self.directory.name), results="full")
+        run = journal.get(journal.append("run", "ok", capability="password", result="hunter2", sensitive=True))
+        self.assertEqual((run["result"], run["result_stored"]), (REDACTED, "redacted"))
+        self.assertNotIn("hunter2", journal.log_path.read_text())
+    
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            Journal(Path(self.directory.name), results="everything")
+
+
+class ParseTimeTest(unittest.TestCase):
+    def test_durations(self):
+        self.assertEqual(parse_time("90s", now=1000.0), 910.0)
+        self.assertEqual(parse_time("2h", now=10000.0), 2800.0)
+        self.assertEqual(parse_time("1.5d", now=200000.0), 200000.0 - 1.5 * 86400)
+    
+    def test_iso_dates(self):
+        self.assertEqual(parse_time("2024-05-01T12:00"), datetime(2024, 5, 1, 12, 0).timestamp())
+    
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_time("yesterday")
+
+
+if __name__ == "__main__":
+    unittest.main()
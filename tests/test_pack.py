@@ -0,0 +1,76 @@
+"""
+Tests for capability pack invalidation.
+"""
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from strangeloop.pack import CapabilityPack, build_pack, source_state
+
+PACKAGE = "strangeloop_test_pack_caps"
+
+MODULE = '''
+def double(x: int) -> int:
+    """Double a number."""
+    return x * 2
+'''
+
+
+class PackInvalidationTest(unittest.TestCase):
+    def setUp(self):
+        self.temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary.cleanup)
+        self.directory = Path(self.temporary.name) / PACKAGE
+        self.directory.mkdir()
+        (self.directory / "__init__.py").write_text(f"from {PACKAGE}.double import double\n")
+        self.module = self.directory / "double.py"
+        self.module.write_text(MODULE)
+        self.pack_path = Path(self.temporary.name) / "caps.pack"
+    
+    def build(self) -> CapabilityPack:
+        build_pack(self.directory, PACKAGE, self.pack_path)
+        return CapabilityPack(self.pack_path)
+    
+    def test_fresh_after_build(self):
+        pack = self.build()
+        self.assertTrue(pack.is_fresh())
+        self.assertEqual([capability["name"] for capability in pack.capabilities_info()], ["double"])
+    
+    def test_state_is_stable(self):
+        self.assertEqual(source_state(self.directory), source_state(self.directory))
+    
+    def test_in_place_edit_of_another_size_makes_it_stale(self):
+        pack = self.build()
+        self.module.write_text(MODULE.replace("x * 2", "x + x + 0"))
+        self.assertFalse(pack.is_fresh())
+    
+    def test_same_size_edit_with_new_mtime_makes_it_stale(self):
+        pack = self.build()
+        stat = self.module.stat()
+        self.module.write_text(MODULE.replace("x * 2", "x * 3"))
+        os.utime(self.module, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.assertEqual(self.module.stat().st_size, stat.st_size)
+        self.assertFalse(pack.is_fresh())
+    
+    def test_added_and_removed_modules_make_it_stale(self):
+        pack = self.build()
+        extra = self.directory / "extra.py"
+        extra.write_text("X = 1\n")
+        self.assertFalse(pack.is_fresh())
+        extra.unlink()
+        self.assertTrue(pack.is_fresh())
+    
+    def test_non_python_files_are_ignored(self):
+        pack = self.build()
+        (self.directory / "notes.txt").write_text("not a module")
+        self.assertTrue(pack.is_fresh())
+    
+    def test_rebuild_is_fresh_again(self):
+        self.build()
+        self.module.write_text(MODULE.replace("x * 2", "x + x + 0"))
+        self.assertTrue(self.build().is_fresh())
+
+
+if __name__ == "__main__":
+    unittest.main()
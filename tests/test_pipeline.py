@@ -0,0 +1,78 @@
+"""
+Tests for resuming the process map-reduce pipeline from its checkpoints.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from strangeloop.pipeline import FilePipeline, checkpoint_key, reduce_checkpoint_key
+
+
+class Interrupted(Exception):
+    pass
+
+
+class PipelineCheckpointTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.path = self.directory / "input.txt"
+        self.path.write_text("".join(f"line {i} of the input file\n" for i in range(40)))
+        self.prompts = []
+        self.merged = 0
+    
+    def pipeline(self, reduce_prompt="merge", model="model-a", merges=None):
+        """A pipeline whose LLM answers with the prompt's first line, interrupted after some merges."""
+        def ask(prompt):
+            if merges is not None and prompt.startswith(reduce_prompt):
+                if self.merged >= merges:
+                    raise Interrupted()
+                self.merged += 1
+            self.prompts.append(prompt)
+            # Long enough that merging takes more than one call
+            return prompt.split("\n", 1)[0] + " result" * 10
+        return FilePipeline(ask, map_prompt="map", reduce_prompt=reduce_prompt, chunk_tokens=20, concurrency=1,
+                            checkpoint_dir=self.directory / "checkpoints", model=model)
+    
+    def map_calls(self):
+        return sum(prompt.startswith("map") for prompt in self.prompts)
+    
+    def test_keys(self):
+        key = checkpoint_key(self.path, 20, "map", "model-a")
+        self.assertEqual(key, checkpoint_key(self.path, 20, "map", "model-a"))
+        self.assertNotEqual(key, checkpoint_key(self.path, 20, "map", "model-b"))
+        self.assertNotEqual(reduce_checkpoint_key(key, "merge"), reduce_checkpoint_key(key, "combine"))
+    
+    def test_resume_keeps_map_results(self):
+        with self.assertRaises(Interrupted):
+            self.pipeline(merges=0).run(self.path)
+        chunks = self.map_calls()
+        self.assertGreater(chunks, 2)
+        
+        self.assertTrue(self.pipeline().run(self.path).startswith("merge "))
+        self.assertEqual(self.map_calls(), chunks)
+        self.assertEqual(list((self.directory / "checkpoints").iterdir()), [])
+    
+    def test_changed_reduce_prompt_redoes_reduction(self):
+        with self.assertRaises(Interrupted):
+            self.pipeline(merges=1).run(self.path)
+        chunks = self.map_calls()
+        
+        self.assertTrue(self.pipeline(reduce_prompt="combine").run(self.path).startswith("combine "))
+        self.assertEqual(self.map_calls(), chunks)
+        # No result merged with the old prompt is reused
+        combined = [prompt for prompt in self.prompts if prompt.startswith("combine")]
+        self.assertFalse([prompt for prompt in combined if "<partial_result>\nmerge" in prompt])
+    
+    def test_changed_model_redoes_map(self):
+        with self.assertRaises(Interrupted):
+            self.pipeline(merges=0).run(self.path)
+        chunks = self.map_calls()
+        
+        self.pipeline(model="model-b").run(self.path)
+        self.assertEqual(self.map_calls(), 2 * chunks)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Tests for the plan cache.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from strangeloop.plan_cache import PlanCache, catalog_version, normalize_request, similarity_key
+from strangeloop.storage import connect
+
+PLAN = {"action": "use_capability", "capability": "say", "arguments": ["Hello"]}
+
+
+class NormalizeTest(unittest.TestCase):
+    def test_exact_key_only_collapses_whitespace(self):
+        self.assertEqual(normalize_request("  say   Hello!\n"), "say Hello!")
+    
+    def test_exact_key_keeps_case_and_punctuation(self):
+        self.assertNotEqual(normalize_request("say Hello"), normalize_request("say hello"))
+        self.assertNotEqual(normalize_request("say hello"), normalize_request("say hello!"))
+    
+    def test_similarity_key_ignores_case_and_punctuation(self):
+        self.assertEqual(similarity_key("Say, HELLO!"), similarity_key("say hello"))
+
+
+class CatalogVersionTest(unittest.TestCase):
+    def test_changes_with_the_catalog(self):
+        first = [{"name": "a", "signature": "()", "docstring": "A"}]
+        second = first + [{"name": "b", "signature": "()", "docstring": "B"}]
+        self.assertEqual(catalog_version(first), catalog_version(list(first)))
+        self.assertNotEqual(catalog_version(first), catalog_version(second))
+    
+    def test_ignores_catalog_order(self):
+        a = {"name": "a", "signature": "()", "docstring": "A"}
+        b = {"name": "b", "signature": "()", "docstring": "B"}
+        self.assertEqual(catalog_version([a, b]), catalog_version([b, a]))
+
+
+class PlanCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.connection = connect("plan_cache.db", Path(self.directory.name))
+        self.addCleanup(self.connection.close)
+        self.cache = PlanCache(self.connection)
+    
+    def test_exact_hit(self):
+        self.cache.put("say  Hello", "v1", PLAN)
+        self.assertEqual(self.cache.get("say Hello", "v1"), (PLAN, 1.0))
+    
+    def test_case_sensitive_requests_are_distinct(self):
+        lower = {**PLAN, "arguments": ["hello"]}
+        self.cache.put("say Hello", "v1", PLAN)
+        self.cache.put("say hello", "v1", lower)
+        self.assertEqual(self.cache.get("say Hello", "v1")[0], PLAN)
+        self.assertEqual(self.cache.get("say hello", "v1")[0], lower)
+    
+    def test_similarity_match_is_opt_in(self):
+        self.cache.put("say Hello!", "v1", PLAN)
+        self.assertIsNone(self.cache.get("SAY hello", "v1"))
+        plan, score = self.cache.get("SAY hello", "v1", similarity=0.9)
+        self.assertEqual(plan, PLAN)
+        self.assertGreaterEqual(score, 0.9)
+    
+    def test_other_catalog_version_misses(self):
+        self.cache.put("say Hello", "v1", PLAN)
+        self.assertIsNone(self.cache.get("say Hello", "v2"))
+    
+    def test_put_drops_plans_of_older_catalogs(self):
+        self.cache.put("say Hello", "v1", PLAN)
+        self.cache.put("say Bye", "v2", PLAN)
+        self.assertEqual(self.connection.execute("SELECT COUNT(*) FROM plans").fetchone()[0], 1)
+    
+    def test_evict_removes_plan_for_every_request(self):
+        other = {**PLAN, "capability": "shout"}
+        self.cache.put("say Hello", "v1", PLAN)
+        self.cache.put("greet", "v1", PLAN)
+        self.cache.put("shout", "v1", other)
+        self.assertEqual(self.cache.evict("v1", PLAN), 2)
+        self.assertIsNone(self.cache.get("say Hello", "v1"))
+        self.assertIsNone(self.cache.get("greet", "v1"))
+        self.assertEqual(self.cache.get("shout", "v1")[0], other)
+    
+    def test_clear(self):
+        self.cache.put("say Hello", "v1", PLAN)
+        self.assertEqual(self.cache.clear(), 1)
+        self.assertIsNone(self.cache.get("say Hello", "v1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
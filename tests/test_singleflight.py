@@ -0,0 +1,96 @@
+"""
+Tests for single-flight call coalescing.
+"""
+import threading
+import time
+import unittest
+
+from strangeloop.singleflight import SingleFlight, content_key
+
+
+class ContentKeyTest(unittest.TestCase):
+    def test_same_content_same_key(self):
+        self.assertEqual(content_key("f", [1, 2], {"a": 1, "b": 2}), content_key("f", [1, 2], {"b": 2, "a": 1}))
+    
+    def test_different_content_different_key(self):
+        self.assertNotEqual(content_key("f", [1]), content_key("f", [2]))
+        self.assertNotEqual(content_key("f", [1]), content_key("g", [1]))
+    
+    def test_unserializable_parts_are_hashed_by_repr(self):
+        self.assertEqual(content_key("f", {1, 2}), content_key("f", {1, 2}))
+
+
+class SingleFlightTest(unittest.TestCase):
+    def run_concurrently(self, group, key, fn, followers):
+        """Start a leader running fn, then followers joining it while it is in flight."""
+        outcomes = []
+        lock = threading.Lock()
+        
+        def call():
+            try:
+                outcome = ("ok",) + group.do(key, fn)
+            except Exception as e:
+                outcome = ("error", e, None)
+            with lock:
+                outcomes.append(outcome)
+        
+        leader = threading.Thread(target=call)
+        leader.start()
+        self.started.wait(5)
+        threads = [threading.Thread(target=call) for _ in range(followers)]
+        for thread in threads:
+            thread.start()
+        # Followers are counted as coalesced before they wait
+        while group.counters()["coalesced"] < followers:
+            time.sleep(0.001)
+        self.release.set()
+        for thread in [leader] + threads:
+            thread.join(5)
+        return outcomes
+    
+    def setUp(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+    
+    def blocking(self, value=None, error=None):
+        def fn():
+            self.calls += 1
+            self.started.set()
+            self.release.wait(5)
+            if error is not None:
+                raise error
+            return value
+        return fn
+    
+    def test_concurrent_calls_share_one_execution(self):
+        group = SingleFlight()
+        outcomes = self.run_concurrently(group, "k", self.blocking(value=object()), followers=3)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len({id(outcome[1]) for outcome in outcomes}), 1)
+        self.assertEqual(sorted(outcome[2] for outcome in outcomes), [False, True, True, True])
+        self.assertEqual(group.counters(), {"executed": 1, "coalesced": 3, "in_flight": 0})
+    
+    def test_followers_receive_the_leaders_exception(self):
+        group = SingleFlight()
+        error = ValueError("boom")
+        outcomes = self.run_concurrently(group, "k", self.blocking(error=error), followers=2)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual([outcome[:2] for outcome in outcomes], [("error", error)] * 3)
+    
+    def test_nothing_is_cached_after_a_call_finishes(self):
+        group = SingleFlight()
+        counter = iter(range(10))
+        self.assertEqual(group.do("k", lambda: next(counter)), (0, False))
+        self.assertEqual(group.do("k", lambda: next(counter)), (1, False))
+        self.assertEqual(group.counters()["executed"], 2)
+    
+    def test_different_keys_run_separately(self):
+        group = SingleFlight()
+        self.assertEqual(group.do("a", lambda: 1), (1, False))
+        self.assertEqual(group.do("b", lambda: 2), (2, False))
+        self.assertEqual(group.counters()["coalesced"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Tests for speculative execution of candidate capabilities.
+"""
+import sys
+import tempfile
+import threading
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from strangeloop.execution import ExecutionStats, execute_capability
+from strangeloop.speculate import candidate_list, run_speculative
+from strangeloop.storage import connect
+
+
+def capability(name, idempotent, func):
+    module = types.ModuleType(f"strangeloop_test_speculate_{name}")
+    module.IDEMPOTENT = idempotent
+    func.__module__ = module.__name__
+    sys.modules[module.__name__] = module
+    return func
+
+
+def candidates(*names):
+    return [{"capability": name, "arguments": []} for name in names]
+
+
+class SpeculateTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connection = connect("execution_stats.db", Path(directory.name))
+        self.addCleanup(connection.close)
+        stats = ExecutionStats(connection)
+        
+        # Keep statistics out of the real data directory
+        patcher = mock.patch("strangeloop.speculate.execute_capability",
+                             lambda name, func, args: execute_capability(name, func, args, stats=stats,
+                                                                         coalesce=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.stats = stats
+        
+        self.calls = []
+        self.lock = threading.Lock()
+        self.capabilities = {}
+    
+    def add(self, name, idempotent, result=None, error=None):
+        def func():
+            with self.lock:
+                self.calls.append(name)
+            if error:
+                raise error
+            return result
+        self.capabilities[name] = capability(name, idempotent, func)
+    
+    def run_candidates(self, *names, deadline=None):
+        return run_speculative(candidates(*names), self.capabilities.get, deadline)
+    
+    def statuses(self, outcome):
+        return [entry["status"] for entry in outcome["candidates"]]
+    
+    def test_candidate_list_drops_duplicates(self):
+        plan = {"capability": "a", "arguments": [1],
+                "candidates": [{"capability": "a", "arguments": [1]}, {"capability": "b"}, "junk"]}
+        self.assertEqual(candidate_list(plan, 5), [{"capability": "a", "arguments": [1]},
+                                                   {"capability": "b", "arguments": []}])
+    
+    def test_side_effecting_candidates_run_alone_and_in_order(self):
+        self.add("first", False, error=RuntimeError("failed"))
+        self.add("second", False, result="second")
+        self.add("third", False, result="third")
+        outcome = self.run_candidates("first", "second", "third")
+        self.assertEqual(outcome["result"], "second")
+        self.assertEqual(self.statuses(outcome), ["failed", "won", "skipped"])
+        self.assertEqual(self.calls, ["first", "second"])
+        self.assertIsNone(outcome["candidates"][2]["ms"])
+        self.assertEqual(set(self.stats.summaries()), {"first", "second"})
+    
+    def test_idempotent_candidates_race(self):
+        self.add("first", True, error=RuntimeError("failed"))
+        self.add("second", True, result="second")
+        self.add("side_effect", False, result="side effect")
+        outcome = self.run_candidates("first", "second", "side_effect")
+        self.assertEqual(outcome["winner"], {"capability": "second", "arguments": []})
+        self.assertEqual(self.statuses(outcome), ["failed", "won", "skipped"])
+        self.assertNotIn("side_effect", self.calls)
+    
+    def test_missing_capability_fails(self):
+        self.add("present", True, result=1)
+        outcome = self.run_candidates("missing", "present")
+        self.assertEqual(self.statuses(outcome), ["failed", "won"])
+        self.assertIn("LookupError", outcome["candidates"][0]["error"])
+    
+    def test_generator_failing_on_first_item_loses(self):
+        def broken():
+            raise ValueError("broken")
+            yield
+        
+        def working():
+            yield from (1, 2)
+        
+        self.capabilities["broken"] = capability("broken", True, broken)
+        self.capabilities["working"] = capability("working", True, working)
+        outcome = self.run_candidates("broken", "working")
+        self.assertEqual(self.statuses(outcome), ["failed", "won"])
+        self.assertEqual(list(outcome["result"]), [1, 2])
+    
+    def test_empty_generator_wins(self):
+        self.capabilities["empty"] = capability("empty", True, lambda: iter(()))
+        outcome = self.run_candidates("empty")
+        self.assertEqual(list(outcome["result"]), [])
+    
+    def test_deadline(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        self.capabilities["slow"] = capability("slow", False, lambda: release.wait())
+        self.add("next", False, result=1)
+        outcome = self.run_candidates("slow", "next", deadline=0.01)
+        self.assertIsNone(outcome["winner"])
+        self.assertEqual(self.statuses(outcome), ["timed_out", "skipped"])
+
+
+if __name__ == "__main__":
+    unittest.main()
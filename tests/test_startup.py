@@ -0,0 +1,27 @@
+"""
+Regression tests for the import-time cost of `strangeloop --help`.
+"""
+import subprocess
+import sys
+import unittest
+
+from strangeloop.bench import HEAVY_STARTUP_MODULES, STARTUP_BUDGET_MS, STARTUP_PROBE, check_startup
+
+
+class StartupTest(unittest.TestCase):
+    def test_help_skips_heavy_modules(self):
+        probe = subprocess.run([sys.executable, "-c", STARTUP_PROBE], capture_output=True, text=True, check=True)
+        loaded = set(probe.stderr.splitlines())
+        heavy = [name for name in HEAVY_STARTUP_MODULES
+                 if name in loaded or any(module.startswith(name + ".") for module in loaded)]
+        self.assertEqual(heavy, [])
+    
+    def test_help_within_budget(self):
+        report = check_startup(runs=5)
+        self.assertTrue(report["ok"], f"`strangeloop --help` takes {report['overhead_ms']:.1f} ms on top of "
+                                      f"the interpreter (budget {STARTUP_BUDGET_MS:g} ms), "
+                                      f"heavy modules: {report['heavy_modules']}")
+
+
+if __name__ == "__main__":
+    unittest.main()
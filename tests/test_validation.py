@@ -0,0 +1,42 @@
+"""
+Tests for the static performance checks run on generated capabilities.
+"""
+import inspect
+import unittest
+
+from strangeloop.capabilities import generate_secure_password
+from strangeloop.validation import static_checks
+
+
+def checks(code):
+    return [issue["check"] for issue in static_checks(code)]
+
+
+class StaticChecksTest(unittest.TestCase):
+    def test_bundled_password_capability_passes(self):
+        module = inspect.getmodule(generate_secure_password)
+        self.assertEqual(static_checks(inspect.getsource(module)), [])
+    
+    def test_string_built_across_iterations(self):
+        code = "def f(items):\n    s = ''\n    for item in items:\n        s += item\n    return s\n"
+        self.assertEqual(checks(code), ["string-concat-in-loop"])
+    
+    def test_string_reset_in_each_iteration(self):
+        code = ("def f(groups):\n    for group in groups:\n        pool = ''\n"
+                "        if group:\n            pool += 'a'\n        yield pool\n")
+        self.assertEqual(checks(code), [])
+    
+    def test_string_concat_outside_loops(self):
+        self.assertEqual(checks("def f(x):\n    s = ''\n    if x:\n        s += 'a'\n    return s\n"), [])
+    
+    def test_per_item_random_pick(self):
+        code = "import random\ndef f(n):\n    return ''.join(random.choice('ab') for _ in range(n))\n"
+        self.assertEqual(checks(code), ["per-item-loop"])
+    
+    def test_per_item_secrets_pick_is_allowed(self):
+        code = "import secrets\ndef f(n):\n    return ''.join(secrets.choice('ab') for _ in range(n))\n"
+        self.assertEqual(checks(code), [])
+
+
+if __name__ == "__main__":
+    unittest.main()